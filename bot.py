@@ -12,7 +12,7 @@ import os
 import sys
 import socket
 import logging
-from io import BytesIO
+import hashlib
 from tempfile import NamedTemporaryFile
 import asyncio
 import time
@@ -43,11 +43,11 @@ from telegram_bot_calendar import DetailedTelegramCalendar, LSTEP
 
 # === Local imports ===
 from handlers.pdf_type_filter import register_pdf_type_handler
-from handlers.export import register_export_handlers, show_filters_menu, generate_report
+from handlers.export import register_export_handlers, show_filters_menu
 from handlers.edit import build_edit_keyboard, get_valid_ids, apply_edits, parse_ids_input
 from handlers.filters import get_default_filters
 # from handlers.config import register_config_handlers
-from handlers.pdf_processing import register_pdf_handlers, cleanup_files
+from handlers.pdf_processing import register_pdf_handlers
 from handlers.logs import register_log_handlers, sanitize_log_content
 from handlers.restart import register_restart_handlers
 from handlers.duplicates import register_duplicate_handlers
@@ -61,15 +61,16 @@ from handlers.edit_templates import (
 from handlers.templates import save_template_name
 # from handlers.config_handlers import show_config_menu
 
-from db.base import DBConnection
-from db.transactions import (
+from db.base import close_pool
+from db.async_base import close_async_pool
+from db.async_transactions import (
     save_transactions,
-    get_transactions,
+    count_transactions,
     update_transactions,
-    get_last_import_ids,
-    get_unique_values,
     get_min_max_dates_by_pdf_type,
     get_transaction_fields,
+    update_duplicates,
+    find_import_by_hash,
 )
 from db.backup import create_backup
 from config.env import TELEGRAM_BOT_TOKEN, ADMINS, DOCKER_MODE
@@ -156,9 +157,11 @@ except socket.error:
     sys.exit(1)
 
 # Импорт ваших скриптов
-from extract_transactions_pdf1 import process_pdf as extract_pdf1
-from extract_transactions_pdf2 import process_csv as extract_pdf2
-from classify_transactions_pdf import (classify_transactions, add_pattern_to_category)
+from classify_transactions_pdf import add_pattern_to_category
+from pdf_processing.cache import ExtractionCache
+from pdf_processing.pipeline import run_pipeline
+from pdf_processing.worker import PdfWorkerPool
+from pdf_processing.workspace import WorkspaceManager
 
 
 class TransactionProcessorBot:
@@ -201,6 +204,13 @@ class TransactionProcessorBot:
         # Загрузка настройки для export_last_import_ids_count
         self.export_last_import_ids_count = general_settings.get('export_last_import_ids_count', 10)
         logger.debug(f"Количество последних import_id для фильтра экспорта установлено в: {self.export_last_import_ids_count}")
+        # Кеш результатов извлечения PDF (None — отключён в settings.yaml)
+        self.extraction_cache = ExtractionCache.from_settings(general_settings.get('extraction_cache'))
+        # Пул процессов обработки PDF; создаётся до запуска Application, пока нет других потоков
+        self.pdf_workers = PdfWorkerPool.from_settings(general_settings.get('pdf_workers'), self.processing_timeout)
+        # Отдельный рабочий каталог на каждую выписку + периодическая очистка брошенных
+        self.workspaces = WorkspaceManager.from_settings(general_settings.get('workspaces'))
+        self._janitor_task = None
 
         # Настройка Application
         self.application = (
@@ -209,6 +219,7 @@ class TransactionProcessorBot:
             .read_timeout(self.request_timeout)
             .write_timeout(self.request_timeout)
             .post_init(self._configure_bot)
+            .post_shutdown(self._on_shutdown)
             .build()
         )
 
@@ -328,6 +339,18 @@ class TransactionProcessorBot:
             scope = BotCommandScopeChat(admin_id)
             await app.bot.set_my_commands(admin_commands, scope=scope)
 
+        self._janitor_task = asyncio.create_task(self.workspaces.run_janitor())
+        await self.pdf_workers.start()
+
+
+    async def _on_shutdown(self, app: Application) -> None:
+        """Освобождает ресурсы после остановки Application."""
+        if self._janitor_task:
+            self._janitor_task.cancel()
+        await self.pdf_workers.close()
+        await close_async_pool()
+        close_pool()
+
 
     @admin_only
     async def get_min_max_dates(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -337,8 +360,7 @@ class TransactionProcessorBot:
         максимальной дате операции для каждого pdf_type.
         """
         try:
-            with DBConnection() as db:
-                date_ranges = get_min_max_dates_by_pdf_type(user_id=update.effective_user.id, db=db)
+            date_ranges = await get_min_max_dates_by_pdf_type(user_id=update.effective_user.id)
 
             if not date_ranges:
                 await update.message.reply_text("ℹ️ Данные о датах по типам PDF не найдены. Возможно, база данных пуста или не содержит записей с указанным типом PDF.")
@@ -393,28 +415,31 @@ class TransactionProcessorBot:
             logger.debug(f"db_parsed_filters для handle_edit_filter_proceed: {db_parsed_filters}")
             start_date_dt = datetime.strptime(filters_for_db['start_date'], '%d.%m.%Y')
             end_date_dt = datetime.strptime(filters_for_db['end_date'], '%d.%m.%Y')
-            with DBConnection() as db:
-                df_transactions = get_transactions(
-                    user_id=update.effective_user.id,
-                    start_date=start_date_dt,
-                    end_date=end_date_dt,
-                    filters=db_parsed_filters if db_parsed_filters else None,
-                    db=db
-                )
-            ids_from_filter = df_transactions['id'].tolist()
-            if not ids_from_filter:
+            found_count = await count_transactions(
+                user_id=update.effective_user.id,
+                start_date=start_date_dt,
+                end_date=end_date_dt,
+                filters=db_parsed_filters if db_parsed_filters else None,
+            )
+            if not found_count:
                 await query.edit_message_text("⚠ По выбранным фильтрам не найдено записей для редактирования.")
                 return
-            context.user_data['edit_mode']['ids'] = ids_from_filter
+            # Изменения применяются одним UPDATE по этому же фильтру (без списка ID)
+            context.user_data['edit_mode']['ids'] = []
+            context.user_data['edit_mode']['db_filters'] = {
+                'start_date': start_date_dt,
+                'end_date': end_date_dt,
+                **db_parsed_filters,
+            }
             context.user_data["edit_mode"]["updates"] = {}
-            logger.info(f"Редактирование по фильтру: найдено {len(ids_from_filter)} ID. IDs: {ids_from_filter[:10]}...")
+            logger.info(f"Редактирование по фильтру: найдено {found_count} записей.")
         except Exception as e:
             logger.error(f"Ошибка получения ID по фильтрам: {e}", exc_info=True)
             await query.edit_message_text("⚠️ Ошибка при применении фильтров")
             context.user_data.pop('edit_mode', None)
             return
         await query.edit_message_text(
-            f"ℹ️ Найдено {len(ids_from_filter)} записей для редактирования.\n"
+            f"ℹ️ Найдено {found_count} записей для редактирования.\n"
             "✏️ Выберите поле для редактирования:",
             reply_markup=build_edit_keyboard(
                 context.user_data.get("edit_mode", {}).get("updates"),
@@ -504,7 +529,7 @@ class TransactionProcessorBot:
             await self.handle_text_input(update, context)
             return False
         try:
-            ids = get_valid_ids(update.message.text.strip())
+            ids = await get_valid_ids(update.message.text.strip())
         except ValueError as e:
             await update.message.reply_text(str(e))
             return
@@ -655,21 +680,21 @@ class TransactionProcessorBot:
 
         edit_mode = context.user_data.get('edit_mode', {})
         ids = edit_mode.get('ids')
+        db_filters = edit_mode.get('db_filters')
         updates = edit_mode.get('updates')
 
-        if not ids or not updates:
+        if (not ids and not db_filters) or not updates:
             await query.edit_message_text("ℹ️ Нет выбранных изменений")
             context.user_data.pop('edit_mode', None)
             return
 
         try:
-            with DBConnection() as db:
-                updated_ids = update_transactions(
-                    user_id=query.from_user.id,
-                    ids=ids,
-                    updates=updates,
-                    db=db,
-                )
+            updated_ids = await update_transactions(
+                user_id=query.from_user.id,
+                ids=ids,
+                updates=updates,
+                filters=None if ids else db_filters,
+            )
             # Сохраняем обновлённые поля для последующего создания шаблона
             context.user_data["last_edit_updates"] = {
                 k: v[0] for k, v in updates.items()
@@ -853,8 +878,7 @@ class TransactionProcessorBot:
                 await update.message.reply_text("Введите числовой ID")
                 return
 
-            with DBConnection() as db:
-                fields = get_transaction_fields(source_id, db=db)
+            fields = await get_transaction_fields(source_id)
 
             if not fields:
                 await update.message.reply_text("Запись с таким ID не найдена")
@@ -887,8 +911,7 @@ class TransactionProcessorBot:
                 await update.message.reply_text("Введите числовой ID")
                 return
 
-            with DBConnection() as db:
-                fields = get_transaction_fields(tx_id, db=db)
+            fields = await get_transaction_fields(tx_id)
 
             if not fields:
                 await update.message.reply_text("Запись с таким ID не найдена")
@@ -1530,114 +1553,156 @@ class TransactionProcessorBot:
             await update.message.reply_text("Файл слишком большой. Максимальный размер - 10 МБ.")
             return
 
-        # logger.info(f"Получен файл: {document.file_name}")
-        await update.message.reply_text("Начинаю обработку...")
-        
-        # logger.info(f"Начата обработка PDF: {document.file_name}, размер: {document.file_size} байт")
-        logger.info(f"Начата обработка PDF: {document.file_name}, размер: {round(document.file_size / (1024 * 1024), 2)} МБ")
-        logger.info(f"Используются настройки: return_files={return_files}")
-
-        tmp_pdf_path = temp_csv_path = combined_csv_path = result_csv_path = unclassified_csv_path = None
-
         try:
-            # Скачивание и обработка PDF
-            pdf_file = BytesIO()
             file = await document.get_file()
-            await file.download_to_memory(out=pdf_file)
-            pdf_file.seek(0)  # Перемещаем указатель в начало
+            pdf_bytes = await file.download_as_bytearray()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки PDF: {str(e)}", exc_info=True)
+            await update.message.reply_text("Не удалось скачать файл. Попробуйте отправить его ещё раз.")
+            return
 
-            with NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
-                tmp_pdf.write(pdf_file.getbuffer())
-                tmp_pdf_path = tmp_pdf.name
+        # Отпечаток файла проверяется до разбора: повторная выписка не обрабатывается заново
+        file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        try:
+            known_import = await find_import_by_hash(update.effective_user.id, file_hash)
+        except Exception as e:
+            logger.error(f"Ошибка проверки отпечатка файла: {str(e)}", exc_info=True)
+            known_import = None
 
-            temp_csv_path, pdf_type = await asyncio.to_thread(extract_pdf1, tmp_pdf_path)
-            combined_csv_path = await asyncio.to_thread(extract_pdf2, temp_csv_path, pdf_type)
-            
-            # Получаем ОБА пути
-            result_csv_path, unclassified_csv_path = await asyncio.to_thread(
-                classify_transactions, combined_csv_path, pdf_type, user_settings=settings
+        if known_import:
+            logger.info(
+                "Пользователь %s повторно отправил выписку (import_id=%s)",
+                update.effective_user.id,
+                known_import['import_id'],
+            )
+            user_data['reprocess_document'] = {
+                'file_id': document.file_id,
+                'file_name': document.file_name,
+                'settings': settings,
+                'return_files': return_files,
+            }
+            created_at = known_import['created_at'].strftime('%d.%m.%Y %H:%M')
+            await update.message.reply_text(
+                f"ℹ️ Эта выписка уже импортирована как #{known_import['import_id']} "
+                f"({created_at}, {known_import['pdf_type'] or 'тип не определён'}, "
+                f"новых записей: {known_import['row_count']})",
+                reply_markup=InlineKeyboardMarkup([
+                    [InlineKeyboardButton("🔄 Обработать повторно", callback_data='reprocess_pdf')]
+                ])
             )
+            return
+
+        await self._process_pdf(update.message, context, document.file_name, pdf_bytes, file_hash, settings, return_files)
+
+    async def handle_reprocess_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Повторно обрабатывает уже импортированную выписку по кнопке «Обработать повторно»."""
+        query = update.callback_query
+        await query.answer()
+
+        reprocess = context.user_data.pop('reprocess_document', None)
+        if not reprocess:
+            await query.edit_message_text("⚠️ Файл для повторной обработки не найден. Отправьте выписку ещё раз.")
+            return
 
-            df = pd.read_csv(
-                result_csv_path,
-                sep=';',          # Указываем разделитель
-                quotechar='"',     # Символ кавычек
-                encoding='utf-8',  # Кодировка
-                on_bad_lines='warn' # Обработка битых строк
+        await query.edit_message_reply_markup(reply_markup=None)
+        logger.info("Пользователь %s запросил повторную обработку %s", query.from_user.id, reprocess['file_name'])
+
+        try:
+            file = await context.bot.get_file(reprocess['file_id'])
+            pdf_bytes = await file.download_as_bytearray()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки PDF: {str(e)}", exc_info=True)
+            await query.message.reply_text("Не удалось скачать файл. Отправьте выписку ещё раз.")
+            return
+
+        await self._process_pdf(
+            query.message,
+            context,
+            reprocess['file_name'],
+            pdf_bytes,
+            hashlib.sha256(pdf_bytes).hexdigest(),
+            reprocess['settings'],
+            reprocess['return_files'],
+        )
+
+    async def _process_pdf(
+        self,
+        message,
+        context: ContextTypes.DEFAULT_TYPE,
+        file_name: str,
+        pdf_bytes: bytearray,
+        file_hash: str,
+        settings: dict,
+        return_files: str,
+    ):
+        """Разбирает PDF, классифицирует транзакции и предлагает сохранить их в БД."""
+        await message.reply_text("Начинаю обработку...")
+
+        logger.info(f"Начата обработка PDF: {file_name}, размер: {round(len(pdf_bytes) / (1024 * 1024), 2)} МБ")
+        logger.info(f"Используются настройки: return_files={return_files}")
+
+        # Файлы задания живут в собственном каталоге, который удаляется при любом исходе
+        with self.workspaces.job() as workspace:
+            try:
+                # PDF обрабатывается из буфера загрузки; на диск пишутся только файлы для отправки
+                result = await self.pdf_workers.run(
+                    run_pipeline, pdf_bytes, file_hash, settings, return_files, workspace,
+                    self.extraction_cache, self.pdf_workers.page_workers,
                 )
+                pdf_type, df = result['pdf_type'], result['df']
+                files_to_send, unclassified_csv_path = result['files_to_send'], result['unclassified_csv_path']
 
-            context.user_data['pending_data'] = {
-                'df': df,
-                'pdf_type': pdf_type,
-                'timestamp': time.time()  # Фиксируем время получения данных
-            }
+                context.user_data['pending_data'] = {
+                    'df': df,
+                    'pdf_type': pdf_type,
+                    'file_hash': file_hash,
+                    'timestamp': time.time()  # Фиксируем время получения данных
+                }
 
-            # Отправка файлов согласно настройкам
-            files_to_send = []
-            
-            if return_files == '1':
-                files_to_send.append(temp_csv_path)
-            elif return_files == '2':
-                files_to_send.extend([temp_csv_path, combined_csv_path])
-            else:  # default - только итоговый файл
-                files_to_send.append(result_csv_path)
                 # Добавляем unclassified только при отправке итогового файла
                 if unclassified_csv_path and os.path.exists(unclassified_csv_path):
-                    unclassified_df = pd.read_csv(unclassified_csv_path)
-                    unclassified_caption = f"✍️ Транзакции для ручной классификации\n🗂️ Всего записей: {len(unclassified_df)}"
+                    unclassified_caption = f"✍️ Транзакции для ручной классификации\n🗂️ Всего записей: {result['unclassified_count']}"
                     with open(unclassified_csv_path, 'rb') as f:
-                        await update.message.reply_document(document=f, caption=unclassified_caption)                    
-                    # files_to_send.append(unclassified_csv_path)
-
-            # Отправка выбранных файлов
-            for file_path in files_to_send:
-                if file_path and os.path.exists(file_path):
-                    caption = "✍️ Транзакции для ручной классификации" if file_path == unclassified_csv_path else None
-                    with open(file_path, 'rb') as f:
-                        file_caption = f"🗃️ Всего записей: {len(df)}"
-                        if caption:
-                            file_caption = f"{caption}\n{file_caption}"
-                        await update.message.reply_document(document=f, caption=file_caption)                        
-
-            context.user_data['temp_files'] = [
-                tmp_pdf_path,
-                temp_csv_path,
-                combined_csv_path,
-                result_csv_path,
-                unclassified_csv_path
-            ]
+                        await message.reply_document(document=f, caption=unclassified_caption)
 
-            # Создаем клавиатуру с кнопками
-            keyboard = [
-                [InlineKeyboardButton("Да ✅", callback_data='save_yes'),
-                InlineKeyboardButton("Нет ❌", callback_data='save_no')]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+                # Отправка выбранных файлов
+                for file_path in files_to_send:
+                    if file_path and os.path.exists(file_path):
+                        with open(file_path, 'rb') as f:
+                            await message.reply_document(document=f, caption=f"🗃️ Всего записей: {len(df)}")
 
-            # Отправляем вопрос
-            await update.message.reply_text(
-                "Сохранить эти данные в базу данных?",
-                reply_markup=reply_markup
-            )
+                # Создаем клавиатуру с кнопками
+                keyboard = [
+                    [InlineKeyboardButton("Да ✅", callback_data='save_yes'),
+                    InlineKeyboardButton("Нет ❌", callback_data='save_no')]
+                ]
+                reply_markup = InlineKeyboardMarkup(keyboard)
 
-        except Exception as e:
-            logger.error(f"Ошибка обработки PDF: {str(e)}", exc_info=True)
-            await update.message.reply_text(
-                "Произошла ошибка при обработке файла.\n"
-                "Пожалуйста, убедитесь, что:\n"
-                "1. Это корректная банковская выписка\n"
-                "2. Файл не поврежден\n"
-                "3. Формат соответствует поддерживаемым (Tinkoff, Сбербанк, Яндекс)"
-            )
-            # Удаляем pending_data в случае ошибки
-            if 'pending_data' in context.user_data:
-                del context.user_data['pending_data']
+                # Отправляем вопрос
+                await message.reply_text(
+                    "Сохранить эти данные в базу данных?",
+                    reply_markup=reply_markup
+                )
 
-        finally:
-            if pdf_file:
-                pdf_file.close()
-            if tmp_pdf:
-                tmp_pdf.close()
+            except asyncio.TimeoutError:
+                logger.error(f"Обработка PDF {file_name} превысила {self.processing_timeout} с")
+                await message.reply_text(
+                    f"⏱ Обработка файла заняла больше {self.processing_timeout} с и была прервана.\n"
+                    "Попробуйте разбить выписку на части или увеличьте processing_timeout в timeouts.yaml."
+                )
+                context.user_data.pop('pending_data', None)
+            except Exception as e:
+                logger.error(f"Ошибка обработки PDF: {str(e)}", exc_info=True)
+                await message.reply_text(
+                    "Произошла ошибка при обработке файла.\n"
+                    "Пожалуйста, убедитесь, что:\n"
+                    "1. Это корректная банковская выписка\n"
+                    "2. Файл не поврежден\n"
+                    "3. Формат соответствует поддерживаемым (Tinkoff, Сбербанк, Яндекс)"
+                )
+                # Удаляем pending_data в случае ошибки
+                if 'pending_data' in context.user_data:
+                    del context.user_data['pending_data']
 
 
     async def handle_save_confirmation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1655,10 +1720,6 @@ class TransactionProcessorBot:
                 query.from_user.id,
             )
 
-            if 'temp_files' in user_data:
-                await cleanup_files(user_data['temp_files'])
-                del user_data['temp_files']
-            
             if 'pending_data' in user_data:
                 del user_data['pending_data']
             return
@@ -1682,11 +1743,13 @@ class TransactionProcessorBot:
             return
 
         logger.debug("Сохранение данных в БД: %s", pending_data['df'][['Дата']].head().to_dict())
-        db = None
         try:
-            db = DBConnection()
-            stats = save_transactions(df, user_id=user_id, pdf_type=pdf_type_to_save, db=db)
-            db.close()
+            stats = await save_transactions(
+                df,
+                user_id=user_id,
+                pdf_type=pdf_type_to_save,
+                file_hash=pending_data.get('file_hash'),
+            )
             
             logger.info(
                 "Пользователь %s подтвердил сохранение данных (%s записей)",
@@ -1727,14 +1790,7 @@ class TransactionProcessorBot:
                 "2. Правильно ли настроены переменные окружения (DB_HOST, DB_PORT и др.)"
             )
         finally:
-            if db is not None:  # Закрываем соединение только если оно было создано
-                db.close()
-            
             # Очистка временных данных
-            if 'temp_files' in user_data:
-                await cleanup_files(user_data['temp_files'])
-                del user_data['temp_files']
-            
             if 'pending_data' in user_data:
                 del user_data['pending_data']
 
@@ -1756,29 +1812,8 @@ class TransactionProcessorBot:
 
         if query.data == 'update_duplicates':
             try:
-                updated = 0
-                with DBConnection() as db:
-                    for row in duplicates:
-                        # Находим ID транзакции по критериям дубликата
-                        with db.cursor(dict_cursor=True) as cur:
-                            cur.execute("""
-                                SELECT id FROM transactions 
-                                WHERE transaction_date = %s 
-                                AND amount = %s 
-                                AND cash_source = %s
-                            """, (row['дата'], row['сумма'], row.get('наличность')))
-                            result = cur.fetchone()
-                            if result:
-                                # Обновляем транзакцию по ID
-                                updates = {'category': (row.get('категория', None), 'replace')}
-                                updated_ids = apply_edits(
-                                    user_id=query.from_user.id,
-                                    ids=[result['id']],
-                                    updates=updates,
-                                    db=db
-                                )
-                                if updated_ids:
-                                    updated += 1
+                # Категории дубликатов переносятся в сохранённые транзакции пользователя
+                updated = await update_duplicates(query.from_user.id, duplicates)
                 logger.info(f"Обновлено {updated} дубликатов")
                 logger.info("Пользователь %s обновил дубликаты (%s записей)", query.from_user.id, updated)
                 await query.edit_message_text(
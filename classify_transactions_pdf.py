@@ -5,6 +5,11 @@ import os
 from typing import Dict, List, Any
 import logging
 import csv
+from config.yaml_cache import load_yaml_cached
+from pdf_processing.normalize import (
+    AMOUNT_COLUMNS, SOURCE_AMOUNT_COLUMN, SOURCE_DATE_COLUMN,
+    format_transactions, normalize_transactions, parse_amount,
+)
 
 # Настройка логирования
 logging.basicConfig(
@@ -20,15 +25,13 @@ def load_config(config_path: str = None) -> Dict[str, Any]:
     """Загружает конфигурацию из YAML-файла"""
     if config_path is None:
         config_path = os.path.join(os.path.dirname(__file__), 'config', 'categories.yaml')
-    with open(config_path, 'r', encoding='utf-8') as file:
-        return yaml.safe_load(file)
+    return load_yaml_cached(config_path)
 
 def load_class_contractor_config(config_path: str = None) -> Dict[str, Any]:
     """Загружает конфигурацию class_contractor из YAML-файла"""
     if config_path is None:
         config_path = os.path.join(os.path.dirname(__file__), 'config', 'class_contractor.yaml')
-    with open(config_path, 'r', encoding='utf-8') as file:
-        return yaml.safe_load(file)
+    return load_yaml_cached(config_path)
 
 def classify_transaction(description: str, categories: List[Dict[str, Any]]) -> str:
     """Классификация операции по описанию"""
@@ -56,9 +59,8 @@ def apply_special_conditions(row: pd.Series, conditions: List[Dict[str, Any]], r
                 if value == "$SELF":
                     value = result.at[row.name, 'Сумма']
                 elif value == "-$CURRENT":
-                    current_value = result.at[row.name, 'Сумма']
-                    clean_value = current_value.replace(' ', '').replace('₽', '').replace('P', '')
-                    value = f"-{clean_value}"
+                    # Суммы — копейки (Int64), знак меняется арифметически
+                    value = -result.at[row.name, 'Сумма']
                 elif value == "$CURRENT":
                     current_value = result.at[row.name, field]
                     comment = action.get('comment', '')
@@ -71,6 +73,11 @@ def apply_special_conditions(row: pd.Series, conditions: List[Dict[str, Any]], r
                     else:
                         value = user_settings['Чек #']['value']
 
+                # Литеральная сумма из конфигурации переводится в копейки
+                if field in AMOUNT_COLUMNS and isinstance(value, str):
+                    value = parse_amount(value)
+                    value = pd.NA if value is None else value
+
                 result.at[row.name, field] = value
 
 def add_pattern_to_category(category_name: str, pattern: str, config_path: str = None) -> None:
@@ -105,116 +112,130 @@ def add_pattern_to_category(category_name: str, pattern: str, config_path: str =
         logger.error(f"Ошибка при добавлении паттерна: {str(e)}")
         raise
 
+def classify_frame(df: pd.DataFrame, pdf_type: str = 'default', user_settings: dict = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Классифицирует транзакции DataFrame и возвращает (result, unclassified)"""
+    if user_settings is None:
+        user_settings = {}
+
+    # Проверка обязательных столбцов
+    required_columns = ['Дата и время операции', 'Сумма операции в валюте карты']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    
+    if missing_columns:
+        raise ValueError(f"Отсутствуют обязательные столбцы: {', '.join(missing_columns)}")  
+    
+    # Суммы в копейках и даты datetime64 (таблица из pipeline уже типизирована, CSV — разбирается здесь)
+    df = normalize_transactions(df)
+
+    # Загрузка конфигураций
+    categories_config = load_config()
+    type_settings = load_class_contractor_config().get('type_settings', {})
+    settings = type_settings.get(pdf_type, type_settings.get('default', {}))
+    special_conditions = load_config(os.path.join(os.path.dirname(__file__), 'config', 'special_conditions.yaml'))['special_conditions']
+
+    # Создание результирующего DataFrame
+    result = pd.DataFrame()
+    # 1. Дата
+    result['Дата'] = df[SOURCE_DATE_COLUMN]
+    # 2. Сумма (без знака, в копейках)
+    result['Сумма'] = df[SOURCE_AMOUNT_COLUMN].abs()
+    # 3. Наличность
+    result['Наличность'] = user_settings.get('Наличность', {}).get('value', settings.get('cash', ''))
+    # 4. Сумма (куда) и Наличность (куда)
+    result['Сумма (куда)'] = pd.Series(pd.NA, index=df.index, dtype='Int64')
+    result['Наличность (куда)'] = ''
+    # 5. Категория
+    result['Категория'] = df['Описание операции'].apply(
+        lambda x: classify_transaction(x, categories_config['categories'])
+    )
+    # 6. Описание
+    if 'Описание' in user_settings:
+        setting = user_settings['Описание']
+        if setting['operator'] == '+':
+            result['Описание'] = df['Описание операции'] + ', ' + setting['value']
+        else:
+            result['Описание'] = setting['value']
+    else:
+        result['Описание'] = df['Описание операции']
+
+    # 7. Тип транзакции (по умолчанию "Расход")
+    result['Тип транзакции'] = 'Расход'
+    # 8. Контрагент
+    result['Контрагент'] = user_settings.get('Контрагент', {}).get('value', settings.get('contractor', ''))
+    # result.loc[df['Номер карты'] == "2578", 'Контрагент'] = '! Наташа'
+    result.loc[result['Категория'] == 'Ком. платежи. Вернадского 54', 'Контрагент'] = 'Квартира_Ипотека'
+    # 9. Чек #
+    result['Чек #'] = df['Номер карты'].astype(str)
+    # result.loc[result['Чек #'] == "2578", 'Контрагент'] = '! Наташа'
+    result.loc[result['Чек #'].str.contains("2578"), 'Контрагент'] = '! Наташа'
+    # result.loc[df['Номер карты'] == "2578", 'Контрагент'] = '! Наташа'
+    # 10. Класс
+    result['Класс'] = user_settings.get('Класс', {}).get('value', settings.get('class', '01 Личное'))
+    # Применение специальных условий
+    for _, row in df.iterrows():
+        apply_special_conditions(row, special_conditions, result, user_settings)
+
+    # Применение пользовательских настроек (дополнительно)
+    if user_settings:
+        for setting_key, setting_value in user_settings.items():
+            # Нормализуем название поля
+            normalized_key = setting_key.lower().replace(' ', '').replace('#', '').replace('№', '')
+            
+            # Определяем соответствующее название колонки в DataFrame
+            if normalized_key in ['контрагент', 'контрагента']:
+                column_name = 'Контрагент'
+            elif normalized_key in ['чек', 'чек#', 'чек№']:
+                column_name = 'Чек #'
+            elif normalized_key in ['описание', 'описании']:
+                column_name = 'Описание'
+            elif normalized_key in ['наличность', 'нал', 'наличка']:
+                column_name = 'Наличность'
+            elif normalized_key in ['класс']:
+                column_name = 'Класс'
+            else:
+                continue  # Пропускаем неизвестные настройки
+                
+            # Применяем настройку, если колонка существует
+            if column_name in result.columns:
+                if setting_value['operator'] == '+':
+                    result[column_name] = result[column_name].astype(str) + ', ' + setting_value['value']
+                else:
+                    result[column_name] = setting_value['value']
+
+    # Сортировка DataFrame result по убыванию даты ('Дата' уже datetime64)
+    result.sort_values(by='Дата', ascending=False, inplace=True)
+
+    # Неподходящие транзакции (категория не определена)
+    unclassified_df = result[result['Категория'] == 'Другое']
+    return result, unclassified_df
+
+def save_classified(result: pd.DataFrame, unclassified_df: pd.DataFrame, output_dir: str) -> tuple[str, str]:
+    """Сохраняет result.csv и unclassified.csv (если есть), возвращает пути"""
+    # Даты и суммы в текстовом формате CSV ("01.02.2024 12:30", "1234,56")
+    result = format_transactions(result)
+    unclassified_df = format_transactions(unclassified_df)
+    output_csv_path = os.path.join(output_dir, "result.csv")
+    # Сохранение в файл csv
+    result.to_csv(output_csv_path, sep=';', index=False, encoding='utf-8', quoting=csv.QUOTE_ALL)
+
+    # Формирование файла с неподходящими транзакциями
+    unclassified_csv_path = None
+    if not unclassified_df.empty:
+        unclassified_csv_path = os.path.join(output_dir, "unclassified.csv")
+        unclassified_df.to_csv(unclassified_csv_path, sep=';', index=False, encoding='utf-8')
+
+    return output_csv_path, unclassified_csv_path
+
 def classify_transactions(input_csv_path: str, pdf_type: str = 'default', user_settings: dict = None) -> str:
     """Классифицирует транзакции и возвращает путь к итоговому CSV"""
     try:
-        if user_settings is None:
-            user_settings = {}
-        # df = pd.read_csv(input_csv_path)
-        df = pd.read_csv(input_csv_path, sep=',', quotechar='"', engine='python')
-        
-        # Проверка обязательных столбцов
-        required_columns = ['Дата и время операции', 'Сумма операции в валюте карты']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise ValueError(f"Отсутствуют обязательные столбцы: {', '.join(missing_columns)}")  
-        
-        # Загрузка конфигураций
-        categories_config = load_config()
-        type_settings = load_class_contractor_config().get('type_settings', {})
-        settings = type_settings.get(pdf_type, type_settings.get('default', {}))
-        special_conditions = load_config(os.path.join(os.path.dirname(__file__), 'config', 'special_conditions.yaml'))['special_conditions']
         # Чтение исходных данных
-        df = pd.read_csv(input_csv_path, sep=',', encoding='utf-8-sig')
-        # Создание результирующего DataFrame
-        result = pd.DataFrame()
-        # 1. Дата
-        result['Дата'] = df['Дата и время операции']
-        # 2. Сумма
-        result['Сумма'] = df['Сумма операции в валюте карты'].str.replace(r'[₽+–−-]|\s', '', regex=True).str.strip()
-        # 3. Наличность
-        result['Наличность'] = user_settings.get('Наличность', {}).get('value', settings.get('cash', ''))
-        # 4. Сумма (куда) и Наличность (куда)
-        result['Сумма (куда)'] = ''
-        result['Наличность (куда)'] = ''
-        # 5. Категория
-        result['Категория'] = df['Описание операции'].apply(
-            lambda x: classify_transaction(x, categories_config['categories'])
+        # Все столбцы как строки: суммы из CSV — рубли, целые значения не должны приниматься за копейки
+        df = pd.read_csv(input_csv_path, sep=',', encoding='utf-8-sig', dtype=str)
+        result, unclassified_df = classify_frame(df, pdf_type, user_settings)
+        output_csv_path, unclassified_csv_path = save_classified(
+            result, unclassified_df, os.path.dirname(input_csv_path)
         )
-        # 6. Описание
-        if 'Описание' in user_settings:
-            setting = user_settings['Описание']
-            if setting['operator'] == '+':
-                result['Описание'] = df['Описание операции'] + ', ' + setting['value']
-            else:
-                result['Описание'] = setting['value']
-        else:
-            result['Описание'] = df['Описание операции']
-
-        # 7. Тип транзакции (по умолчанию "Расход")
-        result['Тип транзакции'] = 'Расход'
-        # 8. Контрагент
-        result['Контрагент'] = user_settings.get('Контрагент', {}).get('value', settings.get('contractor', ''))
-        # result.loc[df['Номер карты'] == "2578", 'Контрагент'] = '! Наташа'
-        result.loc[result['Категория'] == 'Ком. платежи. Вернадского 54', 'Контрагент'] = 'Квартира_Ипотека'
-        # 9. Чек #
-        result['Чек #'] = df['Номер карты'].astype(str)
-        # result.loc[result['Чек #'] == "2578", 'Контрагент'] = '! Наташа'
-        result.loc[result['Чек #'].str.contains("2578"), 'Контрагент'] = '! Наташа'
-        # result.loc[df['Номер карты'] == "2578", 'Контрагент'] = '! Наташа'
-        # 10. Класс
-        result['Класс'] = user_settings.get('Класс', {}).get('value', settings.get('class', '01 Личное'))
-        # Применение специальных условий
-        for _, row in df.iterrows():
-            apply_special_conditions(row, special_conditions, result, user_settings)
-
-        # Применение пользовательских настроек (дополнительно)
-        if user_settings:
-            for setting_key, setting_value in user_settings.items():
-                # Нормализуем название поля
-                normalized_key = setting_key.lower().replace(' ', '').replace('#', '').replace('№', '')
-                
-                # Определяем соответствующее название колонки в DataFrame
-                if normalized_key in ['контрагент', 'контрагента']:
-                    column_name = 'Контрагент'
-                elif normalized_key in ['чек', 'чек#', 'чек№']:
-                    column_name = 'Чек #'
-                elif normalized_key in ['описание', 'описании']:
-                    column_name = 'Описание'
-                elif normalized_key in ['наличность', 'нал', 'наличка']:
-                    column_name = 'Наличность'
-                elif normalized_key in ['класс']:
-                    column_name = 'Класс'
-                else:
-                    continue  # Пропускаем неизвестные настройки
-                    
-                # Применяем настройку, если колонка существует
-                if column_name in result.columns:
-                    if setting_value['operator'] == '+':
-                        result[column_name] = result[column_name].astype(str) + ', ' + setting_value['value']
-                    else:
-                        result[column_name] = setting_value['value']
-
-        # Сохранение результата
-        output_csv_path = os.path.join(os.path.dirname(input_csv_path), "result.csv")
-        
-        # Сортировка DataFrame result по убыванию даты
-        result['Дата'] = pd.to_datetime(result['Дата'], format='%d.%m.%Y %H:%M', errors='coerce') # Убедимся, что 'Дата' - datetime
-        result.sort_values(by='Дата', ascending=False, inplace=True)
-        result['Дата'] = result['Дата'].dt.strftime('%d.%m.%Y %H:%M') # Возвращаем в нужный строковый формат для CSV
-
-        # Сохранение в файл csv
-        result.to_csv(output_csv_path, sep=';', index=False, encoding='utf-8', quoting=csv.QUOTE_ALL)
-
-        # Формирование файла с неподходящими транзакциями
-        unclassified_csv_path = None
-        unclassified_df = result[result['Категория'] == 'Другое']
-        if not unclassified_df.empty:
-            unclassified_csv_path = os.path.join(os.path.dirname(input_csv_path), "unclassified.csv")
-            # Сохраняем исходные данные для удобства пользователя
-            # unclassified_df = df[df.index.isin(unclassified_df.index)]
-            unclassified_df.to_csv(unclassified_csv_path, sep=';', index=False, encoding='utf-8')
 
     except Exception as e:
         logger.error(f"Ошибка классификации транзакций: {str(e)}")
@@ -4,7 +4,7 @@ import glob
 import logging
 from datetime import datetime
 
-LOG_DIR = "logs"
+LOG_DIR = "logs"  # по умолчанию; переопределяется переменной окружения LOG_DIR
 MAX_BACKUPS = 15
 
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -15,12 +15,13 @@ def setup_logging():
     """Инициализирует логирование.
 
     - Лог в консоль
-    - Лог в файл вида logs/YYYY-MM-DD_bot.log
+    - Лог в файл вида logs/YYYY-MM-DD_bot.log (каталог — LOG_DIR из окружения)
     - Удаление старых логов (оставляет последние MAX_BACKUPS)
     """
-    os.makedirs(LOG_DIR, exist_ok=True)
+    log_dir = get_log_dir()
+    os.makedirs(log_dir, exist_ok=True)
     today_str = datetime.now().strftime("%Y-%m-%d")
-    log_path = os.path.join(LOG_DIR, f"{today_str}_bot.log")
+    log_path = os.path.join(log_dir, f"{today_str}_bot.log")
 
     log_level = os.getenv("LOG_LEVEL", "INFO").upper()
     level = getattr(logging, log_level, logging.INFO)
@@ -49,11 +50,16 @@ def setup_logging():
     rotate_old_logs()
 
 
+def get_log_dir() -> str:
+    """Каталог логов: переменная окружения LOG_DIR или logs."""
+    return os.getenv("LOG_DIR") or LOG_DIR
+
+
 def rotate_old_logs():
     """
     Удаляет старые логи, если превышен MAX_BACKUPS
     """
-    logs = sorted(glob.glob(os.path.join(LOG_DIR, "*_bot.log")))
+    logs = sorted(glob.glob(os.path.join(get_log_dir(), "*_bot.log")))
     if len(logs) > MAX_BACKUPS:
         for old_log in logs[:-MAX_BACKUPS]:
             try:
@@ -0,0 +1,25 @@
+import os
+import yaml
+
+# path -> (mtime_ns, size, данные)
+_CACHE = {}
+
+
+def load_yaml_cached(config_path) -> dict:
+    """
+    Загружает YAML-файл, разбирая его повторно только после изменения.
+
+    Конфигурации правятся во время работы (/add_pattern, загрузка файлов из
+    меню настроек), поэтому ключ кеша — mtime и размер файла. Возвращаемый
+    словарь общий для всех вызовов: изменять его нельзя.
+    """
+    config_path = os.path.abspath(config_path)
+    stat = os.stat(config_path)
+    cached = _CACHE.get(config_path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    _CACHE[config_path] = (stat.st_mtime_ns, stat.st_size, data)
+    return data
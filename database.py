@@ -1,8 +1,7 @@
 import logging
 from dotenv import load_dotenv
 import pytz
-import asyncpg
-from db.config import DB_CONFIG
+from db import async_transactions
 
 # Загружаем переменные окружения из файла .env
 load_dotenv()
@@ -20,16 +19,7 @@ async def get_pdf_types(user_id: int = None) -> list[str]:
     """
     Возвращает список уникальных pdf_type из таблицы transactions.
     Если user_id указан, фильтрует по конкретному пользователю.
-    """
-    # Устанавливаем соединение с БД
-    conn = await asyncpg.connect(**DB_CONFIG)
-
-    if user_id:
-        query = 'SELECT DISTINCT pdf_type FROM transactions WHERE user_id = $1 AND pdf_type IS NOT NULL'
-        rows = await conn.fetch(query, user_id)
-    else:
-        query = 'SELECT DISTINCT pdf_type FROM transactions WHERE pdf_type IS NOT NULL'
-        rows = await conn.fetch(query)
 
-    await conn.close()
-    return [r['pdf_type'] for r in rows]
\ No newline at end of file
+    Запрос выполняется на общем пуле asyncpg (db.async_base).
+    """
+    return await async_transactions.get_pdf_types(user_id)
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import logging
+import asyncpg
+from db.config import DB_CONFIG, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_STATEMENT_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+_pool: asyncpg.Pool | None = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_async_pool() -> asyncpg.Pool:
+    """
+    Возвращает общий пул asyncpg, создавая его при первом обращении.
+
+    asyncpg кеширует подготовленные выражения на каждом соединении пула,
+    поэтому повторные запросы хендлеров не разбираются сервером заново.
+    """
+    global _pool
+    async with _pool_lock:
+        if _pool is None or _pool.is_closing():
+            _pool = await asyncpg.create_pool(
+                database=DB_CONFIG['dbname'],
+                user=DB_CONFIG['user'],
+                password=DB_CONFIG['password'],
+                host=DB_CONFIG['host'],
+                port=DB_CONFIG['port'],
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+                init=_init_connection,
+            )
+            logger.info("Создан пул asyncpg (min=%s, max=%s)", DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE)
+        return _pool
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """JSONB возвращается объектами Python, как в psycopg2."""
+    await conn.set_type_codec('jsonb', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+
+async def close_async_pool() -> None:
+    """Закрывает пул asyncpg (при завершении работы бота)."""
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            logger.info("Пул asyncpg закрыт")
+        _pool = None
+
+
+def acquire():
+    """
+    Асинхронный контекстный менеджер соединения из пула:
+
+        async with acquire() as conn:
+            await conn.fetch(...)
+    """
+    return _PoolConnection()
+
+
+class _PoolConnection:
+    def __init__(self):
+        self._pool = None
+        self._conn = None
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        self._pool = await get_async_pool()
+        self._conn = await self._pool.acquire(timeout=DB_POOL_TIMEOUT)
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._pool.release(self._conn)
+        self._conn = None
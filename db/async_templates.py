@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime
+from db.async_base import acquire
+
+logger = logging.getLogger(__name__)
+
+# JSONB кодируется и декодируется кодеком соединения (db.async_base), поэтому
+# в запросы передаются и из них возвращаются обычные dict.
+
+
+async def save_template(user_id: int, name: str, filters: dict) -> int:
+    query = (
+        "INSERT INTO filter_templates (user_id, name, filters_json, created_at) "
+        "VALUES ($1, $2, $3, $4) RETURNING id"
+    )
+    # Преобразуем datetime-значения к строкам, чтобы корректно сериализовать их в JSON
+    serializable = {
+        k: (v.strftime('%d.%m.%Y') if isinstance(v, datetime) else v)
+        for k, v in filters.items()
+    }
+    async with acquire() as conn:
+        return await conn.fetchval(query, user_id, name, serializable, datetime.now().astimezone())
+
+
+async def get_templates(user_id: int) -> list[dict]:
+    query = "SELECT id, name, filters_json FROM filter_templates WHERE user_id = $1 ORDER BY created_at DESC"
+    async with acquire() as conn:
+        rows = await conn.fetch(query, user_id)
+    return [dict(row) for row in rows]
+
+
+async def get_template(user_id: int, template_id: int) -> dict | None:
+    query = (
+        "SELECT filters_json FROM filter_templates "
+        "WHERE id = $1 AND user_id = $2"
+    )
+    async with acquire() as conn:
+        return await conn.fetchval(query, template_id, user_id)
+
+
+async def delete_template(user_id: int, template_id: int) -> bool:
+    query = "DELETE FROM filter_templates WHERE id = $1 AND user_id = $2 RETURNING id"
+    async with acquire() as conn:
+        return await conn.fetchval(query, template_id, user_id) is not None
+
+
+async def save_edit_template(user_id: int, name: str, fields: dict) -> int:
+    query = (
+        "INSERT INTO edit_templates (user_id, name, fields_json, created_at) "
+        "VALUES ($1, $2, $3, $4) RETURNING id"
+    )
+    async with acquire() as conn:
+        return await conn.fetchval(query, user_id, name, fields, datetime.now().astimezone())
+
+
+async def get_edit_templates(user_id: int) -> list[dict]:
+    query = "SELECT id, name, fields_json FROM edit_templates WHERE user_id = $1 ORDER BY created_at DESC"
+    async with acquire() as conn:
+        rows = await conn.fetch(query, user_id)
+    return [dict(row) for row in rows]
+
+
+async def get_edit_template(user_id: int, template_id: int) -> dict | None:
+    query = (
+        "SELECT fields_json FROM edit_templates "
+        "WHERE id = $1 AND user_id = $2"
+    )
+    async with acquire() as conn:
+        return await conn.fetchval(query, template_id, user_id)
+
+
+async def delete_edit_template(user_id: int, template_id: int) -> bool:
+    query = "DELETE FROM edit_templates WHERE id = $1 AND user_id = $2 RETURNING id"
+    async with acquire() as conn:
+        return await conn.fetchval(query, template_id, user_id) is not None
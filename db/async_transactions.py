@@ -0,0 +1,405 @@
+import logging
+from datetime import datetime
+from decimal import Decimal
+import asyncpg
+import pandas as pd
+from db.async_base import acquire
+from db.queries import build_transactions_filter, build_update_set, quote_ident
+from db.transactions import (
+    INSERT_COLUMNS,
+    IMPORT_COLUMNS,
+    TRANSACTION_COLUMNS,
+    MOSCOW_TZ,
+    prepare_transactions_frame,
+    build_duplicates_list,
+    build_transaction_rows,
+    build_import_row,
+    duplicate_check_arrays,
+)
+
+logger = logging.getLogger(__name__)
+
+# Позиции числовых (NUMERIC) и текстовых полей в INSERT_COLUMNS — asyncpg строго
+# проверяет типы параметров, поэтому значения приводятся к Decimal и str
+_NUMERIC_POSITIONS = {INSERT_COLUMNS.index('amount'), INSERT_COLUMNS.index('target_amount')}
+_TEXT_POSITIONS = {
+    INSERT_COLUMNS.index(name) for name in (
+        'cash_source', 'category', 'description', 'counterparty', 'check_num',
+        'transaction_type', 'transaction_class', 'target_cash_source', 'pdf_type'
+    )
+}
+
+
+async def get_transactions(user_id: int, start_date, end_date, filters: dict = None) -> pd.DataFrame:
+    """
+    Асинхронный аналог db.transactions.get_transactions.
+
+    Выражение берётся из кеша подготовленных выражений asyncpg; столбцы
+    DataFrame — TRANSACTION_COLUMNS (тот же список, что в SELECT), поэтому
+    пустая выборка тоже содержит столбцы.
+    """
+    where_clause, params = build_transactions_filter(user_id, start_date, end_date, filters, style='numeric')
+    query = f"""
+        SELECT {', '.join(TRANSACTION_COLUMNS)}
+        FROM transactions
+        WHERE {where_clause}
+        ORDER BY transaction_date DESC
+    """
+
+    async with acquire() as conn:
+        rows = await conn.fetch(query, *params)
+    return pd.DataFrame([tuple(row) for row in rows], columns=list(TRANSACTION_COLUMNS))
+
+
+async def update_transactions(user_id: int, ids: list[int], updates: dict, filters: dict = None) -> list[int]:
+    """
+    Обновляет транзакции по списку ID или по фильтру.
+
+    Args:
+        user_id: ID пользователя, который делает обновление.
+        ids: Список ID транзакций.
+        updates: dict формата {'field_name': (new_value, mode)} где mode ∈ {'replace', 'append'}
+        filters: если ids пуст — фильтр в формате edit_filters (start_date, end_date
+            и поля). Обновление выполняется одним UPDATE с тем же условием, что
+            у get_transactions, без выборки записей на клиент.
+
+    Returns:
+        Список обновлённых ID.
+    """
+    if (not ids and not filters) or not updates:
+        logger.warning("Обновление не выполнено: пустой список ID или обновлений")
+        return []
+
+    set_clause, params = build_update_set(user_id, updates, datetime.now(MOSCOW_TZ), style='numeric')
+    if ids:
+        params.append(list(ids))
+        where_clause = f"id = ANY(${len(params)}::int[])"
+    else:
+        where_clause, params = build_transactions_filter(
+            user_id, filters['start_date'], filters['end_date'], filters, style='numeric', params=params
+        )
+    query = f"""
+        UPDATE transactions
+        SET {set_clause}
+        WHERE {where_clause}
+        RETURNING id
+    """
+
+    async with acquire() as conn:
+        rows = await conn.fetch(query, *params)
+    updated_ids = [row['id'] for row in rows]
+    logger.info("Обновлено транзакций: %d", len(updated_ids))
+    logger.debug("Обновлены транзакции: %s", updated_ids)
+    return updated_ids
+
+
+async def count_transactions(user_id: int, start_date, end_date, filters: dict = None) -> int:
+    """Считает транзакции, подходящие под фильтр get_transactions, без их выборки."""
+    where_clause, params = build_transactions_filter(user_id, start_date, end_date, filters, style='numeric')
+    async with acquire() as conn:
+        return await conn.fetchval(f"SELECT count(*) FROM transactions WHERE {where_clause}", *params)
+
+
+async def get_last_import_ids(user_id: int, limit: int) -> list[tuple[int, datetime, str]]:
+    """
+    Получает последние import_id пользователя.
+
+    Returns:
+        Список кортежей: (import_id, created_at, pdf_type)
+    """
+    # Порядок и время импорта — из imports, pdf_type — из строк импорта: его можно
+    # изменить редактированием. Импорты без сохранённых строк отбрасываются
+    query = """
+        SELECT i.import_id, i.created_at, t.pdf_type
+        FROM imports i
+        CROSS JOIN LATERAL (
+            SELECT pdf_type FROM transactions
+            WHERE import_id = i.import_id
+            LIMIT 1
+        ) t
+        WHERE i.user_id = $1
+        ORDER BY i.import_id DESC
+        LIMIT $2
+    """
+    async with acquire() as conn:
+        rows = await conn.fetch(query, user_id, limit)
+    logger.debug("Получено %d import_id для user_id=%s", len(rows), user_id)
+    return [(row[0], row[1].astimezone(MOSCOW_TZ), row[2]) for row in rows]
+
+
+async def get_unique_values(column: str, user_id: int) -> list[str]:
+    """
+    Возвращает уникальные значения указанного столбца в таблице transactions для пользователя.
+
+    Raises:
+        ValueError: столбца нет в таблице transactions.
+    """
+    async with acquire() as conn:
+        exists = await conn.fetchval("""
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_name = 'transactions' AND column_name = $1
+        """, column)
+        if not exists:
+            logger.warning("Попытка обращения к несуществующему столбцу: %s", column)
+            raise ValueError(f"Столбец {column} не существует в таблице transactions")
+
+        identifier = quote_ident(column)
+        rows = await conn.fetch(f"""
+            SELECT DISTINCT {identifier}
+            FROM transactions
+            WHERE user_id = $1 AND {identifier} IS NOT NULL
+            ORDER BY {identifier}
+        """, user_id)
+    return [row[0] for row in rows]
+
+
+async def get_min_max_dates_by_pdf_type(user_id: int) -> list[dict]:
+    """
+    Возвращает min/max даты транзакций для каждого pdf_type пользователя.
+
+    Returns:
+        Список словарей: [{'pdf_type': ..., 'min_date': ..., 'max_date': ...}, ...]
+    """
+    # Значения pdf_type перебираются по индексу idx_transactions_user_type_date
+    # (рекурсивный «прыжок» к следующему значению), min/max каждого — два
+    # обращения к тому же индексу; таблица целиком не читается. Источник —
+    # transactions, а не imports: pdf_type и даты можно изменить редактированием
+    query = """
+        WITH RECURSIVE types AS (
+            (SELECT pdf_type FROM transactions
+             WHERE user_id = $1 AND pdf_type IS NOT NULL
+             ORDER BY pdf_type LIMIT 1)
+            UNION ALL
+            SELECT (SELECT t.pdf_type FROM transactions t
+                    WHERE t.user_id = $1 AND t.pdf_type > types.pdf_type
+                    ORDER BY t.pdf_type LIMIT 1)
+            FROM types
+            WHERE types.pdf_type IS NOT NULL
+        )
+        SELECT
+            pdf_type,
+            (SELECT MIN(t.transaction_date) FROM transactions t
+             WHERE t.user_id = $1 AND t.pdf_type = types.pdf_type) AS min_date,
+            (SELECT MAX(t.transaction_date) FROM transactions t
+             WHERE t.user_id = $1 AND t.pdf_type = types.pdf_type) AS max_date
+        FROM types
+        WHERE pdf_type IS NOT NULL
+        ORDER BY pdf_type
+    """
+    try:
+        async with acquire() as conn:
+            rows = await conn.fetch(query, user_id)
+        logger.debug("Получено %d групп pdf_type по датам.", len(rows))
+        return [dict(row) for row in rows]
+    except Exception as e:
+        logger.error("Ошибка при получении диапазонов дат по pdf_type: %s", e, exc_info=True)
+        return []
+
+
+async def find_import_by_hash(user_id: int, file_hash: str) -> dict | None:
+    """
+    Возвращает последний импорт пользователя с указанным SHA-256 исходного PDF.
+
+    Returns:
+        {'import_id', 'created_at', 'pdf_type', 'row_count'} или None.
+    """
+    query = """
+        SELECT import_id, created_at, pdf_type, row_count
+        FROM imports
+        WHERE user_id = $1 AND file_hash = $2
+        ORDER BY import_id DESC
+        LIMIT 1
+    """
+    async with acquire() as conn:
+        row = await conn.fetchrow(query, user_id, file_hash)
+    if not row:
+        return None
+    result = dict(row)
+    result['created_at'] = result['created_at'].astimezone(MOSCOW_TZ)
+    return result
+
+
+async def check_existing_ids(ids: list[int]) -> list[int]:
+    """Проверяет, какие из указанных ID реально существуют в таблице transactions."""
+    if not ids:
+        return []
+
+    async with acquire() as conn:
+        rows = await conn.fetch("SELECT id FROM transactions WHERE id = ANY($1::int[])", list(ids))
+    return [row['id'] for row in rows]
+
+
+async def get_transaction_fields(tx_id: int) -> dict | None:
+    """Возвращает значения основных полей для указанной транзакции."""
+    query = """
+        SELECT cash_source, target_cash_source, category, description,
+               transaction_type, counterparty, check_num, transaction_class
+        FROM transactions
+        WHERE id = $1
+    """
+    async with acquire() as conn:
+        row = await conn.fetchrow(query, tx_id)
+    return dict(row) if row else None
+
+
+async def get_pdf_types(user_id: int = None) -> list[str]:
+    """
+    Возвращает список уникальных pdf_type из таблицы transactions.
+    Если user_id указан, фильтрует по конкретному пользователю.
+    """
+    async with acquire() as conn:
+        if user_id:
+            rows = await conn.fetch(
+                'SELECT DISTINCT pdf_type FROM transactions WHERE user_id = $1 AND pdf_type IS NOT NULL',
+                user_id,
+            )
+        else:
+            rows = await conn.fetch('SELECT DISTINCT pdf_type FROM transactions WHERE pdf_type IS NOT NULL')
+    return [r['pdf_type'] for r in rows]
+
+
+async def save_transactions(
+    df: pd.DataFrame,
+    user_id: int,
+    pdf_type: str,
+    use_copy: bool = True,
+    file_hash: str | None = None,
+) -> dict:
+    """
+    Сохраняет транзакции выписки, пропуская дубликаты.
+
+    Подготовка данных общая с db.transactions.save_transactions. Новые строки
+    загружаются через COPY (copy_records_to_table); при ошибке COPY или
+    use_copy=False — через executemany. Каждый вызов добавляет строку в imports.
+
+    Returns:
+        dict: {'new': int, 'duplicates': int, 'duplicates_list': [...]}
+    """
+    stats = {'new': 0, 'duplicates': 0, 'duplicates_list': []}
+
+    df = prepare_transactions_frame(df)
+    if df.empty:
+        return stats
+
+    async with acquire() as conn:
+        async with conn.transaction():
+            import_id = await conn.fetchval("SELECT nextval('import_id_seq')")
+
+            duplicate_mask = pd.Series(await _find_duplicates(conn, df, user_id), index=df.index)
+            new_df = df[~duplicate_mask]
+            duplicates_df = df[duplicate_mask]
+
+            stats['new'] = len(new_df)
+            stats['duplicates'] = len(duplicates_df)
+            stats['duplicates_list'] = build_duplicates_list(duplicates_df)
+
+            created_at = datetime.now(MOSCOW_TZ)
+            if not new_df.empty:
+                records = [
+                    _to_record(row)
+                    for row in build_transaction_rows(new_df, import_id, user_id, pdf_type)
+                ]
+                if use_copy:
+                    try:
+                        # Вложенная транзакция — SAVEPOINT, как в синхронной версии
+                        async with conn.transaction():
+                            await conn.copy_records_to_table('transactions', records=records, columns=INSERT_COLUMNS)
+                    except asyncpg.PostgresError as e:
+                        logger.warning("COPY не выполнен (%s), переключаемся на executemany", e)
+                        use_copy = False
+                if not use_copy:
+                    await conn.executemany(
+                        f"INSERT INTO transactions ({', '.join(INSERT_COLUMNS)}) "
+                        f"VALUES ({', '.join(f'${i}' for i in range(1, len(INSERT_COLUMNS) + 1))})",
+                        records,
+                    )
+
+            await conn.execute(
+                f"INSERT INTO imports ({', '.join(IMPORT_COLUMNS)}) "
+                f"VALUES ({', '.join(f'${i}' for i in range(1, len(IMPORT_COLUMNS) + 1))})",
+                *build_import_row(new_df, import_id, user_id, pdf_type, created_at, file_hash),
+            )
+
+    return stats
+
+
+def _to_record(row: tuple) -> tuple:
+    """Приводит значения строки к типам, которые ожидает asyncpg."""
+    values = list(row)
+    for pos in _NUMERIC_POSITIONS:
+        if values[pos] is not None and values[pos] != '':
+            values[pos] = Decimal(str(values[pos]))
+        else:
+            values[pos] = None
+    for pos in _TEXT_POSITIONS:
+        if values[pos] is not None:
+            values[pos] = str(values[pos])
+    return tuple(values)
+
+
+async def _find_duplicates(conn: asyncpg.Connection, df: pd.DataFrame, user_id: int) -> list[bool]:
+    """Асинхронный аналог db.transactions._find_duplicates — один запрос на всю партию."""
+    positions, dates, cash_sources, amounts = duplicate_check_arrays(df)
+    rows = await conn.fetch("""
+        SELECT DISTINCT batch.pos
+        FROM unnest($1::int[], $2::timestamp[], $3::varchar[], $4::numeric[])
+            AS batch(pos, transaction_date, cash_source, amount)
+        JOIN transactions t
+          ON t.user_id = $5
+         AND date_trunc('minute', t.transaction_date) = date_trunc('minute', batch.transaction_date)
+         AND t.cash_source = batch.cash_source
+         AND t.amount = batch.amount
+    """,
+        positions,
+        dates,
+        [str(value) if value is not None else None for value in cash_sources],
+        [Decimal(str(value)) for value in amounts],
+        user_id,
+    )
+    duplicate_positions = {row[0] for row in rows}
+    return [pos in duplicate_positions for pos in range(len(df))]
+
+
+async def find_transaction_id(user_id: int, transaction_date: datetime, amount, cash_source: str | None) -> int | None:
+    """
+    Находит ID транзакции пользователя по дате, сумме и наличности (обработка
+    дубликатов). Дата сравнивается с точностью до минуты — как в проверке
+    дубликатов save_transactions.
+    """
+    query = """
+        SELECT id FROM transactions
+        WHERE user_id = $1
+        AND date_trunc('minute', transaction_date) = date_trunc('minute', $2::timestamp)
+        AND amount = $3
+        AND cash_source = $4
+        LIMIT 1
+    """
+    async with acquire() as conn:
+        return await conn.fetchval(
+            query,
+            user_id,
+            pd.Timestamp(transaction_date).to_pydatetime(),
+            Decimal(str(amount)),
+            str(cash_source) if cash_source is not None else None,
+        )
+
+
+async def update_duplicates(user_id: int, duplicates: list[dict]) -> int:
+    """
+    Переносит категорию строк-дубликатов (stats['duplicates_list']) в уже
+    сохранённые транзакции пользователя. Строки без категории пропускаются:
+    пустое значение не затирает сохранённое.
+
+    Returns:
+        Число обновлённых транзакций.
+    """
+    updated = 0
+    for row in duplicates:
+        category = row.get('категория')
+        if category is None or pd.isna(category):
+            continue
+        tx_id = await find_transaction_id(user_id, row['дата'], row['сумма'], row.get('наличность'))
+        if tx_id and await update_transactions(user_id, [tx_id], {'category': (category, 'replace')}):
+            updated += 1
+    return updated
@@ -1,38 +1,123 @@
+import threading
 import psycopg2
+import psycopg2.extras
 import logging
 from contextlib import contextmanager
-from db.config import DB_CONFIG
+from psycopg2.pool import ThreadedConnectionPool
+from db.config import DB_CONFIG, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+_pool = None
+_pool_lock = threading.Lock()
+# Ограничивает число выданных соединений: при исчерпании пула ждём, а не падаем с PoolError
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+
+
+def get_pool() -> ThreadedConnectionPool:
+    """Возвращает общий для процесса пул соединений, создавая его при первом обращении."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = ThreadedConnectionPool(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, **DB_CONFIG)
+            logger.info("Создан пул соединений с БД (min=%s, max=%s)", DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE)
+        return _pool
+
+
+def close_pool() -> None:
+    """Закрывает все соединения пула (при завершении работы бота)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+            logger.info("Пул соединений с БД закрыт")
+        _pool = None
+
+
+def _is_alive(conn) -> bool:
+    """Проверяет, что соединение из пула ещё живо."""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+
 class DBConnection:
     def __init__(self):
         self.conn = None
+        self._pool = None
         self.connect()
 
     def connect(self):
-        self.conn = psycopg2.connect(**DB_CONFIG)
+        """Берёт живое соединение из пула; мёртвые соединения закрываются и заменяются новыми."""
+        self.close()
+        if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise psycopg2.pool.PoolError("Нет свободных соединений с БД")
+        try:
+            pool = get_pool()
+            # Если сервер перезапускался, в пуле могут оказаться только разорванные соединения
+            for _ in range(DB_POOL_MAX_SIZE + 1):
+                conn = pool.getconn()
+                if _is_alive(conn):
+                    self.conn, self._pool = conn, pool
+                    return
+                logger.warning("Соединение с БД разорвано, переподключаемся")
+                pool.putconn(conn, close=True)
+            raise psycopg2.OperationalError("Не удалось получить рабочее соединение с БД")
+        except Exception:
+            _pool_slots.release()
+            raise
 
     @contextmanager
-    def cursor(self, dict_cursor: bool = False):
+    def cursor(self, dict_cursor: bool = False, name: str | None = None):
+        """
+        Курсор в транзакции: commit при успехе, rollback при ошибке.
+
+        name — имя серверного (именованного) курсора: строки передаются
+        клиенту порциями по мере fetchmany, а не целиком после execute.
+
+        Если блок не дошёл до commit по любой причине — исключение или
+        досрочное закрытие генератора, который держит курсор (GeneratorExit), —
+        транзакция откатывается и соединение возвращается в пул чистым.
+        """
         cursor_factory = psycopg2.extras.DictCursor if dict_cursor else None
-        cur = self.conn.cursor(cursor_factory=cursor_factory)
+        cur = self.conn.cursor(name=name, cursor_factory=cursor_factory)
+        committed = False
         try:
             yield cur
+            # Серверный курсор закрывается до завершения транзакции
+            cur.close()
             self.conn.commit()
+            committed = True
         except Exception as e:
-            self.conn.rollback()
             logger.error("Ошибка транзакции: %s", e, exc_info=True)
             raise
         finally:
+            if not committed and not self.conn.closed:
+                self.conn.rollback()
             cur.close()
 
     def close(self):
-        if self.conn and not self.conn.closed:
-            self.conn.close()
+        """Возвращает соединение в пул. Повторный вызов ничего не делает."""
+        if self.conn is None:
+            return
+        try:
+            if not self._pool.closed:
+                self._pool.putconn(self.conn, close=bool(self.conn.closed))
+            elif not self.conn.closed:
+                self.conn.close()
+        finally:
+            self.conn = None
+            self._pool = None
+            _pool_slots.release()
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
\ No newline at end of file
+        self.close()
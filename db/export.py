@@ -0,0 +1,65 @@
+import logging
+from db.async_base import acquire
+from db.queries import build_transactions_filter, quote_ident
+
+logger = logging.getLogger(__name__)
+
+# Столбцы отчёта /export: поле transactions -> заголовок в CSV
+EXPORT_COLUMNS = {
+    'id': 'ID', 'transaction_date': 'Дата', 'amount': 'Сумма',
+    'cash_source': 'Наличность', 'target_amount': 'Сумма (куда)',
+    'target_cash_source': 'Наличность (куда)', 'category': 'Категория',
+    'description': 'Описание', 'transaction_type': 'Тип транзакции',
+    'counterparty': 'Контрагент', 'check_num': 'Чек #', 'transaction_class': 'Класс'
+}
+
+# Текстовые поля: пустая строка выводится как NULL, чтобы в CSV не появлялось ""
+_TEXT_COLUMNS = (
+    'cash_source', 'target_cash_source', 'category', 'description',
+    'transaction_type', 'counterparty', 'check_num', 'transaction_class'
+)
+
+
+def build_export_query(user_id: int, start_date, end_date, filters: dict = None) -> tuple[str, list]:
+    """
+    Строит SELECT отчёта: тот же фильтр, что у get_transactions, но с русскими
+    заголовками и датой в формате "%d.%m.%Y %H:%M" прямо в SQL.
+    """
+    where_clause, params = build_transactions_filter(user_id, start_date, end_date, filters, style='numeric')
+
+    select_parts = []
+    for column, title in EXPORT_COLUMNS.items():
+        if column == 'transaction_date':
+            expression = "to_char(transaction_date, 'DD.MM.YYYY HH24:MI')"
+        elif column in _TEXT_COLUMNS:
+            expression = f"NULLIF({column}, '')"
+        else:
+            expression = column
+        select_parts.append(f"{expression} AS {quote_ident(title)}")
+
+    query = f"""
+        SELECT {', '.join(select_parts)}
+        FROM transactions
+        WHERE {where_clause}
+        ORDER BY transaction_date DESC
+    """
+    return query, params
+
+
+async def export_transactions_csv(output_path: str, user_id: int, start_date, end_date, filters: dict = None) -> int:
+    """
+    Выгружает отчёт в CSV-файл через COPY (...) TO STDOUT WITH CSV HEADER.
+
+    Строки пишутся в файл по мере получения от сервера, поэтому память не
+    зависит от размера отчёта.
+
+    Returns:
+        Количество выгруженных записей.
+    """
+    query, params = build_export_query(user_id, start_date, end_date, filters)
+    async with acquire() as conn:
+        status = await conn.copy_from_query(query, *params, output=output_path, format='csv', header=True)
+    # Статус команды имеет вид "COPY <n>"
+    row_count = int(status.split()[-1])
+    logger.debug("Выгружено %d записей в %s", row_count, output_path)
+    return row_count
@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Поля, фильтруемые точным совпадением
+EXACT_FILTER_FIELDS = ('category', 'transaction_type', 'cash_source', 'transaction_class', 'pdf_type')
+# Поля, фильтруемые по частичному совпадению без учёта регистра
+ILIKE_FILTER_FIELDS = ('description', 'counterparty', 'check_num')
+
+
+class _Params:
+    """Накопитель параметров запроса с плейсхолдерами psycopg2 (%s) или asyncpg ($n)."""
+
+    def __init__(self, style: str, values: list = None):
+        self.style = style
+        self.values = list(values or [])
+
+    def add(self, value) -> str:
+        self.values.append(value)
+        return '%s' if self.style == 'pyformat' else f'${len(self.values)}'
+
+
+def quote_ident(name: str) -> str:
+    """Экранирует имя столбца для подстановки в текст запроса."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def parse_filter_date(value) -> datetime:
+    """Приводит дату фильтра (datetime или строку "%d.%m.%Y") к datetime."""
+    if isinstance(value, str):
+        return datetime.strptime(value, "%d.%m.%Y")
+    return value
+
+
+def build_transactions_filter(
+    user_id: int,
+    start_date,
+    end_date,
+    filters: dict = None,
+    style: str = 'pyformat',
+    params: list = None,
+) -> tuple[str, list]:
+    """
+    Строит условие WHERE для выборки транзакций пользователя.
+
+    Одно и то же условие используют get_transactions, выгрузка отчёта и
+    редактирование по фильтру, поэтому набор записей всегда совпадает.
+
+    Args:
+        user_id: Telegram ID пользователя.
+        start_date: datetime или строка "%d.%m.%Y"
+        end_date: datetime или строка "%d.%m.%Y" (включительно, весь день)
+        filters: dict — фильтры по полям
+        style: 'pyformat' для psycopg2 или 'numeric' для asyncpg
+        params: уже накопленные параметры запроса (для asyncpg нумерация продолжится)
+
+    Returns:
+        (текст условия без WHERE, список параметров)
+    """
+    start_date = parse_filter_date(start_date)
+    end_date = parse_filter_date(end_date)
+    # Включаем весь день end_date до 23:59 (полночь следующего дня как datetime — asyncpg не принимает date)
+    end_day = end_date.date() if isinstance(end_date, datetime) else end_date
+    end_date_exclusive = datetime.combine(end_day + timedelta(days=1), datetime.min.time())
+
+    p = _Params(style, params)
+    conditions = [
+        f"user_id = {p.add(user_id)}",
+        f"transaction_date >= {p.add(start_date)}",
+        f"transaction_date < {p.add(end_date_exclusive)}",
+    ]
+
+    for key, value in (filters or {}).items():
+        if value in [None, "Все", ""]:
+            continue
+
+        if key in EXACT_FILTER_FIELDS:
+            conditions.append(f"{key} = {p.add(value)}")
+        elif key in ILIKE_FILTER_FIELDS:
+            conditions.append(f"{key} ILIKE {p.add(f'%{value.strip()}%')}")
+        elif key == 'import_id':
+            conditions.append(f"import_id = {p.add(value)}")
+        elif key == 'id':
+            conditions.append(f"id = ANY({p.add(value if isinstance(value, list) else [value])})")
+
+    return " AND ".join(conditions), p.values
+
+
+def build_update_set(
+    user_id: int,
+    updates: dict,
+    edited_at: datetime,
+    style: str = 'pyformat',
+    params: list = None,
+) -> tuple[str, list]:
+    """
+    Строит SET-часть UPDATE для редактирования транзакций.
+
+    Args:
+        user_id: ID пользователя, который делает обновление.
+        updates: dict формата {'field_name': (new_value, mode)} где mode ∈ {'replace', 'append'}
+        edited_at: время изменения (записывается в edited_at)
+        style: 'pyformat' для psycopg2 или 'numeric' для asyncpg
+        params: уже накопленные параметры запроса
+
+    Returns:
+        (текст SET без ключевого слова, список параметров)
+    """
+    p = _Params(style, params)
+    set_parts = []
+
+    for field, (value, mode) in updates.items():
+        identifier = quote_ident(field)
+        if mode == 'replace':
+            set_parts.append(f"{identifier} = {p.add(value)}")
+        elif mode == 'append':
+            set_parts.append(f"{identifier} = CONCAT({identifier}, ', ', {p.add(value)})")
+        else:
+            logger.warning(f"Неизвестный режим обновления: {mode} для поля {field}")
+
+    # Технические поля
+    set_parts.append(f"edited_by = {p.add(user_id)}")
+    set_parts.append(f"edited_at = {p.add(edited_at)}")
+
+    return ", ".join(set_parts), p.values
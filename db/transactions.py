@@ -1,68 +1,262 @@
 import pandas as pd
-from datetime import datetime, timedelta
+import psycopg2
+from io import StringIO
+from datetime import datetime
 from psycopg2.extras import execute_batch
 from pytz import timezone
 from psycopg2 import sql
 import logging
+from db.queries import build_transactions_filter, build_update_set
+from utils.money import kopecks_to_decimal, parse_datetimes
 
 logger = logging.getLogger(__name__)
 MOSCOW_TZ = timezone("Europe/Moscow")
 
 
-def save_transactions(df: pd.DataFrame, user_id: int, pdf_type: str, db) -> dict:
-    stats = {'new': 0, 'duplicates': 0, 'duplicates_list': []}
+INSERT_COLUMNS = (
+    'import_id', 'user_id', 'transaction_date', 'amount', 'cash_source', 'category',
+    'description', 'counterparty', 'check_num', 'transaction_type', 'transaction_class',
+    'target_amount', 'target_cash_source', 'pdf_type', 'created_at'
+)
 
-    df.columns = df.columns.str.lower()
-    df['дата'] = pd.to_datetime(df['дата'], format='%d.%m.%Y %H:%M', errors='coerce')
-    df['сумма'] = pd.to_numeric(df['сумма'].astype(str).str.replace(',', '.'), errors='coerce')
-    if 'сумма (куда)' in df.columns:
-        df['сумма (куда)'] = pd.to_numeric(df['сумма (куда)'].astype(str).str.replace(',', '.'), errors='coerce')
+IMPORT_COLUMNS = (
+    'import_id', 'user_id', 'pdf_type', 'created_at', 'row_count', 'min_date', 'max_date', 'file_hash'
+)
+
+
+# Соответствие столбцов DataFrame (в нижнем регистре) полям таблицы transactions
+DF_COLUMNS = (
+    'наличность', 'категория', 'описание', 'контрагент', 'чек #', 'тип транзакции',
+    'класс', 'сумма (куда)', 'наличность (куда)'
+)
+
+
+def save_transactions(
+    df: pd.DataFrame,
+    user_id: int,
+    pdf_type: str,
+    db,
+    use_copy: bool = True,
+    file_hash: str | None = None,
+) -> dict:
+    """
+    Сохраняет транзакции выписки, пропуская дубликаты.
 
-    df.dropna(subset=['дата', 'сумма'], inplace=True)
+    Args:
+        df: DataFrame из classify_transactions.
+        user_id: Telegram ID пользователя.
+        pdf_type: тип PDF выписки.
+        db: экземпляр DBConnection.
+        use_copy: вставлять новые строки через COPY FROM STDIN. При ошибке COPY
+            или use_copy=False используется execute_batch.
+        file_hash: SHA-256 исходного PDF (записывается в imports).
+
+    Returns:
+        dict: {'new': int, 'duplicates': int, 'duplicates_list': [...]}
+    """
+    stats = {'new': 0, 'duplicates': 0, 'duplicates_list': []}
 
+    df = prepare_transactions_frame(df)
     if df.empty:
         return stats
 
-    # Сортировка по возрастанию даты для правильного порядка вставки в БД
-    df = df.sort_values(by='дата', ascending=True)
-
     with db.cursor() as cur:
         cur.execute("SELECT nextval('import_id_seq')")
         import_id = cur.fetchone()[0]
 
-        new_data = []
-        for _, row in df.iterrows():
-            cur.execute("""
-                SELECT COUNT(*) FROM transactions
-                WHERE user_id = %s AND date_trunc('minute', transaction_date) = date_trunc('minute', %s)
-                AND cash_source = %s AND amount = %s
-            """, (user_id, row['дата'], row.get('наличность'), row['сумма']))
-            if cur.fetchone()[0] == 0:
-                new_data.append((
-                    import_id, user_id, row['дата'], row['сумма'],
-                    row.get('наличность'), row.get('категория'), row.get('описание'),
-                    row.get('контрагент'), row.get('чек #'), row.get('тип транзакции'),
-                    row.get('класс'), row.get('сумма (куда)'), row.get('наличность (куда)'),
-                    pdf_type, datetime.now(MOSCOW_TZ)
-                ))
-                stats['new'] += 1
-            else:
-                stats['duplicates'] += 1
-                stats['duplicates_list'].append({
-                    'дата': row['дата'], 'сумма': row['сумма'], 'наличность': row.get('наличность')
-                })
-
-        if new_data:
-            insert_query = """INSERT INTO transactions (
-                import_id, user_id, transaction_date, amount, cash_source, category,
-                description, counterparty, check_num, transaction_type, transaction_class,
-                target_amount, target_cash_source, pdf_type, created_at
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-            execute_batch(cur, insert_query, new_data, page_size=100)
+        duplicate_mask = pd.Series(_find_duplicates(cur, df, user_id), index=df.index)
+        new_df = df[~duplicate_mask]
+        duplicates_df = df[duplicate_mask]
+
+        stats['new'] = len(new_df)
+        stats['duplicates'] = len(duplicates_df)
+        stats['duplicates_list'] = build_duplicates_list(duplicates_df)
+
+        created_at = datetime.now(MOSCOW_TZ)
+        if not new_df.empty:
+            rows = build_transaction_rows(new_df, import_id, user_id, pdf_type)
+            if use_copy:
+                try:
+                    cur.execute("SAVEPOINT bulk_copy")
+                    _copy_rows(cur, rows)
+                    cur.execute("RELEASE SAVEPOINT bulk_copy")
+                except psycopg2.Error as e:
+                    logger.warning("COPY не выполнен (%s), переключаемся на execute_batch", e)
+                    cur.execute("ROLLBACK TO SAVEPOINT bulk_copy")
+                    use_copy = False
+            if not use_copy:
+                _insert_rows(cur, rows)
+
+        cur.execute(
+            f"INSERT INTO imports ({', '.join(IMPORT_COLUMNS)}) "
+            f"VALUES ({', '.join(['%s'] * len(IMPORT_COLUMNS))})",
+            build_import_row(new_df, import_id, user_id, pdf_type, created_at, file_hash),
+        )
 
     return stats
 
 
+def prepare_transactions_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит DataFrame из classify_transactions к виду для сохранения:
+    названия столбцов в нижнем регистре, дата и суммы (Decimal) разобраны, строки
+    без даты или суммы отброшены, порядок — по возрастанию даты.
+    """
+    df = df.copy()
+    df.columns = df.columns.str.lower()
+    # Из pipeline дата — datetime64, суммы — копейки; строки (CSV) разбираются так же
+    df['дата'] = parse_datetimes(df['дата'])
+    df['сумма'] = kopecks_to_decimal(df['сумма'])
+    if 'сумма (куда)' in df.columns:
+        df['сумма (куда)'] = kopecks_to_decimal(df['сумма (куда)'])
+
+    df = df.dropna(subset=['дата', 'сумма'])
+
+    # Сортировка по возрастанию даты для правильного порядка вставки в БД
+    return df.sort_values(by='дата', ascending=True)
+
+
+def build_duplicates_list(df: pd.DataFrame) -> list[dict]:
+    """Формирует stats['duplicates_list'] — ключевые поля и категория строк-дубликатов."""
+    return [
+        {
+            'дата': row['дата'],
+            'сумма': row['сумма'],
+            'наличность': row.get('наличность'),
+            'категория': None if pd.isna(row.get('категория')) else row.get('категория'),
+        }
+        for _, row in df.iterrows()
+    ]
+
+
+def build_import_row(
+    df: pd.DataFrame,
+    import_id: int,
+    user_id: int,
+    pdf_type: str,
+    created_at: datetime,
+    file_hash: str | None,
+) -> tuple:
+    """Строка imports (в порядке IMPORT_COLUMNS) по сохранённым новым транзакциям df."""
+    if df.empty:
+        min_date = max_date = None
+    else:
+        min_date = df['дата'].min().to_pydatetime()
+        max_date = df['дата'].max().to_pydatetime()
+    return (import_id, user_id, pdf_type, created_at, len(df), min_date, max_date, file_hash)
+
+
+def build_transaction_rows(
+    df: pd.DataFrame,
+    import_id: int,
+    user_id: int,
+    pdf_type: str,
+) -> list[tuple]:
+    """
+    Формирует кортежи для вставки в порядке INSERT_COLUMNS.
+
+    Все строки одного импорта получают общий import_id; created_at — время
+    подготовки каждой строки, как при построчной вставке.
+    Пустые значения (NaN) передаются в БД как NULL.
+    """
+    n = len(df)
+    columns = [
+        [import_id] * n,
+        [user_id] * n,
+        df['дата'].dt.to_pydatetime().tolist(),
+        df['сумма'].tolist(),
+    ]
+    for name in DF_COLUMNS:
+        if name in df.columns:
+            values = df[name].astype(object)
+            columns.append(values.where(values.notna(), None).tolist())
+        else:
+            columns.append([None] * n)
+    columns.append([pdf_type] * n)
+    columns.append([datetime.now(MOSCOW_TZ) for _ in range(n)])
+    return list(zip(*columns))
+
+
+def _insert_rows(cur, rows: list[tuple]) -> None:
+    """Вставляет строки пачками через execute_batch (резервный путь)."""
+    insert_query = (
+        f"INSERT INTO transactions ({', '.join(INSERT_COLUMNS)}) "
+        f"VALUES ({', '.join(['%s'] * len(INSERT_COLUMNS))})"
+    )
+    execute_batch(cur, insert_query, rows, page_size=100)
+
+
+def _copy_value(value) -> str:
+    """Представляет значение в текстовом формате COPY."""
+    if value is None:
+        return r'\N'
+    if isinstance(value, datetime):
+        value = value.isoformat(sep=' ')
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _copy_rows(cur, rows: list[tuple]) -> None:
+    """Потоково загружает строки в transactions через COPY FROM STDIN."""
+    buffer = StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    cur.copy_expert(f"COPY transactions ({', '.join(INSERT_COLUMNS)}) FROM STDIN", buffer)
+
+
+def duplicate_check_arrays(df: pd.DataFrame) -> tuple[list, list, list, list]:
+    """Массивы (позиция, дата, наличность, сумма) для проверки партии на дубликаты."""
+    cash_sources = df['наличность'] if 'наличность' in df.columns else pd.Series(None, index=df.index)
+    cash_sources = cash_sources.astype(object).where(cash_sources.notna(), None)
+    return (
+        list(range(len(df))),
+        df['дата'].dt.to_pydatetime().tolist(),
+        cash_sources.tolist(),
+        df['сумма'].tolist(),
+    )
+
+
+def _find_duplicates(cur, df: pd.DataFrame, user_id: int) -> list[bool]:
+    """
+    Проверяет всю партию на дубликаты одним запросом.
+
+    Строки партии передаются массивами через unnest и соединяются с transactions
+    по тем же условиям, что и раньше: пользователь, дата с точностью до минуты,
+    наличность и сумма. Запрос обслуживается индексом idx_transactions_dup_check.
+
+    Returns:
+        Список флагов в порядке строк df: True — строка уже есть в БД.
+    """
+    cur.execute("""
+        SELECT DISTINCT batch.pos
+        FROM unnest(%s::int[], %s::timestamp[], %s::varchar[], %s::numeric[])
+            AS batch(pos, transaction_date, cash_source, amount)
+        JOIN transactions t
+          ON t.user_id = %s
+         AND date_trunc('minute', t.transaction_date) = date_trunc('minute', batch.transaction_date)
+         AND t.cash_source = batch.cash_source
+         AND t.amount = batch.amount
+    """, (*duplicate_check_arrays(df), user_id))
+    duplicate_positions = {row[0] for row in cur.fetchall()}
+    return [pos in duplicate_positions for pos in range(len(df))]
+
+
+# Столбцы выборки get_transactions в порядке вывода отчёта
+TRANSACTION_COLUMNS = (
+    'id', 'transaction_date', 'amount', 'cash_source',
+    'target_amount', 'target_cash_source',
+    'category', 'description', 'transaction_type',
+    'counterparty', 'check_num', 'transaction_class'
+)
+
+
 def get_transactions(user_id: int, start_date, end_date, db, filters: dict = None) -> pd.DataFrame:
     """
     Получает транзакции по пользователю, диапазону дат и фильтрам.
@@ -77,111 +271,60 @@ def get_transactions(user_id: int, start_date, end_date, db, filters: dict = Non
     Returns:
         DataFrame с транзакциями
     """
-    if isinstance(start_date, str):
-        start_date = datetime.strptime(start_date, "%d.%m.%Y")
-    if isinstance(end_date, str):
-        end_date = datetime.strptime(end_date, "%d.%m.%Y")
-
-    # Включаем весь день end_date до 23:59
-    end_date_exclusive = (end_date + timedelta(days=1)).date()
-
-    query_parts = [
-        sql.SQL("""
-        SELECT
-            id, transaction_date, amount, cash_source,
-            target_amount, target_cash_source,
-            category, description, transaction_type,
-            counterparty, check_num, transaction_class
+    where_clause, params = build_transactions_filter(user_id, start_date, end_date, filters)
+    final_query = f"""
+        SELECT {', '.join(TRANSACTION_COLUMNS)}
         FROM transactions
-        WHERE user_id = %s AND transaction_date >= %s AND transaction_date < %s
-        """)
-    ]
-    params = [user_id, start_date, end_date_exclusive]
-
-    if filters:
-        filter_conditions = []
-        for key, value in filters.items():
-            if value in [None, "Все", ""]:
-                continue
-
-            if key in ['category', 'transaction_type', 'cash_source', 'transaction_class', 'pdf_type']:
-                filter_conditions.append(sql.SQL("{} = %s").format(sql.Identifier(key)))
-                params.append(value)
-            elif key in ['description', 'counterparty', 'check_num']:
-                filter_conditions.append(sql.SQL("{} ILIKE %s").format(sql.Identifier(key)))
-                params.append(f"%{value.strip()}%")
-            elif key == 'import_id':
-                filter_conditions.append(sql.SQL("import_id = %s"))
-                params.append(value)
-            elif key == 'id':
-                filter_conditions.append(sql.SQL("id = ANY(%s)"))
-                params.append(value if isinstance(value, list) else [value])
-                
-        if filter_conditions:
-            query_parts.append(sql.SQL("AND"))
-            query_parts.append(sql.SQL(" AND ").join(filter_conditions))
-
-    query_parts.append(sql.SQL("ORDER BY transaction_date DESC"))
-    final_query = sql.SQL(" ").join(query_parts)
+        WHERE {where_clause}
+        ORDER BY transaction_date DESC
+    """
 
     with db.cursor(dict_cursor=True) as cur:
         cur.execute(final_query, params)
         rows = cur.fetchall()
         columns = [desc[0] for desc in cur.description]
         return pd.DataFrame(rows, columns=columns)
-    
 
-def update_transactions(user_id: int, ids: list[int], updates: dict, db) -> list[int]:
+
+def update_transactions(user_id: int, ids: list[int], updates: dict, db, filters: dict = None) -> list[int]:
     """
-    Обновляет транзакции.
+    Обновляет транзакции по списку ID или по фильтру.
 
     Args:
         user_id: ID пользователя, который делает обновление.
         ids: Список ID транзакций.
         updates: dict формата {'field_name': (new_value, mode)} где mode ∈ {'replace', 'append'}
         db: Экземпляр DBConnection.
+        filters: если ids пуст — фильтр в формате edit_filters (start_date, end_date
+            и поля); UPDATE выполняется с тем же условием, что у get_transactions.
 
     Returns:
         Список обновлённых ID.
     """
-    if not ids or not updates:
+    if (not ids and not filters) or not updates:
         logger.warning("Обновление не выполнено: пустой список ID или обновлений")
         return []
 
-    set_parts = []
-    params = []
-
-    for field, (value, mode) in updates.items():
-        identifier = sql.Identifier(field)
-        if mode == 'replace':
-            set_parts.append(sql.SQL("{} = %s").format(identifier))
-        elif mode == 'append':
-            set_parts.append(sql.SQL("{} = CONCAT({}, ', ', %s)").format(identifier, identifier))
-        else:
-            logger.warning(f"Неизвестный режим обновления: {mode} для поля {field}")
-            continue
-        params.append(value)
-
-    # Технические поля
-    set_parts.append(sql.SQL("edited_by = %s"))
-    params.append(user_id)
-
-    set_parts.append(sql.SQL("edited_at = %s"))
-    params.append(datetime.now(MOSCOW_TZ))
-
-    query = sql.SQL("""
+    set_clause, params = build_update_set(user_id, updates, datetime.now(MOSCOW_TZ))
+    if ids:
+        where_clause = "id = ANY(%s)"
+        params.append(ids)
+    else:
+        where_clause, params = build_transactions_filter(
+            user_id, filters['start_date'], filters['end_date'], filters, params=params
+        )
+    query = f"""
         UPDATE transactions
         SET {set_clause}
-        WHERE id = ANY(%s)
+        WHERE {where_clause}
         RETURNING id
-    """).format(set_clause=sql.SQL(', ').join(set_parts))
-
-    params.append(ids)
+    """
 
     with db.cursor() as cur:
         cur.execute(query, params)
         updated_ids = [row[0] for row in cur.fetchall()]
-        logger.info("Обновлены транзакции: %s", updated_ids)
+        logger.info("Обновлено транзакций: %d", len(updated_ids))
+        logger.debug("Обновлены транзакции: %s", updated_ids)
         return updated_ids
 
 
@@ -197,16 +340,23 @@ def get_last_import_ids(user_id: int, limit: int, db) -> list[tuple[int, str, st
     Returns:
         Список кортежей: (import_id, created_at, pdf_type)
     """
+    # Порядок и время импорта — из imports, pdf_type — из строк импорта: его можно
+    # изменить редактированием. Импорты без сохранённых строк отбрасываются
     query = """
-        SELECT DISTINCT ON (import_id) import_id, created_at, pdf_type
-        FROM transactions
-        WHERE user_id = %s
-        ORDER BY import_id DESC, created_at DESC
-        LIMIT %s
+        SELECT i.import_id, i.created_at, t.pdf_type
+        FROM imports i
+        CROSS JOIN LATERAL (
+            SELECT pdf_type FROM transactions
+            WHERE import_id = i.import_id
+            LIMIT 1
+        ) t
+        WHERE i.user_id = %(user_id)s
+        ORDER BY i.import_id DESC
+        LIMIT %(limit)s
     """
 
     with db.cursor() as cur:
-        cur.execute(query, (user_id, limit))
+        cur.execute(query, {'user_id': user_id, 'limit': limit})
         rows = cur.fetchall()
         logger.debug("Получено %d import_id для user_id=%s", len(rows), user_id)
         return [(row[0], row[1].astimezone(MOSCOW_TZ), row[2]) for row in rows]
@@ -259,20 +409,36 @@ def get_min_max_dates_by_pdf_type(user_id: int, db) -> list[dict]:
     Returns:
         Список словарей: [{'pdf_type': ..., 'min_date': ..., 'max_date': ...}, ...]
     """
-    query = sql.SQL("""
-        SELECT 
+    # Значения pdf_type перебираются по индексу idx_transactions_user_type_date
+    # (рекурсивный «прыжок» к следующему значению), min/max каждого — два
+    # обращения к тому же индексу; таблица целиком не читается. Источник —
+    # transactions, а не imports: pdf_type и даты можно изменить редактированием
+    query = """
+        WITH RECURSIVE types AS (
+            (SELECT pdf_type FROM transactions
+             WHERE user_id = %(user_id)s AND pdf_type IS NOT NULL
+             ORDER BY pdf_type LIMIT 1)
+            UNION ALL
+            SELECT (SELECT t.pdf_type FROM transactions t
+                    WHERE t.user_id = %(user_id)s AND t.pdf_type > types.pdf_type
+                    ORDER BY t.pdf_type LIMIT 1)
+            FROM types
+            WHERE types.pdf_type IS NOT NULL
+        )
+        SELECT
             pdf_type,
-            MIN(transaction_date) AS min_date,
-            MAX(transaction_date) AS max_date
-        FROM transactions
-        WHERE user_id = %s AND pdf_type IS NOT NULL
-        GROUP BY pdf_type
+            (SELECT MIN(t.transaction_date) FROM transactions t
+             WHERE t.user_id = %(user_id)s AND t.pdf_type = types.pdf_type) AS min_date,
+            (SELECT MAX(t.transaction_date) FROM transactions t
+             WHERE t.user_id = %(user_id)s AND t.pdf_type = types.pdf_type) AS max_date
+        FROM types
+        WHERE pdf_type IS NOT NULL
         ORDER BY pdf_type
-    """)
+    """
 
     try:
         with db.cursor(dict_cursor=True) as cur:
-            cur.execute(query, (user_id,))
+            cur.execute(query, {'user_id': user_id})
             rows = cur.fetchall()
             logger.debug("Получено %d групп pdf_type по датам.", len(rows))
             return rows
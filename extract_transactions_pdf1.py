@@ -2,10 +2,21 @@ import camelot
 import pandas as pd
 import os
 import re
-from pypdf import PdfReader
-import yaml
+import logging
 import fitz  # PyMuPDF
+from pdf_processing.words_table import extract_words_table, DEFAULT_ROW_TOL
+from pdf_processing.pages import iter_marked_pages, marker_page_range
+from pdf_processing.document import PdfDocument
+from pdf_processing.detector import PdfTypeDetector, detector as default_detector
 import csv
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from config.yaml_cache import load_yaml_cached
+
+logger = logging.getLogger(__name__)
+
+PDF_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'pdf_patterns.yaml')
 
 def load_pdf_config(config_path: str = 'pdf_patterns.yaml') -> dict:
     """Загружает конфигурацию из YAML файла"""
@@ -17,39 +28,43 @@ def load_pdf_config(config_path: str = 'pdf_patterns.yaml') -> dict:
         raise FileNotFoundError(f"Файл конфигурации не найден: {config_path}")
     
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_yaml_cached(config_path)
     except Exception as e:
         raise ValueError(f"Ошибка при загрузке конфигурации: {e}")
 
-def detect_pdf_type(pdf_path: str, pdf_config: dict) -> str:
-    """Определяет тип PDF файла на основе конфигурации"""
+def detect_pdf_type(pdf: str | PdfDocument, detector: PdfTypeDetector = default_detector) -> str:
+    """
+    Определяет тип PDF файла (путь или открытый PdfDocument).
+
+    Сначала проверяются fingerprints (метаданные, байтовые сигнатуры), и
+    только если они не сработали — паттерны по тексту первой страницы.
+    """
+    try:
+        document, opened = PdfDocument.open(pdf)
+    except Exception as e:
+        raise ValueError(f"Ошибка при чтении PDF: {e}")
     try:
-        reader = PdfReader(pdf_path)
-        first_page = reader.pages[0].extract_text()
-        # print("Текст первой страницы:", first_page)
+        result = detector.detect(document)
     except Exception as e:
         raise ValueError(f"Ошибка при чтении PDF: {e}")
+    finally:
+        if opened:
+            document.close()
 
-    found_types = []
+    matches = result['matches']
+    if not matches:
+        raise ValueError("Не удалось определить тип PDF файла. Ни один паттерн не совпал.")
 
-    for pdf_type, config in pdf_config['pdf_types'].items():
-        for pattern in config['patterns']:
-            try:
-                if re.search(pattern, first_page, re.IGNORECASE):
-                    print(f"Для типа {pdf_type} найдено совпадение с паттерном: {pattern}")
-                    found_types.append(pdf_type)
-                    break  # Достаточно одного совпадения для этого типа
-            except re.error:
-                print(f"Ошибка в регулярном выражении: {pattern}")
+    for pdf_type, pattern in matches.items():
+        logger.info("Для типа %s найдено совпадение (%s): %s", pdf_type, result['tier'], pattern)
+    if len(matches) > 1:
+        logger.warning("Найдено несколько возможных типов: %s. Будет использован первый: %s", list(matches), result['pdf_type'])
 
-    if not found_types:
-        raise ValueError("Не удалось определить тип PDF файла. Ни один паттерн не совпал.")
-    
-    if len(found_types) > 1:
-        print(f"Найдено несколько возможных типов: {found_types}. Будет использован первый: {found_types[0]}")
+    return result['pdf_type']
 
-    return found_types[0]
+def detect_pdf_file_type(pdf: str | PdfDocument) -> str:
+    """Определяет тип PDF файла по config/pdf_patterns.yaml"""
+    return detect_pdf_type(pdf)
 
 def process_Tinkoff_Platinum(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     """Обработка для Tinkoff Platinum
@@ -129,35 +144,7 @@ def process_Visa_Gold_Aeroflot(df: pd.DataFrame, config: dict) -> pd.DataFrame:
         if key not in config:
             raise ValueError(f"В конфигурации отсутствует обязательный ключ: {key}")
 
-    remove_texts = config['remove_rows_by_text']
-    start_marker = config['start_marker']
-    end_marker = config['end_marker']
-
-    # Создаем временный столбец для пометки строк к удалению
-    df['to_delete'] = False
-
-    # 1. Удаление строк по текстовым паттернам из конфига
-    for pattern in remove_texts:
-        df.loc[df['text'].str.contains(pattern, regex=False, na=False), 'to_delete'] = True
-
-    # 2. Удаление строк до start_marker (включительно)
-    start_mask = df['text'].str.contains(start_marker, regex=False, na=False)
-    if start_mask.any():
-        start_idx = start_mask.idxmax()
-        df.loc[:start_idx, 'to_delete'] = True
-
-    # 3. Удаление строк после end_marker (включительно)
-    end_mask = df['text'].str.contains(end_marker, regex=False, na=False)
-    if end_mask.any():
-        end_idx = end_mask.idxmax()
-        df.loc[end_idx:, 'to_delete'] = True
-
-    # 4. Применение удаления и очистка
-    df = df[~df['to_delete']].copy()
-    df = df.drop(columns=['to_delete'])
-    df = df.reset_index(drop=True)
-
-    return df
+    return trim_text_rows(df, config['remove_rows_by_text'], config['start_marker'], config['end_marker'], regex=False)
 
 def process_Tinkoff(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     """Обработка для Tinkoff"""
@@ -182,42 +169,65 @@ def process_Yandex(df: pd.DataFrame, config: dict) -> pd.DataFrame:
         if key not in config:
             raise ValueError(f"В конфигурации отсутствует обязательный ключ: {key}")
 
-    remove_texts = config['remove_rows_by_text']
-    start_marker = config['start_marker']
-    end_marker = config['end_marker']
-
     # Отладочный вывод: показать первые 3 строки для проверки формата
     # print("\n[DEBUG] Примеры сырых строк:")
     # for i in range(min(100, len(df))):  # Выводим первые 3 строки
     #     print(f"Строка {i}: {repr(df.iloc[i]['text'])}")  # repr() покажет спецсимволы
 
-    # Создаем временный столбец для пометки строк к удалению
-    df['to_delete'] = False
-    
-    # 1. Удаление строк по текстовым паттернам из конфига
-    for pattern in remove_texts:
-        df.loc[df['text'].str.contains(pattern, regex=True, na=False), 'to_delete'] = True
-
-    # 2. Удаление строк до start_marker (включительно)
-    start_mask = df['text'].str.contains(start_marker, regex=False, na=False)
-    if start_mask.any():
-        start_idx = start_mask.idxmax()
-        df.loc[:start_idx, 'to_delete'] = True
-
-    # 3. Удаление строк после end_marker (включительно)
-    end_mask = df['text'].str.contains(end_marker, regex=False, na=False)
-    if end_mask.any():
-        end_idx = end_mask.idxmax()
-        df.loc[end_idx:, 'to_delete'] = True
-
-    # 4. Применение удаления и очистка
-    df = df[~df['to_delete']].copy()
-    df = df.drop(columns=['to_delete'])
-    df = df.reset_index(drop=True)
+    return trim_text_rows(df, config['remove_rows_by_text'], config['start_marker'], config['end_marker'], regex=True)
 
-    # print("Строки, которые не удалились:", df[df['text'].str.contains(r'[0-9\u00A0]+,[0-9]{2} ₽', regex=True) & ~df['text'].str.contains(r'^[+-]'))]))
-    
-    return df
+@lru_cache(maxsize=64)
+def compile_remove_pattern(remove_texts: tuple, regex: bool) -> re.Pattern | None:
+    """
+    Собирает remove_rows_by_text типа в одно выражение-альтернативу.
+
+    Подстроки (regex=False) экранируются. Кеш по содержимому списка: пока
+    pdf_patterns.yaml не изменился, выражение не пересобирается. None —
+    список пуст.
+    """
+    if not remove_texts:
+        return None
+    parts = [pattern if regex else re.escape(pattern) for pattern in remove_texts]
+    return re.compile('|'.join(f"(?:{part})" for part in parts))
+
+def trim_text_rows(df: pd.DataFrame, remove_texts: list, start_marker: str | None, end_marker: str | None, regex: bool) -> pd.DataFrame:
+    """
+    Удаляет из столбца text служебные строки и всё вне маркеров.
+
+    Один проход по строкам: все паттерны удаления проверяются одним
+    скомпилированным выражением, маркеры ищутся в том же цикле.
+
+    Параметры:
+        df: DataFrame со столбцом 'text'
+        remove_texts: паттерны remove_rows_by_text (regex — регулярные выражения или подстроки)
+        start_marker: строки до маркера (включительно) удаляются; None — не удалять
+        end_marker: строки после маркера (включительно) удаляются; None — не удалять
+    """
+    remove = compile_remove_pattern(tuple(remove_texts), regex)
+    keep = []
+    start_pos = end_pos = None
+    for position, text in enumerate(df['text'].tolist()):
+        if not isinstance(text, str):
+            keep.append(True)
+            continue
+        keep.append(remove is None or remove.search(text) is None)
+        # Учитываются только первые вхождения маркеров
+        if start_pos is None and start_marker and start_marker in text:
+            start_pos = position
+        if end_pos is None and end_marker and end_marker in text:
+            end_pos = position
+
+    # Строки до start_marker и после end_marker (включительно)
+    if start_pos is not None:
+        keep[:start_pos + 1] = [False] * (start_pos + 1)
+    if end_pos is not None:
+        keep[end_pos:] = [False] * (len(keep) - end_pos)
+
+    return df[keep].reset_index(drop=True)
+
+def process_text_layout(df: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Обработка текстовых выписок, описанных секцией layout (ключи обрезки необязательны)"""
+    return trim_text_rows(df, config.get('remove_rows_by_text') or [], config.get('start_marker'), config.get('end_marker'), regex=True)
 
 def process_default(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     """Обработка по умолчанию"""
@@ -274,57 +284,118 @@ PDF_PROCESSORS = {
     "default": process_default
 }
 
-def sub_process_pdf_Sber(pdf_path: str) -> pd.DataFrame:
-    # Открываем PDF файл
-    document = fitz.open(pdf_path)
-    text = ""
-
-    # Извлекаем текст из всех страниц
-    for page_num in range(len(document)):
-        page = document.load_page(page_num)
-        text += page.get_text()
+def sub_process_pdf_Sber(document: PdfDocument, config: dict = None) -> pd.DataFrame:
+    """Текст страниц PyMuPDF построчно; страницы вне start_marker/end_marker не читаются"""
+    config = config or {}
+    text = "".join(
+        page_text
+        for _, page_text in iter_marked_pages(document, config.get('start_marker'), config.get('end_marker'))
+    )
     return pd.DataFrame(text.split('\n'), columns=['text'])
 
-def sub_process_pdf_Not_Sber(pdf_path: str) -> pd.DataFrame:
-    # Чтение PDF
+def read_camelot_tables(pdf_path: str, pages: str = "all") -> list[pd.DataFrame]:
+    """Читает таблицы camelot (stream) с указанных страниц, в порядке страниц"""
     tables = camelot.read_pdf(
         pdf_path,
         flavor="stream",
-        pages="all",
+        pages=pages,
         strip_text=None, # "\n",
         edge_tol=100,
     )
+    return [table.df for table in tables]
+
+def split_page_ranges(first_page: int, last_page: int, chunks: int) -> list[str]:
+    """Делит страницы first_page..last_page на chunks подряд идущих диапазонов вида "1-10" """
+    page_count = last_page - first_page + 1
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges, start = [], first_page
+    for i in range(chunks):
+        end = start + size + (1 if i < extra else 0) - 1
+        ranges.append(f"{start}-{end}" if end > start else str(start))
+        start = end + 1
+    return ranges
+
+def sub_process_pdf_Not_Sber(pdf_path: str, page_workers: int = 1, pages: tuple[int, int] = None) -> pd.DataFrame:
+    """
+    Извлекает таблицы camelot.
 
-    if not tables:
-        raise ValueError("Не удалось извлечь таблицы из PDF")
-    return pd.concat([table.df for table in tables])
-
-def process_pdf(pdf_path: str) -> str:
-    """Обрабатывает PDF файл и возвращает путь к временному CSV"""
-    pdf_config = load_pdf_config(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'pdf_patterns.yaml'))
-    pdf_type = detect_pdf_type(pdf_path, pdf_config)
-    print(f"Определен тип PDF: {pdf_type}")
-    
-    config = pdf_config['pdf_types'][pdf_type]
+    pages — (первая, последняя) страница, None — все страницы.
 
-    # Выбираем подпроцесс в зависимости от типа PDF
-    if pdf_type in ["Visa_Gold_Aeroflot", "Yandex"]:
-        df = sub_process_pdf_Sber(pdf_path)
+    При page_workers > 1 страницы делятся на диапазоны, которые читаются в
+    отдельных процессах; таблицы склеиваются в порядке страниц, поэтому
+    результат совпадает с последовательным чтением.
+    """
+    if pages is None and page_workers > 1:
+        with fitz.open(pdf_path) as document:
+            pages = (1, len(document))
+
+    if page_workers > 1 and pages[1] > pages[0]:
+        page_ranges = split_page_ranges(pages[0], pages[1], page_workers)
+        # fork: в процессе-обработчике нет других потоков, camelot уже импортирован
+        with ProcessPoolExecutor(max_workers=len(page_ranges), mp_context=multiprocessing.get_context('fork')) as executor:
+            chunks = executor.map(read_camelot_tables, [pdf_path] * len(page_ranges), page_ranges)
+            tables = [table for chunk in chunks for table in chunk]
     else:
-        df = sub_process_pdf_Not_Sber(pdf_path)
+        tables = read_camelot_tables(pdf_path, f"{pages[0]}-{pages[1]}" if pages else "all")
 
-    # Выбираем обработчик
-    processor = PDF_PROCESSORS.get(pdf_type, process_default)
+    if not tables:
+        raise ValueError("Не удалось извлечь таблицы из PDF")
+    return pd.concat(tables)
 
-    df = processor(df, config)
-    
-    # Сохранение во временный файл
-    output_dir = os.path.dirname(pdf_path)
+def extract_frame(pdf: str | PdfDocument, pdf_type: str = None, page_workers: int = 1) -> tuple[pd.DataFrame, str]:
+    """
+    Извлекает таблицу операций из PDF и возвращает (DataFrame, pdf_type).
+
+    pdf — путь или открытый PdfDocument (определение типа и извлечение
+    используют один разбор файла). page_workers — число процессов для
+    постраничного чтения camelot.
+    """
+    document, opened = PdfDocument.open(pdf)
+    try:
+        pdf_config = load_pdf_config(PDF_CONFIG_PATH)
+        if pdf_type is None:
+            pdf_type = detect_pdf_type(document)
+        print(f"Определен тип PDF: {pdf_type}")
+
+        config = pdf_config['pdf_types'][pdf_type]
+
+        # Выбираем подпроцесс в зависимости от типа PDF
+        if pdf_type in ["Visa_Gold_Aeroflot", "Yandex"] or 'layout' in config:
+            df = sub_process_pdf_Sber(document, config)
+        else:
+            # Табличные движки читают только страницы между start_marker и end_marker
+            pages = marker_page_range(document, config.get('start_marker'), config.get('end_marker'))
+            if config.get('table_engine', 'camelot') == 'words':
+                # Таблица по координатам слов PyMuPDF вместо camelot
+                df = extract_words_table(document, config['word_columns'], config.get('word_row_tol', DEFAULT_ROW_TOL), pages)
+            else:
+                # camelot читает только с диска: для документа из памяти — временный файл
+                with document.temporary_file() as pdf_path:
+                    df = sub_process_pdf_Not_Sber(pdf_path, page_workers, pages)
+    finally:
+        if opened:
+            document.close()
+
+    # Выбираем обработчик: типы с layout без своего обработчика обрезаются по общим правилам
+    processor = PDF_PROCESSORS.get(pdf_type, process_text_layout if 'layout' in config else process_default)
+
+    return processor(df, config), pdf_type
+
+def save_temp_csv(df: pd.DataFrame, output_dir: str, pdf_type: str) -> str:
+    """Сохраняет результат extract_frame во временный CSV и возвращает путь"""
     os.makedirs(output_dir, exist_ok=True)
         
     temp_csv_path = os.path.join(output_dir, f"transactions_{pdf_type}_temp.csv") 
-    # df.to_csv(temp_csv_path, index=False)
     df.to_csv(temp_csv_path, index=False, sep=',', quoting=csv.QUOTE_ALL)
+    return temp_csv_path
+
+def process_pdf(pdf_path: str) -> str:
+    """Обрабатывает PDF файл и возвращает путь к временному CSV"""
+    df, pdf_type = extract_frame(pdf_path)
+    
+    # Сохранение во временный файл
+    temp_csv_path = save_temp_csv(df, os.path.dirname(pdf_path), pdf_type)
 
     return temp_csv_path, pdf_type
 
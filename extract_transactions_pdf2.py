@@ -1,9 +1,11 @@
+import numpy as np
 import pandas as pd
 import re
 import os
 import logging
 from typing import List, Optional, Dict
 import sys
+from pdf_processing.layout import layout_for
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -13,185 +15,234 @@ def process_tinkoff_platinum(input_csv_path: str) -> pd.DataFrame:
     """Обрабатывает CSV для Tinkoff Platinum"""
     try:
         # df = pd.read_csv(input_csv_path, header=None, skiprows=1)
-        df = pd.read_csv(input_csv_path, sep=',', quotechar='"', engine='python')
+        df = pd.read_csv(input_csv_path, sep=',', quotechar='"')
         logger.debug(f"Успешно загружен CSV для Tinkoff Platinum, строк: {len(df)}")
     except Exception as e:
         logger.error(f"Ошибка чтения CSV для Tinkoff Platinum: {str(e)}")
         raise
 
-    result = []
-    i = 0
-    
-    while i < len(df):
-        current_row = df.iloc[i]
-
-        if isinstance(current_row[0], str) and re.match(r"\d{2}\.\d{2}\.\d{4}", current_row[0]):
-            try:
-                date = current_row[0]
-                amount = current_row[1]
-                initial_description = str(current_row[2]) if pd.notna(current_row[2]) else ""
-                card_number = current_row[3]
-
-                time_row = df.iloc[i+1] if i+1 < len(df) else None
-                time = time_row[0] if time_row is not None and pd.notna(time_row[0]) else ""
-
-                description_parts = [initial_description]
-                if time_row is not None and pd.notna(time_row[2]):
-                    description_parts.append(str(time_row[2]))
-
-                j = i + 2
-                while j < len(df) and (pd.isna(df.iloc[j][0]) or df.iloc[j][0] == ''):
-                    if pd.notna(df.iloc[j][2]):
-                        description_parts.append(str(df.iloc[j][2]))
-                    j += 1
-
-                full_description = ' '.join(filter(None, description_parts)).strip()
-                datetime = f"{date} {time}" if time else date
-
-                result.append([
-                    datetime,
-                    amount,
-                    full_description,
-                    card_number
-                ])
-
-                i = j
-            except Exception as e:
-                logger.error(f"Ошибка обработки строки {i}: {str(e)}")
-                i += 1
-        else:
-            i += 1
+    return reshape_tinkoff_platinum(df)
 
-    return pd.DataFrame(result, columns=[
-        "Дата и время операции",
-        "Сумма операции в валюте карты",
-        "Описание операции",
-        "Номер карты"
-    ])
+TRANSACTION_COLUMNS = [
+    "Дата и время операции",
+    "Сумма операции в валюте карты",
+    "Описание операции",
+    "Номер карты"
+]
+
+DATE_START_PATTERN = r"\d{2}\.\d{2}\.\d{4}"
+DATE_RE = re.compile(DATE_START_PATTERN)
+TIME_RE = re.compile(r"\d{2}:\d{2}")
+YANDEX_TIME_RE = re.compile(r"в (\d{2}:\d{2})")
+
+def _match_mask(series: pd.Series, pattern: str) -> pd.Series:
+    """re.match по строковым значениям; не строки и NaN дают False"""
+    try:
+        return series.str.match(pattern).fillna(False).astype(bool)
+    except AttributeError:
+        # В столбце нет строк (например, только NaN)
+        return pd.Series(False, index=series.index)
+
+def reshape_tinkoff_platinum(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Собирает операции Tinkoff Platinum из сырых строк (результат extract_frame).
+
+    Запись начинается строкой с датой в колонке 0. Следующая строка всегда
+    её строка времени (время в колонке 0, продолжение описания в колонке 2),
+    далее идут строки продолжения описания с пустой колонкой 0. Прочие
+    строки пропускаются.
+    """
+    n = len(df)
+    if n == 0 or df.shape[1] < 4:
+        return pd.DataFrame([], columns=TRANSACTION_COLUMNS)
+
+    df = df.iloc[:, :4].reset_index(drop=True)
+    df.columns = range(df.shape[1])
+    first = df[0]
+    positions = np.arange(n)
+
+    # Строка с датой сразу после начала записи поглощается как строка времени,
+    # поэтому в серии подряд идущих дат записи начинают 1-я, 3-я, 5-я...
+    is_date = _match_mask(first, DATE_START_PATTERN)
+    run_id = (is_date != is_date.shift()).cumsum()
+    is_start = is_date & (is_date.groupby(run_id).cumcount() % 2 == 0)
+    is_time = is_start.shift(fill_value=False)
+
+    # Продолжения — пустые строки, непрерывно следующие за строкой времени
+    blank = (first.isna() | first.eq('')).to_numpy()
+    is_time_values = is_time.to_numpy()
+    breaker = ~blank | is_time_values
+    last_breaker = np.maximum.accumulate(np.where(breaker, positions, -1))
+    after_time = np.zeros(n, dtype=bool)
+    has_breaker = last_breaker >= 0
+    after_time[has_breaker] = is_time_values[last_breaker[has_breaker]]
+    is_continuation = pd.Series(blank & ~is_time_values & after_time)
+
+    record = is_start.cumsum()
+    starts = df[is_start]
+    records = record[is_start]
+
+    # Части описания: колонка 2 строк записи, пустые строки отбрасываются
+    member = is_start | is_time | is_continuation
+    parts = df.loc[member & df[2].notna(), 2].astype(str)
+    parts = parts[parts != '']
+    descriptions = (
+        parts.groupby(record[parts.index]).agg(' '.join).str.strip()
+        .reindex(records, fill_value='')
+    )
+
+    times = df.loc[is_time, 0]
+    times = pd.Series(times.where(times.notna(), '').to_numpy(), index=record[is_time]).reindex(records, fill_value='')
+
+    datetimes = [
+        f"{date} {time}" if time else date
+        for date, time in zip(starts[0], times)
+    ]
+    rows = zip(datetimes, starts[1], descriptions, starts[3])
+    return pd.DataFrame(list(rows), columns=TRANSACTION_COLUMNS)
 
 def process_visa_gold_aeroflot(input_csv_path: str) -> pd.DataFrame:
     """Обрабатывает CSV для Visa Gold Aeroflot"""
     try:
         # df = pd.read_csv(input_csv_path)
-        df = pd.read_csv(input_csv_path, sep=',', quotechar='"', engine='python')
+        df = pd.read_csv(input_csv_path, sep=',', quotechar='"')
         logger.debug(f"Успешно загружен CSV для Visa Gold Aeroflot, строк: {len(df)}")
     except Exception as e:
         logger.error(f"Ошибка чтения CSV для Visa Gold Aeroflot: {str(e)}")
         raise
 
-    new_df = pd.DataFrame(columns=[
-        'Дата и время операции', 
-        'Сумма операции в валюте карты',
-        'Описание операции', 
-        'Номер карты'
-    ])
+    return reshape_visa_gold_aeroflot(df)
+
+def _stripped_texts(series: pd.Series) -> list:
+    """
+    Столбец text списком обрезанных строк.
+
+    Не строки (NaN пустых строк выписки) дают None: исходные реализации
+    падали на них в .strip() и по исключению пропускали строку — переходы
+    по None в автоматах ниже повторяют это поведение.
+    """
+    return [value.strip() if isinstance(value, str) else None for value in series.tolist()]
+
+def reshape_visa_gold_aeroflot(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Собирает операции Visa Gold Aeroflot из сырых строк (результат extract_frame).
+
+    Один проход по списку строк: дата, время, описание, сумма, остаток, дата
+    списания, код авторизации, затем строки продолжения описания до следующей
+    даты. Таблица создаётся один раз в конце.
+    """
+    texts = _stripped_texts(df['text'])
+    n = len(texts)
+    rows = []
 
     i = 0
-    n = len(df)
-    
     while i < n:
-        try:
-            if re.match(r'\d{2}\.\d{2}\.\d{4}', df.iloc[i]['text'].strip()):
-                date = df.iloc[i]['text'].strip()
-                i += 1
-                
-                if i < n and re.match(r'\d{2}:\d{2}', df.iloc[i]['text'].strip()):
-                    time = df.iloc[i]['text'].strip()
-                    i += 1
-                    
-                    new_row = {
-                        'Дата и время операции': f"{date} {time}",
-                        # 'Сумма операции в валюте карты': df.iloc[i+2]['text'].strip() if i+2 < n else '',
-                        'Сумма операции в валюте карты': df.iloc[i+1]['text'].strip() if i+2 < n else '',
-                        'Описание операции': " ".join(filter(None, [
-                            df.iloc[i]['text'].strip() + ":" if i < n else ''
-                        ])),
-                        'Номер карты': "".join(filter(None, [
-                            "Остаток: " + df.iloc[i+2]['text'].strip() if i+2 < n else '',
-                            " ₽, дата списания: " + df.iloc[i+3]['text'].strip() if i+3 < n else '',
-                            ", код авторизации: " + df.iloc[i+4]['text'].strip() if i+4 < n else ''
-                        ]))
-                    }
-                    
-                    new_df = pd.concat([new_df, pd.DataFrame([new_row])], ignore_index=True)
-                    i += 5
-                    
-                    while i < n and not re.match(r'\d{2}\.\d{2}\.\d{4}', df.iloc[i]['text'].strip()):
-                        new_df.at[new_df.index[-1], 'Описание операции'] += " " + df.iloc[i]['text'].strip()
-                        i += 1
-                else:
-                    i += 1
-            else:
+        if texts[i] is None or not DATE_RE.match(texts[i]):
+            i += 1
+            continue
+        date = texts[i]
+        i += 1
+
+        if not (i < n and texts[i] is not None and TIME_RE.match(texts[i])):
+            i += 1
+            continue
+        time = texts[i]
+        i += 1
+
+        # Строки полей записи: описание, сумма, остаток, дата списания, код авторизации
+        used = [i] if i < n else []
+        used += [i + 1, i + 2] if i + 2 < n else []
+        used += [i + 3] if i + 3 < n else []
+        used += [i + 4] if i + 4 < n else []
+        if any(texts[k] is None for k in used):
+            i += 1
+            continue
+
+        description = [texts[i] + ":" if i < n else '']
+        card = "".join(filter(None, [
+            "Остаток: " + texts[i + 2] if i + 2 < n else '',
+            " ₽, дата списания: " + texts[i + 3] if i + 3 < n else '',
+            ", код авторизации: " + texts[i + 4] if i + 4 < n else ''
+        ]))
+        amount = texts[i + 1] if i + 2 < n else ''
+        i += 5
+
+        # Продолжение описания до следующей даты
+        while i < n:
+            if texts[i] is None:
                 i += 1
-        except Exception as e:
-            logger.error(f"Ошибка обработки строки {i}: {str(e)}")
+                break
+            if DATE_RE.match(texts[i]):
+                break
+            description.append(texts[i])
             i += 1
 
-    return new_df
+        rows.append([f"{date} {time}", amount, " ".join(description), card])
+
+    return pd.DataFrame(rows, columns=TRANSACTION_COLUMNS)
 
 def process_Yandex(input_csv_path: str) -> pd.DataFrame:
     """Обрабатывает CSV для Yandex"""
     try:
         # df = pd.read_csv(input_csv_path)
-        df = pd.read_csv(input_csv_path, sep=',', quotechar='"', engine='python')
+        df = pd.read_csv(input_csv_path, sep=',', quotechar='"')
         logger.debug(f"Успешно загружен CSV для Yandex, строк: {len(df)}")
     except Exception as e:
         logger.error(f"Ошибка чтения CSV для Yandex: {str(e)}")
         raise
 
-    new_df = pd.DataFrame(columns=[
-        'Дата и время операции', 
-        'Сумма операции в валюте карты',
-        'Описание операции', 
-        'Номер карты'
-    ])
+    return reshape_Yandex(df)
+
+def reshape_Yandex(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Собирает операции Yandex из сырых строк (результат extract_frame).
+
+    Один проход по списку строк: описание (строки до даты), дата, время
+    ("в ЧЧ:ММ", иначе 00:00), дата обработки и сумма в валюте операции
+    (пропускаются), сумма в валюте карты. Таблица создаётся один раз в конце.
+    """
+    texts = _stripped_texts(df['text'])
+    n = len(texts)
+    rows = []
 
     i = 0
-    n = len(df)
-    
     while i < n:
-        try:
-            # Сбор описания операции (может занимать несколько строк перед датой)
-            description_parts = []
-            while i < n and not re.match(r'\d{2}\.\d{2}\.\d{4}', df.iloc[i]['text'].strip()):
-                description_parts.append(df.iloc[i]['text'].strip())
-                i += 1
+        # Описание операции (может занимать несколько строк перед датой)
+        description_parts = []
+        while i < n and texts[i] is not None and not DATE_RE.match(texts[i]):
+            description_parts.append(texts[i])
+            i += 1
+        if i >= n:
+            break
+        if texts[i] is None:
+            i += 1
+            continue
 
-            if i >= n:
-                break
+        date = texts[i]
+        i += 1
 
-            # Обработка даты и времени
-            date = df.iloc[i]['text'].strip()
+        if i < n and texts[i] is None:
             i += 1
-            
-            if i < n and re.match(r'в \d{2}:\d{2}', df.iloc[i]['text'].strip()):
-                time = re.match(r'в (\d{2}:\d{2})', df.iloc[i]['text'].strip()).group(1)
-                i += 1
-            else:
-                time = "00:00"
+            continue
+        time_match = YANDEX_TIME_RE.match(texts[i]) if i < n else None
+        if time_match:
+            time = time_match.group(1)
+            i += 1
+        else:
+            time = "00:00"
 
-            # Пропуск даты обработки и суммы в валюте операции
-            i += 2  # дата обработки и сумма в валюте операции
+        # Пропуск даты обработки и суммы в валюте операции
+        i += 2
 
-            # Получение суммы в валюте карты
-            amount = df.iloc[i]['text'].strip() if i < n else ''
+        if i < n and texts[i] is None:
             i += 1
+            continue
+        amount = texts[i] if i < n else ''
+        i += 1
 
-            # Формирование строки
-            new_row = {
-                'Дата и время операции': f"{date} {time}",
-                'Сумма операции в валюте карты': amount,
-                'Описание операции': ' '.join(description_parts).strip(),
-                'Номер карты': "Карта Пэй"
-            }
-            
-            new_df = pd.concat([new_df, pd.DataFrame([new_row])], ignore_index=True)
-
-        except Exception as e:
-            logger.error(f"Ошибка обработки строки {i}: {str(e)}")
-            i += 1
+        rows.append([f"{date} {time}", amount, ' '.join(description_parts).strip(), "Карта Пэй"])
 
-    return new_df
+    return pd.DataFrame(rows, columns=TRANSACTION_COLUMNS)
 
 def process_default(input_csv_path: str) -> pd.DataFrame:
     """Обработка по умолчанию для неизвестных типов PDF"""
@@ -199,25 +250,51 @@ def process_default(input_csv_path: str) -> pd.DataFrame:
         # df = pd.read_csv(input_csv_path)
         df = pd.read_csv(input_csv_path, sep=',', quotechar='"', engine='python')
         logger.info(f"Применена обработка по умолчанию, строк: {len(df)}")
-        
-        # Стандартизация столбцов для совместимости
-        column_mapping = {
-            'date': 'Дата и время операции',
-            'amount': 'Сумма операции в валюте карты',
-            'description': 'Описание операции',
-            'card': 'Номер карты'
-        }
-        
-        # Переименовываем столбцы, если они существуют
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df.rename(columns={old_name: new_name}, inplace=True)
-        
-        return df
+        return reshape_default(df)
     except Exception as e:
         logger.error(f"Ошибка обработки по умолчанию: {str(e)}")
         raise
 
+def reshape_default(df: pd.DataFrame) -> pd.DataFrame:
+    """Стандартизация столбцов для совместимости"""
+    column_mapping = {
+        'date': 'Дата и время операции',
+        'amount': 'Сумма операции в валюте карты',
+        'description': 'Описание операции',
+        'card': 'Номер карты'
+    }
+    
+    # Переименовываем столбцы, если они существуют
+    for old_name, new_name in column_mapping.items():
+        if old_name in df.columns:
+            df.rename(columns={old_name: new_name}, inplace=True)
+    
+    return df
+
+# Преобразователи сырых строк по типам PDF
+RESHAPERS: Dict[str, callable] = {
+    "Tinkoff_Platinum": reshape_tinkoff_platinum,
+    "Tinkoff": reshape_tinkoff_platinum,
+    "Visa_Gold_Aeroflot": reshape_visa_gold_aeroflot,
+    "Yandex": reshape_Yandex,
+    "default": reshape_default
+}
+
+def reshape_frame(df: pd.DataFrame, pdf_type: Optional[str] = None) -> pd.DataFrame:
+    """
+    Преобразует результат extract_frame в таблицу операций без промежуточных файлов.
+
+    Тип с секцией layout в pdf_patterns.yaml разбирается по ней (см.
+    pdf_processing/layout.py), остальные — преобразователями RESHAPERS.
+    """
+    layout = layout_for(pdf_type)
+    if layout is not None:
+        logger.info(f"Обработка данных как {pdf_type} по layout")
+        return layout.parse(df)
+    reshaper = RESHAPERS.get(pdf_type, RESHAPERS["default"])
+    logger.info(f"Обработка данных как {pdf_type or 'default'}")
+    return reshaper(df)
+
 def save_processed_data(df: pd.DataFrame, input_csv_path: str, suffix: str = "") -> str:
     """Сохраняет обработанные данные в CSV"""
     try:
@@ -2,14 +2,10 @@
 
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
-from db.base import DBConnection
-from db.transactions import (
+from db.async_transactions import (
     check_existing_ids,
-    get_transactions,
     update_transactions,
-    get_transaction_fields,
 )
-from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -70,13 +66,12 @@ def parse_ids_input(text: str) -> list[int]:
     return [int(id_str.strip()) for id_str in text.split(',')]
 
 
-def get_valid_ids(text: str) -> list[int]:
+async def get_valid_ids(text: str) -> list[int]:
     """
     Проверяет существование ID в БД, возвращает только существующие.
     """
     parsed_ids = parse_ids_input(text)
-    with DBConnection() as db:
-        existing = check_existing_ids(parsed_ids, db=db)
+    existing = await check_existing_ids(parsed_ids)
     if not existing:
         raise ValueError("❌ Ни один из указанных ID не найден в базе")
     return existing
@@ -86,39 +81,29 @@ async def apply_edits(context: ContextTypes.DEFAULT_TYPE, user_id: int, edit_mod
     """
     Применяет изменения к базе и возвращает количество обновленных записей.
     """
-    if edit_mode['type'] == 'edit_by_filter':
-        ids = edit_mode.get('ids', [])
-        if not ids:
-            filters = edit_mode.get('edit_filters')
-            if not filters:
+    filters = None
+    ids = edit_mode.get('ids', [])
+    if edit_mode['type'] == 'edit_by_filter' and not ids:
+        filters = edit_mode.get('db_filters')
+        if not filters:
+            edit_filters = edit_mode.get('edit_filters')
+            if not edit_filters:
                 raise ValueError("⚠ Фильтры для редактирования не найдены.")
-
-            with DBConnection() as db:
-                df = get_transactions(
-                    user_id=user_id,
-                    start_date=datetime.strptime(filters['start_date'], '%d.%m.%Y'),
-                    end_date=datetime.strptime(filters['end_date'], '%d.%m.%Y'),
-                    filters={k: v for k, v in filters.items() if v != 'Все'},
-                    db=db
-                )
-            ids = df['id'].tolist()
-            if not ids:
-                raise ValueError("⚠ По фильтрам не найдено записей.")
-
-    else:
-        ids = edit_mode.get('ids', [])
+            filters = {k: v for k, v in edit_filters.items() if v != 'Все'}
 
     updates = {
         edit_mode['field']: (new_value, edit_mode['mode'])
     }
 
-    with DBConnection() as db:
-        updated_ids = update_transactions(
-            user_id=user_id,
-            ids=ids,
-            updates=updates,
-            db=db
-        )
-
-    logger.info(f"Пользователь {user_id} обновил {len(updated_ids)} записей: {updated_ids}. Поле: {edit_mode['field']}")
+    # По фильтру — один UPDATE с условием get_transactions, без выборки ID
+    updated_ids = await update_transactions(
+        user_id=user_id,
+        ids=ids,
+        updates=updates,
+        filters=filters,
+    )
+    if filters and not updated_ids:
+        raise ValueError("⚠ По фильтрам не найдено записей.")
+
+    logger.info(f"Пользователь {user_id} обновил {len(updated_ids)} записей. Поле: {edit_mode['field']}")
     return len(updated_ids), edit_mode['field']
@@ -1,14 +1,13 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 
-from db.base import DBConnection
-from db.templates import (
+from db.async_templates import (
     save_edit_template,
     get_edit_templates,
     get_edit_template,
     delete_edit_template,
 )
-from db.transactions import get_transaction_fields
+from db.async_transactions import get_transaction_fields
 from handlers.edit import build_edit_keyboard
 from handlers.utils import ADMIN_FILTER
 
@@ -58,8 +57,7 @@ async def create_edit_template_from_id(update: Update, context: ContextTypes.DEF
 
 
 async def list_edit_templates(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    with DBConnection() as db:
-        templates = get_edit_templates(update.effective_user.id, db=db)
+    templates = await get_edit_templates(update.effective_user.id)
 
     keyboard: list[list[InlineKeyboardButton]] = []
     for tpl in templates:
@@ -116,8 +114,7 @@ async def save_edit_template_name(update: Update, context: ContextTypes.DEFAULT_
     name = update.message.text.strip()
     fields = context.user_data.pop("save_edit_template_fields", {})
     context.user_data.pop("awaiting_edit_template_name", None)
-    with DBConnection() as db:
-        save_edit_template(update.effective_user.id, name, fields, db=db)
+    await save_edit_template(update.effective_user.id, name, fields)
     # После сохранения очищаем данные редактирования
     context.user_data.pop("edit_mode", None)
     context.user_data.pop("last_edit_updates", None)
@@ -133,8 +130,7 @@ async def apply_edit_template(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
     tpl_id = int(query.data.split("_")[2])
-    with DBConnection() as db:
-        fields = get_edit_template(query.from_user.id, tpl_id, db=db)
+    fields = await get_edit_template(query.from_user.id, tpl_id)
     if not fields:
         await query.edit_message_text("⚠️ Шаблон не найден")
         return
@@ -151,9 +147,8 @@ async def remove_edit_template(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     await query.answer()
     tpl_id = int(query.data.split("_")[2])
-    with DBConnection() as db:
-        delete_edit_template(query.from_user.id, tpl_id, db=db)
-        await query.edit_message_text("🗑 Шаблон удален")
+    await delete_edit_template(query.from_user.id, tpl_id)
+    await query.edit_message_text("🗑 Шаблон удален")
 
 
 async def back_to_edit_fields(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -178,8 +173,7 @@ async def handle_new_template_text(update: Update, context: ContextTypes.DEFAULT
             await update.message.reply_text("Введите числовой ID")
             return
 
-        with DBConnection() as db:
-            fields = get_transaction_fields(tx_id, db=db)
+        fields = await get_transaction_fields(tx_id)
 
         if not fields:
             await update.message.reply_text("Запись с таким ID не найдена")
@@ -1,6 +1,5 @@
 import os
 import logging
-import pandas as pd
 from datetime import datetime
 import calendar
 from tempfile import NamedTemporaryFile
@@ -15,9 +14,8 @@ from handlers.utils import ADMIN_FILTER
 from telegram.error import BadRequest
 from telegram_bot_calendar import DetailedTelegramCalendar, LSTEP
 
-from db.base import DBConnection
-from db.transactions import get_transactions, get_last_import_ids, get_unique_values
-from handlers.edit import parse_ids_input
+from db.async_transactions import get_last_import_ids, get_unique_values
+from db.export import export_transactions_csv
 from handlers.filters import get_default_filters
 from handlers.pdf_type_filter import make_pdf_type_button
 
@@ -176,6 +174,7 @@ async def generate_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.edit_message_text("❌ Ошибка: фильтры экспорта не найдены")
         return
 
+    tmp_path = None
     try:
         # Преобразуем даты
         filters['start_date'] = datetime.strptime(filters['start_date'], "%d.%m.%Y")
@@ -187,35 +186,21 @@ async def generate_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if v not in ("Все", None, "") or k in ["description", "counterparty", "check_num"]
         }
 
-        with DBConnection() as db:
-            df = get_transactions(
-                user_id=query.from_user.id,
-                start_date=filters['start_date'],
-                end_date=filters['end_date'],
-                filters=db_filters,
-                db=db
-            )
+        with NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
+            tmp_path = tmp.name
 
-        if df.empty:
+        row_count = await export_transactions_csv(
+            tmp_path,
+            user_id=query.from_user.id,
+            start_date=filters['start_date'],
+            end_date=filters['end_date'],
+            filters=db_filters,
+        )
+
+        if row_count == 0:
             await query.edit_message_text("⚠ По вашему запросу ничего не найдено")
             return
 
-        df = df.fillna('').replace('NaN', '').astype(str)
-        df['transaction_date'] = pd.to_datetime(df['transaction_date']).dt.strftime('%d.%m.%Y %H:%M')
-
-        column_mapping = {
-            'id': 'ID', 'transaction_date': 'Дата', 'amount': 'Сумма',
-            'cash_source': 'Наличность', 'target_amount': 'Сумма (куда)',
-            'target_cash_source': 'Наличность (куда)', 'category': 'Категория',
-            'description': 'Описание', 'transaction_type': 'Тип транзакции',
-            'counterparty': 'Контрагент', 'check_num': 'Чек #', 'transaction_class': 'Класс'
-        }
-        df.rename(columns=column_mapping, inplace=True)
-
-        with NamedTemporaryFile(suffix='.csv', delete=False, mode='w', encoding='utf-8') as tmp:
-            df.to_csv(tmp.name, index=False, sep=',')
-            tmp_path = tmp.name
-
         applied_filters = format_filters(filters)
 
         with open(tmp_path, 'rb') as f:
@@ -224,15 +209,13 @@ async def generate_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 document=f,
                 filename='report.csv',
                 caption=f"Отчет за {filters['start_date'].strftime('%d.%m.%Y')} – {filters['end_date'].strftime('%d.%m.%Y')}\n"
-                        f"📌 Записей: {len(df)}"
+                        f"📌 Записей: {row_count}"
             )
 
-        os.unlink(tmp_path)
-
         logger.info(
             "Отчет для пользователя %s сформирован: %s записей",
             query.from_user.id,
-            len(df),
+            row_count,
         )
 
         reply_markup = InlineKeyboardMarkup([
@@ -248,6 +231,10 @@ async def generate_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logger.error("Ошибка генерации отчета: %s", e, exc_info=True)
         await query.edit_message_text("❌ Ошибка при формировании отчета. Попробуйте позже")
+    finally:
+        # Файл удаляется при любом исходе, в том числе при ошибке выгрузки
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
 
 
 def format_filters(filters: dict) -> str:
@@ -297,8 +284,7 @@ async def handle_category_selection(update: Update, context: ContextTypes.DEFAUL
 
     try:
         # Получаем оригинальное название категории из БД
-        with DBConnection() as db:
-            categories = get_unique_values('category', user_id=query.from_user.id, db=db)
+        categories = await get_unique_values('category', user_id=query.from_user.id)
         original_value = next(
             (cat for cat in categories
              if cat.replace(" ", "_").replace("'", "").replace('"', "")[:50] == safe_value),
@@ -467,8 +453,7 @@ async def set_import_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     from_user_id = query.from_user.id
     try:
-        with DBConnection() as db:
-            import_ids = get_last_import_ids(user_id=from_user_id, limit=10, db=db)
+        import_ids = await get_last_import_ids(user_id=from_user_id, limit=10)
 
         keyboard = [[InlineKeyboardButton("Все", callback_data="import_id_Все")]]
         for import_id, created_at, pdf_type in import_ids:
@@ -502,8 +487,7 @@ async def set_category(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     try:
-        with DBConnection() as db:
-            categories = ['Все'] + get_unique_values('category', user_id=query.from_user.id, db=db)
+        categories = ['Все'] + await get_unique_values('category', user_id=query.from_user.id)
 
         keyboard = []
         for cat in categories:
@@ -522,8 +506,7 @@ async def set_category(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def set_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    with DBConnection() as db:
-        types = ['Все'] + get_unique_values('transaction_type', user_id=query.from_user.id, db=db)
+    types = ['Все'] + await get_unique_values('transaction_type', user_id=query.from_user.id)
     keyboard = [[InlineKeyboardButton(t, callback_data=f"type_{t}")] for t in types]
     keyboard.append([InlineKeyboardButton("↩️ Назад", callback_data="back_to_filters")])
     await query.edit_message_text("Выберите тип транзакции:", reply_markup=InlineKeyboardMarkup(keyboard))
@@ -531,8 +514,7 @@ async def set_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def set_cash_source(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    with DBConnection() as db:
-        sources = ['Все'] + get_unique_values('cash_source', user_id=query.from_user.id, db=db)
+    sources = ['Все'] + await get_unique_values('cash_source', user_id=query.from_user.id)
     keyboard = [
         [InlineKeyboardButton(src, callback_data=f"source_{src}") for src in sources[i:i+2]]
         for i in range(0, len(sources), 2)
@@ -564,8 +546,7 @@ async def set_check_num(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def set_class(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    with DBConnection() as db:
-        classes = ['Все'] + get_unique_values('transaction_class', user_id=query.from_user.id, db=db)
+    classes = ['Все'] + await get_unique_values('transaction_class', user_id=query.from_user.id)
     keyboard = [
         [InlineKeyboardButton(cls, callback_data=f"class_{cls}") for cls in classes[i:i+3]]
         for i in range(0, len(classes), 3)
@@ -5,8 +5,7 @@ from telegram.ext import (
     CallbackQueryHandler,
 )
 from handlers.utils import ADMIN_FILTER
-from db.base import DBConnection
-from db.transactions import get_unique_values
+from db.async_transactions import get_unique_values
 
 # единственное состояние
 PDF_TYPE = 0
@@ -26,8 +25,7 @@ async def ask_pdf_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = query.from_user.id
 
     try:
-        with DBConnection() as db:
-            pdf_types = ["Все"] + get_unique_values("pdf_type", user_id=user_id, db=db)
+        pdf_types = ["Все"] + await get_unique_values("pdf_type", user_id=user_id)
 
     except Exception:
         await query.edit_message_text("❌ Не удалось загрузить типы PDF.")
@@ -1,16 +1,14 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 
-from db.base import DBConnection
-from db.templates import save_template, get_templates, get_template, delete_template
+from db.async_templates import save_template, get_templates, get_template, delete_template
 from handlers.export import show_filters_menu
 from handlers.filters import get_default_filters
 from handlers.utils import ADMIN_FILTER
 
 
 async def list_templates(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    with DBConnection() as db:
-        templates = get_templates(update.effective_user.id, db=db)
+    templates = await get_templates(update.effective_user.id)
 
     if not templates:
         await update.message.reply_text("⚠️ Шаблоны не найдены")
@@ -52,8 +50,7 @@ async def save_template_name(update: Update, context: ContextTypes.DEFAULT_TYPE)
     name = update.message.text.strip()
     filters = context.user_data.pop("save_template_filters", get_default_filters())
     context.user_data.pop("awaiting_template_name", None)
-    with DBConnection() as db:
-        save_template(update.effective_user.id, name, filters, db=db)
+    await save_template(update.effective_user.id, name, filters)
     await update.message.reply_text("✅ Шаблон сохранен")
 
 
@@ -61,8 +58,7 @@ async def apply_template(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     template_id = int(query.data.split("_")[2])
-    with DBConnection() as db:
-        filters = get_template(query.from_user.id, template_id, db=db)
+    filters = await get_template(query.from_user.id, template_id)
     if not filters:
         await query.edit_message_text("⚠️ Шаблон не найден")
         return
@@ -74,8 +70,7 @@ async def remove_template(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     template_id = int(query.data.split("_")[2])
-    with DBConnection() as db:
-        delete_template(query.from_user.id, template_id, db=db)
+    await delete_template(query.from_user.id, template_id)
     await query.edit_message_text("🗑 Шаблон удален")
 
 
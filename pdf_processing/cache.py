@@ -0,0 +1,121 @@
+import os
+import gzip
+import pickle
+import hashlib
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PDF_PATTERNS_PATH = PROJECT_ROOT / "config" / "pdf_patterns.yaml"
+
+# Модули, от которых зависит содержимое записи кеша (extract_frames): их правка
+# меняет code_version и сбрасывает кеш без ручного учёта версий
+EXTRACTION_SOURCES = (
+    PROJECT_ROOT / "extract_transactions_pdf1.py",
+    PROJECT_ROOT / "extract_transactions_pdf2.py",
+    PROJECT_ROOT / "pdf_processing" / "document.py",
+    PROJECT_ROOT / "pdf_processing" / "pages.py",
+    PROJECT_ROOT / "pdf_processing" / "words_table.py",
+    PROJECT_ROOT / "pdf_processing" / "layout.py",
+    PROJECT_ROOT / "pdf_processing" / "normalize.py",
+    PROJECT_ROOT / "pdf_processing" / "pipeline.py",
+    PROJECT_ROOT / "utils" / "money.py",
+)
+
+
+def patterns_version(config_path: Path = PDF_PATTERNS_PATH) -> str:
+    """Версия pdf_patterns.yaml — SHA-256 содержимого (правка шаблонов сбрасывает кеш)."""
+    with open(config_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def code_version(sources: tuple[Path, ...] = EXTRACTION_SOURCES) -> str:
+    """Версия кода извлечения — SHA-256 исходников sources (считается один раз на процесс)."""
+    digest = hashlib.sha256()
+    for path in sources:
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ExtractionCache:
+    """
+    Дисковый кеш результатов извлечения PDF.
+
+    Ключ — SHA-256 файла, версия кода извлечения (code_version), версия
+    pdf_patterns.yaml и pdf_type. Значение — DataFrame извлечения и
+    преобразования, сохранённые pickle + gzip. При превышении max_size_mb
+    удаляются записи, к которым дольше всего не обращались (время доступа
+    хранится в mtime файла).
+    """
+
+    SUFFIX = '.pkl.gz'
+
+    def __init__(self, directory: str | Path, max_size_mb: float = 200):
+        self.directory = Path(directory)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings: dict | None) -> 'ExtractionCache | None':
+        """Создаёт кеш по секции extraction_cache из settings.yaml (None — кеш выключен)."""
+        settings = settings or {}
+        if not settings.get('enabled', True):
+            return None
+        directory = Path(settings.get('directory', 'cache/extraction'))
+        if not directory.is_absolute():
+            directory = PROJECT_ROOT / directory
+        return cls(directory, settings.get('max_size_mb', 200))
+
+    def _path(self, file_hash: str, pdf_type: str) -> Path:
+        key = hashlib.sha256(f"{file_hash}:{code_version()}:{patterns_version()}:{pdf_type}".encode()).hexdigest()
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def get(self, file_hash: str, pdf_type: str) -> dict | None:
+        path = self._path(file_hash, pdf_type)
+        try:
+            with gzip.open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)  # отметка последнего обращения для LRU
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Повреждённая запись кеша %s удалена: %s", path.name, e)
+            path.unlink(missing_ok=True)
+            return None
+        logger.info("Результат извлечения взят из кеша (%s, %s)", pdf_type, file_hash[:12])
+        return entry
+
+    def put(self, file_hash: str, pdf_type: str, entry: dict) -> None:
+        path = self._path(file_hash, pdf_type)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("Не удалось записать кеш извлечения: %s", e)
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """Удаляет самые давние записи, пока размер кеша больше max_size_mb."""
+        entries = []
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug("Из кеша извлечения удалена запись %s", path.name)
@@ -0,0 +1,216 @@
+"""
+Определение pdf_type.
+
+Уровни проверки, от дешёвого к дорогому:
+1. metadata — регулярные выражения по метаданным PDF (fingerprints.metadata);
+2. bytes — сигнатуры в первых байтах файла (fingerprints.bytes);
+3. text — паттерны типов по тексту первой страницы.
+
+Текстовые паттерны всех типов компилируются в одно выражение из опережающих
+проверок с именованными группами (?=(?P<t0_1>...)), так что перекрывающиеся
+совпадения разных типов не теряются. Всё пересобирается только при изменении
+pdf_patterns.yaml (mtime/размер). Один проход finditer даёт и результат, и
+отчёт о неоднозначности: все типы, чьи паттерны совпали.
+"""
+import os
+import re
+import logging
+from collections import Counter
+from pdf_processing.cache import PDF_PATTERNS_PATH
+from config.yaml_cache import load_yaml_cached
+
+logger = logging.getLogger(__name__)
+
+
+# Нумерованные обратные ссылки (\1) и собственные именованные группы нельзя
+# встроить в общее выражение: номера групп сдвигаются, имена повторяются
+_NOT_JOINABLE = re.compile(r'(?<!\\)\\[1-9]|\(\?P<')
+
+
+def compile_type_patterns(pdf_config: dict) -> tuple[re.Pattern | None, dict, list]:
+    """
+    Собирает паттерны типов в одно выражение.
+
+    Каждый паттерн — необязательная опережающая проверка (?:(?=(?P<t0_1>...)))?,
+    поэтому в каждой позиции текста проверяются все паттерны, а не первый
+    совпавший: совпадения разных типов могут перекрываться. Паттерны, которые
+    нельзя встроить в общее выражение (глобальные флаги (?i) не в начале,
+    обратные ссылки, свои именованные группы), проверяются отдельно.
+
+    Returns:
+        (общее выражение или None, {имя группы: (pdf_type, паттерн)},
+         [(pdf_type, паттерн, отдельное выражение)])
+    """
+    alternatives, groups, standalone = [], {}, []
+    for type_index, (pdf_type, config) in enumerate(pdf_config['pdf_types'].items()):
+        for pattern_index, pattern in enumerate(config.get('patterns') or []):
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                logger.error("Ошибка в регулярном выражении %s (%s): %s", pattern, pdf_type, e)
+                continue
+            name = f"t{type_index}_{pattern_index}"
+            alternative = f"(?:(?=(?P<{name}>{pattern})))?"
+            try:
+                if _NOT_JOINABLE.search(pattern):
+                    raise re.error("обратная ссылка или именованная группа")
+                re.compile(alternative)
+            except re.error as e:
+                logger.debug("Паттерн %s (%s) проверяется отдельно: %s", pattern, pdf_type, e)
+                standalone.append((pdf_type, pattern, compiled))
+                continue
+            alternatives.append((name, pattern, alternative))
+            groups[name] = (pdf_type, pattern)
+
+    if not alternatives:
+        return None, {}, standalone
+    # Первая проверка отбрасывает позиции, где не совпал ни один паттерн
+    joined = "(?=" + "|".join(f"(?:{pattern})" for _, pattern, _ in alternatives) + ")" + "".join(
+        alternative for _, _, alternative in alternatives
+    )
+    try:
+        return re.compile(joined, re.IGNORECASE), groups, standalone
+    except re.error as e:
+        # Паттерны, корректные по отдельности, несовместимы вместе (например, одинаковые имена групп)
+        logger.error("Общее выражение паттернов не собрано, проверка по отдельности: %s", e)
+        standalone += [(groups[name][0], pattern, re.compile(pattern, re.IGNORECASE)) for name, pattern, _ in alternatives]
+        return None, {}, standalone
+
+
+def compile_fingerprints(pdf_config: dict) -> list[tuple[str, dict, list]]:
+    """
+    Компилирует секции fingerprints типов.
+
+    Returns:
+        [(pdf_type, {поле метаданных: выражение}, [выражения по байтам])]
+    """
+    fingerprints = []
+    for pdf_type, config in pdf_config['pdf_types'].items():
+        section = config.get('fingerprints') or {}
+        try:
+            metadata = {
+                key.lower(): re.compile(pattern, re.IGNORECASE)
+                for key, pattern in (section.get('metadata') or {}).items()
+            }
+            signatures = [re.compile(pattern.encode('utf-8')) for pattern in section.get('bytes') or []]
+        except re.error as e:
+            logger.error("Ошибка в fingerprints типа %s: %s", pdf_type, e)
+            continue
+        if metadata or signatures:
+            fingerprints.append((pdf_type, metadata, signatures))
+    return fingerprints
+
+
+class PdfTypeDetector:
+    """
+    Детектор pdf_type по pdf_patterns.yaml с перекомпиляцией при изменении файла.
+
+    tier_hits считает, на каком уровне определялся тип ('metadata', 'bytes',
+    'text' или 'none'), чтобы оценить долю дешёвых определений.
+    """
+
+    # Сколько байт от начала файла просматривают сигнатуры fingerprints.bytes
+    HEAD_SIZE = 64 * 1024
+
+    def __init__(self, config_path=PDF_PATTERNS_PATH):
+        self.config_path = config_path
+        self._version = None
+        self._regex = None
+        self._groups = {}
+        self._standalone = []
+        self._priority = {}
+        self._fingerprints = []
+        self.tier_hits = Counter()
+
+    def _refresh(self) -> None:
+        stat = os.stat(self.config_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self._version:
+            return
+        pdf_config = load_yaml_cached(self.config_path)
+        self._regex, self._groups, self._standalone = compile_type_patterns(pdf_config)
+        self._priority = {pdf_type: i for i, pdf_type in enumerate(pdf_config['pdf_types'])}
+        self._fingerprints = compile_fingerprints(pdf_config)
+        self._version = version
+        logger.debug("Паттерны pdf_type скомпилированы: %d (отдельно: %d)", len(self._groups), len(self._standalone))
+
+    def detect_text(self, text: str) -> dict:
+        """
+        Определяет тип по тексту.
+
+        Returns:
+            {'pdf_type': тип или None, 'matches': {тип: совпавший паттерн}}.
+            Типы в matches идут в порядке pdf_patterns.yaml; выбирается первый,
+            как и раньше. Больше одного типа в matches — неоднозначность.
+        """
+        self._refresh()
+        matches = {}
+        if self._regex is not None:
+            for match in self._regex.finditer(text):
+                # В позиции могут совпасть паттерны нескольких типов — учитываются все
+                for name, value in match.groupdict().items():
+                    if value is not None:
+                        pdf_type, pattern = self._groups[name]
+                        matches.setdefault(pdf_type, pattern)
+        for pdf_type, pattern, regex in self._standalone:
+            if pdf_type not in matches and regex.search(text):
+                matches[pdf_type] = pattern
+        matches = dict(sorted(matches.items(), key=lambda item: self._priority[item[0]]))
+        return {'pdf_type': next(iter(matches), None), 'matches': matches}
+
+
+    def _match_metadata(self, document) -> dict:
+        metadata = None
+        matches = {}
+        for pdf_type, fields, _ in self._fingerprints:
+            if not fields:
+                continue
+            if metadata is None:
+                metadata = document.metadata
+            # Совпасть должны все заданные поля
+            if all(regex.search(metadata.get(key, '')) for key, regex in fields.items()):
+                matches[pdf_type] = ', '.join(f"{key}~{regex.pattern}" for key, regex in fields.items())
+        return matches
+
+    def _match_bytes(self, document) -> dict:
+        head = None
+        matches = {}
+        for pdf_type, _, signatures in self._fingerprints:
+            if not signatures:
+                continue
+            if head is None:
+                head = document.head(self.HEAD_SIZE)
+            for regex in signatures:
+                if regex.search(head):
+                    matches[pdf_type] = regex.pattern.decode('utf-8')
+                    break
+        return matches
+
+    def detect(self, document) -> dict:
+        """
+        Определяет тип PdfDocument: метаданные, затем байты, затем текст первой страницы.
+
+        Returns:
+            {'pdf_type', 'matches', 'tier'} — как detect_text, плюс уровень,
+            на котором тип определён ('none', если не определён).
+        """
+        self._refresh()
+        for tier, matcher in (('metadata', self._match_metadata), ('bytes', self._match_bytes)):
+            matches = matcher(document)
+            if matches:
+                result = {'pdf_type': next(iter(matches)), 'matches': matches, 'tier': tier}
+                break
+        else:
+            result = self.detect_text(document.page_text(0))
+            result['tier'] = 'text' if result['pdf_type'] else 'none'
+
+        self.tier_hits[result['tier']] += 1
+        logger.info(
+            "pdf_type %s определён по уровню %s (статистика процесса: %s)",
+            result['pdf_type'], result['tier'], dict(self.tier_hits),
+        )
+        return result
+
+
+# Общий детектор процесса: компиляция один раз на процесс и изменение файла
+detector = PdfTypeDetector()
@@ -0,0 +1,88 @@
+import os
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+import fitz  # PyMuPDF
+
+
+class PdfDocument:
+    """
+    PDF, открытый один раз через PyMuPDF, с кешем текста страниц.
+
+    Общий для определения типа (текст первой страницы), поиска маркеров и
+    извлечения (текст/слова страниц), чтобы файл не разбирался разными
+    библиотеками по нескольку раз. Загруженная выписка открывается прямо из
+    буфера (data, bytes или bytearray без копирования); файл на диске нужен
+    только camelot — см. temporary_file().
+    """
+
+    def __init__(self, path: str = None, data: bytes | bytearray = None, workdir: str = None):
+        if data is None and path is None:
+            raise ValueError("Нужен путь к PDF или его содержимое")
+        self.path = path
+        self.workdir = workdir  # каталог для temporary_file (None — системный temp)
+        self._data = data
+        self._document = fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(path)
+        self._texts = {}
+
+    @classmethod
+    def open(cls, pdf) -> tuple['PdfDocument', bool]:
+        """
+        Возвращает (документ, открыт_здесь) для пути или уже открытого PdfDocument.
+
+        Если документ открыт здесь, закрыть его должен вызывающий.
+        """
+        if isinstance(pdf, PdfDocument):
+            return pdf, False
+        return cls(pdf), True
+
+    def __len__(self) -> int:
+        return len(self._document)
+
+    @property
+    def metadata(self) -> dict:
+        """Метаданные документа (producer, creator, title, ...) с ключами в нижнем регистре."""
+        return {key.lower(): value or '' for key, value in (self._document.metadata or {}).items()}
+
+    def head(self, size: int) -> bytes:
+        """Первые size байт файла (для сигнатур без разбора текста)."""
+        if self._data is not None:
+            return bytes(self._data[:size])
+        with open(self.path, 'rb') as f:
+            return f.read(size)
+
+    @contextmanager
+    def temporary_file(self):
+        """
+        Путь к файлу PDF для библиотек, читающих только с диска (camelot).
+
+        Для документа из буфера файл создаётся на время блока и удаляется.
+        """
+        if self.path is not None:
+            yield self.path
+            return
+        with NamedTemporaryFile(suffix='.pdf', dir=self.workdir, delete=False) as tmp_pdf:
+            tmp_pdf.write(self._data)
+        try:
+            yield tmp_pdf.name
+        finally:
+            os.unlink(tmp_pdf.name)
+
+    def page(self, index: int) -> fitz.Page:
+        return self._document[index]
+
+    def page_text(self, index: int) -> str:
+        """Текст страницы (с 0), page.get_text() разбирается один раз."""
+        text = self._texts.get(index)
+        if text is None:
+            text = self._texts[index] = self._document[index].get_text()
+        return text
+
+    def close(self) -> None:
+        self._document.close()
+        self._texts.clear()
+
+    def __enter__(self) -> 'PdfDocument':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,164 @@
+"""
+Разбор построчных выписок по секции layout в pdf_patterns.yaml.
+
+Текстовые выписки (одна строка PDF — одна строка столбца text) описываются
+декларативно, без отдельного преобразователя в extract_transactions_pdf2:
+
+    layout:
+      record_start: "\\d{2}\\.\\d{2}\\.\\d{4}"  # строка, с которой начинается запись
+      fields:                                   # строки записи по порядку, от record_start
+        - name: date
+        - name: time
+          pattern: "в (\\d{2}:\\d{2})"          # значение — первая группа (или вся строка)
+          optional: true                        # не совпало — строка не занимается, берётся default
+          default: "00:00"
+        - skip: 2                               # пропустить строки
+        - name: amount
+      continuation: before                      # after | before | none
+      output:                                   # столбец результата -> шаблон str.format
+        "Дата и время операции": "{date} {time}"
+
+Правила:
+- пустые строки (NaN, пробелы) отбрасываются до разбора, значения обрезаются;
+- начала записей ищутся одним векторным re.match по всему столбцу, строки,
+  занятые полями предыдущей записи, началом новой не считаются;
+- обязательное поле с pattern, которое не совпало, отбрасывает запись, разбор
+  продолжается со следующей за record_start строки;
+- поля за концом данных — пустые строки;
+- continuation: after — строки после полей до следующей записи, before —
+  строки от конца предыдущей записи до record_start; доступны в output как
+  {continuation} (через пробел);
+- значения output обрезаются по краям.
+
+Схема компилируется один раз для каждого содержимого секции.
+"""
+import json
+import logging
+import re
+import string
+from functools import lru_cache
+import pandas as pd
+from pdf_processing.cache import PDF_PATTERNS_PATH
+from config.yaml_cache import load_yaml_cached
+
+logger = logging.getLogger(__name__)
+
+CONTINUATION_MODES = ('after', 'before', 'none')
+_FORMATTER = string.Formatter()
+
+
+class CompiledLayout:
+    """Скомпилированная секция layout: разбирает столбец text в таблицу операций."""
+
+    def __init__(self, spec: dict):
+        if not isinstance(spec, dict):
+            raise ValueError("Секция layout должна быть словарём")
+        unknown = set(spec) - {'record_start', 'fields', 'continuation', 'output'}
+        if unknown:
+            raise ValueError(f"Неизвестные ключи layout: {sorted(unknown)}")
+        if not spec.get('record_start') or not spec.get('fields') or not spec.get('output'):
+            raise ValueError("В layout обязательны record_start, fields и output")
+
+        self.record_start = _compile(spec['record_start'], 'record_start')
+        self.continuation = spec.get('continuation', 'after')
+        if self.continuation not in CONTINUATION_MODES:
+            raise ValueError(f"continuation должен быть одним из {CONTINUATION_MODES}: {self.continuation}")
+
+        # Шаги: (имя поля или None для skip, выражение или None, optional, default, число строк)
+        self.steps = []
+        names = {'continuation'} if self.continuation != 'none' else set()
+        for field in spec['fields']:
+            if 'skip' in field:
+                self.steps.append((None, None, False, '', int(field['skip'])))
+                continue
+            name = field.get('name')
+            if not name:
+                raise ValueError(f"У поля layout нет name: {field}")
+            pattern = _compile(field['pattern'], name) if field.get('pattern') else None
+            self.steps.append((name, pattern, bool(field.get('optional')), str(field.get('default', '')), 1))
+            names.add(name)
+
+        self.output = dict(spec['output'])
+        for column, template in self.output.items():
+            for _, placeholder, _, _ in _FORMATTER.parse(template):
+                if placeholder and placeholder not in names:
+                    raise ValueError(f"В шаблоне столбца {column} неизвестное поле {{{placeholder}}}")
+
+    def parse(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Разбирает столбец text (результат extract_frame) в таблицу операций."""
+        texts = df['text'][df['text'].map(lambda value: isinstance(value, str))].astype(str).str.strip()
+        texts = texts[texts != ''].reset_index(drop=True)
+        # Кандидаты в начало записи — одним векторным проходом
+        starts = texts.index[texts.str.match(self.record_start).astype(bool)].tolist()
+        lines = texts.tolist()
+        n = len(lines)
+
+        records = []  # (конец предыдущей записи, record_start, конец полей, значения)
+        cursor = 0
+        for start in starts:
+            if start < cursor:
+                continue
+            values = self._read_fields(lines, start)
+            if values is None:
+                cursor = start + 1
+                continue
+            end = values.pop(None)
+            records.append((cursor, start, end, values))
+            cursor = end
+
+        rows = []
+        for number, (previous_end, start, end, values) in enumerate(records):
+            if self.continuation == 'after':
+                next_start = records[number + 1][1] if number + 1 < len(records) else n
+                values['continuation'] = ' '.join(lines[end:next_start])
+            elif self.continuation == 'before':
+                values['continuation'] = ' '.join(lines[previous_end:start])
+            rows.append([template.format(**values).strip() for template in self.output.values()])
+
+        return pd.DataFrame(rows, columns=list(self.output))
+
+    def _read_fields(self, lines: list[str], start: int) -> dict | None:
+        """Значения полей записи от start; ключ None — позиция после полей. None — запись отброшена."""
+        n = len(lines)
+        values = {}
+        position = start
+        for name, pattern, optional, default, width in self.steps:
+            if name is None:
+                position += width
+                continue
+            line = lines[position] if position < n else ''
+            match = pattern.match(line) if pattern else None
+            if pattern and not match:
+                if not optional:
+                    return None
+                values[name] = default
+                continue
+            values[name] = (match.group(1) or '') if match and match.re.groups else line
+            position += 1
+        values[None] = min(position, n)
+        return values
+
+
+def _compile(pattern: str, name: str) -> re.Pattern:
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Ошибка в регулярном выражении layout ({name}): {e}")
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(spec_json: str) -> CompiledLayout:
+    return CompiledLayout(json.loads(spec_json))
+
+
+def compile_layout(spec: dict) -> CompiledLayout:
+    """Компилирует секцию layout; одинаковые секции компилируются один раз."""
+    return _compile_cached(json.dumps(spec, ensure_ascii=False))
+
+
+def layout_for(pdf_type: str | None, config_path=PDF_PATTERNS_PATH) -> CompiledLayout | None:
+    """Скомпилированный layout типа из pdf_patterns.yaml или None, если секции нет."""
+    if not pdf_type:
+        return None
+    spec = (load_yaml_cached(config_path).get('pdf_types', {}).get(pdf_type) or {}).get('layout')
+    return compile_layout(spec) if spec else None
@@ -0,0 +1,58 @@
+"""
+Типизированные столбцы таблицы операций.
+
+Суммы из выписок ("-1 234,56 ₽", "+5,00", "−100,00") разбираются один раз —
+сразу после извлечения — в целые копейки (Int64, пропуск — <NA>), дата и
+время ("01.02.2024 12:30") — в datetime64. Дальше классификация и сохранение
+работают с этими столбцами; в текст они превращаются только при записи CSV
+(format_transactions), в Decimal — при записи в БД (utils.money.kopecks_to_decimal).
+"""
+import logging
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+from utils.money import (
+    DATE_FORMAT,
+    is_kopecks,
+    kopecks_to_decimal,
+    kopecks_to_text,
+    parse_amount,
+    parse_amounts,
+    parse_datetimes,
+)
+
+logger = logging.getLogger(__name__)
+
+# Столбцы таблицы операций после extract_transactions_pdf2 и после классификации
+SOURCE_DATE_COLUMN = 'Дата и время операции'
+SOURCE_AMOUNT_COLUMN = 'Сумма операции в валюте карты'
+DATE_COLUMNS = ('Дата',)
+AMOUNT_COLUMNS = ('Сумма', 'Сумма (куда)')
+
+
+def normalize_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит таблицу операций (результат extract_transactions_pdf2) к типизированному
+    виду: сумма — копейки со знаком, дата — datetime64. Повторный вызов ничего не меняет.
+    """
+    df = df.copy()
+    if SOURCE_DATE_COLUMN in df.columns:
+        df[SOURCE_DATE_COLUMN] = parse_datetimes(df[SOURCE_DATE_COLUMN])
+    if SOURCE_AMOUNT_COLUMN in df.columns:
+        amounts = parse_amounts(df[SOURCE_AMOUNT_COLUMN])
+        unparsed = int((amounts.isna() & df[SOURCE_AMOUNT_COLUMN].notna()).sum())
+        if unparsed:
+            logger.warning("Не удалось разобрать сумм: %d", unparsed)
+        df[SOURCE_AMOUNT_COLUMN] = amounts
+    return df
+
+
+def format_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """Копия для записи в CSV: даты — DATE_FORMAT, суммы в копейках — "1234,56"."""
+    df = df.copy()
+    for column in (SOURCE_DATE_COLUMN, *DATE_COLUMNS):
+        if column in df.columns and is_datetime64_any_dtype(df[column].dtype):
+            df[column] = df[column].dt.strftime(DATE_FORMAT)
+    for column in (SOURCE_AMOUNT_COLUMN, *AMOUNT_COLUMNS):
+        if column in df.columns and is_kopecks(df[column]):
+            df[column] = kopecks_to_text(df[column])
+    return df
@@ -0,0 +1,57 @@
+"""
+Ленивый обход страниц PDF с учётом start_marker / end_marker.
+
+Обработчики типов (process_Tinkoff_Platinum, process_Visa_Gold_Aeroflot,
+process_Yandex) всё равно отбрасывают строки до первого start_marker и
+начиная с первого end_marker, поэтому страницы до start_marker и после
+end_marker разбирать не нужно. Юридический текст в конце длинной выписки
+больше не читается.
+"""
+from pdf_processing.document import PdfDocument
+
+
+def iter_marked_pages(document: PdfDocument, start_marker: str = None, end_marker: str = None):
+    """
+    Отдаёт (index, text) страниц документа (index с 0), на которых могут быть данные.
+
+    - Страницы до первой страницы со start_marker пропускаются (если маркер
+      так и не встретился, отдаются все страницы).
+    - Обход останавливается после страницы, на которой встретился
+      end_marker (при уже найденном start_marker).
+    - Если end_marker встретился раньше start_marker, обработчик получил бы
+      пустую таблицу; чтобы результат совпадал, в этом случае отдаются все
+      страницы без сокращений.
+    """
+    start_seen = not start_marker
+    full_read = False  # маркеры в обратном порядке: сокращать обход нельзя
+    pending = []  # страницы до start_marker
+    for index in range(len(document)):
+        text = document.page_text(index)
+        if full_read:
+            yield index, text
+            continue
+        if not start_seen:
+            if start_marker in text:
+                start_seen = True
+                pending.clear()
+            elif end_marker and end_marker in text:
+                full_read = True
+                yield from pending
+                pending.clear()
+                yield index, text
+                continue
+            else:
+                pending.append((index, text))
+                continue
+
+        yield index, text
+        if end_marker and end_marker in text:
+            return
+
+    yield from pending
+
+
+def marker_page_range(document: PdfDocument, start_marker: str = None, end_marker: str = None) -> tuple[int, int]:
+    """Номера (с 1) первой и последней страницы, которые нужно разобрать."""
+    numbers = [index + 1 for index, _ in iter_marked_pages(document, start_marker, end_marker)]
+    return min(numbers), max(numbers)
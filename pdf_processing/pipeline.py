@@ -0,0 +1,133 @@
+"""
+Обработка выписки в памяти: PDF -> сырые строки -> таблица операций -> классификация.
+
+Стадии передают друг другу DataFrame; CSV-файлы пишутся только те, что
+пользователь запросил настройкой pdf (return_files). Суммы и даты
+разбираются один раз сразу после извлечения (pdf_processing.normalize).
+"""
+import logging
+import numpy as np
+import pandas as pd
+from extract_transactions_pdf1 import extract_frame, save_temp_csv, detect_pdf_file_type
+from pdf_processing.document import PdfDocument
+from pdf_processing.normalize import format_transactions, normalize_transactions
+from extract_transactions_pdf2 import reshape_frame, save_processed_data
+from classify_transactions_pdf import classify_frame, save_classified
+
+logger = logging.getLogger(__name__)
+
+
+def as_read_back(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит DataFrame к виду, в котором его получала следующая стадия после
+    записи и чтения CSV: пустые строки — NaN, имена столбцов — строки,
+    индекс с нуля. Так поведение стадий не меняется.
+    """
+    df = df.replace('', np.nan).reset_index(drop=True)
+    df.columns = [str(column) for column in df.columns]
+    return df
+
+
+def extract_frames(pdf: str | PdfDocument, pdf_type: str = None, page_workers: int = 1) -> tuple[pd.DataFrame, pd.DataFrame, str]:
+    """
+    Извлекает операции из PDF (путь или PdfDocument; page_workers — процессы для постраничного camelot).
+
+    Returns:
+        (сырые строки extract_frame, таблица операций reshape_frame с суммой
+        в копейках и датой datetime64, pdf_type)
+    """
+    raw_df, pdf_type = extract_frame(pdf, pdf_type, page_workers)
+    raw_df = as_read_back(raw_df)
+    processed_df = normalize_transactions(as_read_back(reshape_frame(raw_df.copy(), pdf_type)))
+    return raw_df, processed_df, pdf_type
+
+
+def classify_frames(processed_df: pd.DataFrame, pdf_type: str, user_settings: dict = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Классифицирует таблицу операций, возвращает (result, unclassified)."""
+    return classify_frame(processed_df, pdf_type, user_settings)
+
+
+def write_outputs(
+    output_dir: str,
+    pdf_type: str,
+    return_files: str,
+    raw_df: pd.DataFrame,
+    processed_df: pd.DataFrame,
+    result_df: pd.DataFrame,
+    unclassified_df: pd.DataFrame,
+) -> tuple[list[str], str | None]:
+    """
+    Записывает файлы для отправки пользователю согласно настройке pdf.
+
+    return_files:
+        '1' — сырые строки (transactions_<type>_temp.csv);
+        '2' — сырые строки и таблица операций (transactions_processed_<type>.csv);
+        иначе — result.csv и unclassified.csv.
+
+    Returns:
+        (файлы для отправки, путь к unclassified.csv или None)
+    """
+    if return_files == '1':
+        return [save_temp_csv(raw_df, output_dir, pdf_type)], None
+    if return_files == '2':
+        temp_csv_path = save_temp_csv(raw_df, output_dir, pdf_type)
+        processed_csv_path = save_processed_data(format_transactions(processed_df), temp_csv_path, pdf_type.lower() if pdf_type else "default")
+        return [temp_csv_path, processed_csv_path], None
+
+    result_csv_path, unclassified_csv_path = save_classified(result_df, unclassified_df, output_dir)
+    return [result_csv_path], unclassified_csv_path
+
+
+def run_pipeline(
+    pdf_data: bytes | bytearray,
+    file_hash: str,
+    user_settings: dict,
+    return_files: str,
+    output_dir: str,
+    cache=None,
+    page_workers: int = 1,
+) -> dict:
+    """
+    Полная обработка выписки: извлечение (или кеш), классификация, запись файлов.
+
+    PDF читается из буфера pdf_data, на диск пишутся только файлы для
+    отправки пользователю и временная копия для camelot — всё в рабочем
+    каталоге задания output_dir. Выполняется в процессе
+    PdfWorkerPool, поэтому аргументы и результат передаются через pickle.
+
+    Returns:
+        {'pdf_type', 'df' (для сохранения в БД), 'unclassified_count',
+         'files_to_send', 'unclassified_csv_path'}
+    """
+    cached = None
+    pdf_type = None
+    # Файл разбирается один раз: определение типа и извлечение используют общий документ
+    with PdfDocument(data=pdf_data, workdir=output_dir) as document:
+        if cache:
+            # Определение типа дешёвое (первая страница), извлечение — дорогое
+            pdf_type = detect_pdf_file_type(document)
+            cached = cache.get(file_hash, pdf_type)
+
+        if cached:
+            raw_df, processed_df = cached['raw'], cached['processed']
+        else:
+            raw_df, processed_df, pdf_type = extract_frames(document, pdf_type, page_workers)
+            if cache:
+                cache.put(file_hash, pdf_type, {'raw': raw_df, 'processed': processed_df})
+
+    result_df, unclassified_df = classify_frames(processed_df, pdf_type, user_settings)
+
+    # Промежуточные CSV пишутся только если их запросили настройкой pdf
+    files_to_send, unclassified_csv_path = write_outputs(
+        output_dir, pdf_type, return_files,
+        raw_df, processed_df, result_df, unclassified_df,
+    )
+
+    return {
+        'pdf_type': pdf_type,
+        # Пустые значения сохраняются в БД как NULL (как при чтении result.csv)
+        'df': as_read_back(result_df),
+        'unclassified_count': len(unclassified_df),
+        'files_to_send': files_to_send,
+        'unclassified_csv_path': unclassified_csv_path,
+    }
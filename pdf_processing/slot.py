@@ -0,0 +1,98 @@
+"""
+Процесс-обработчик пула PdfWorkerPool: python -m pdf_processing.slot
+
+Запускается отдельным интерпретатором (не fork процесса бота), поэтому не
+наследует ни потоков, ни сокетов, ни цикла asyncio. Задачи приходят через
+stdin, ответы уходят через исходный stdout кадрами: 8 байт длины + pickle.
+Обычный вывод (print, сообщения библиотек) перенаправлен в stderr, чтобы не
+смешиваться с ответами.
+
+Запрос — (fn, args); ответ — ('ok', результат) или ('error', исключение).
+Конец stdin — сигнал завершения.
+"""
+import logging
+import os
+import pickle
+import signal
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>Q')
+
+
+def pack_frame(obj) -> bytes:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    return HEADER.pack(len(data)) + data
+
+
+def _read_exactly(stream, size: int) -> bytes | None:
+    chunks, left = [], size
+    while left:
+        chunk = stream.read(left)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        left -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(stream):
+    """Читает кадр из блокирующего потока; None — поток закрыт."""
+    header = _read_exactly(stream, HEADER.size)
+    if header is None:
+        return None
+    data = _read_exactly(stream, HEADER.unpack(header)[0])
+    return None if data is None else pickle.loads(data)
+
+
+def _warm_up() -> None:
+    """Импорт обработки PDF и загрузка конфигураций в кеш до первой задачи."""
+    from extract_transactions_pdf1 import load_pdf_config, PDF_CONFIG_PATH
+    from classify_transactions_pdf import load_config, load_class_contractor_config
+    from pdf_processing.detector import detector
+    import pdf_processing.pipeline  # noqa: F401
+
+    load_pdf_config(PDF_CONFIG_PATH)
+    detector.detect_text('')  # компиляция паттернов pdf_type
+    load_config()
+    load_class_contractor_config()
+
+
+def _reply(result) -> bytes:
+    try:
+        return pack_frame(result)
+    except Exception as e:
+        # Исключение или результат не сериализуются — передаём описание
+        return pack_frame(('error', RuntimeError(f"Не удалось передать результат: {e!r}")))
+
+
+def main() -> None:
+    requests = sys.stdin.buffer
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    # fd 1 теперь указывает на stderr: print и C-код не испортят протокол
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    # Ctrl+C обрабатывает процесс бота, он же завершает пул
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from config.logging import setup_logging
+    setup_logging()
+    _warm_up()
+
+    while True:
+        request = read_frame(requests)
+        if request is None:
+            break
+        fn, args = request
+        try:
+            result = ('ok', fn(*args))
+        except Exception as e:
+            logger.exception("Ошибка задачи %s", getattr(fn, '__name__', fn))
+            result = ('error', e)
+        replies.write(_reply(result))
+        replies.flush()
+
+
+if __name__ == "__main__":
+    main()
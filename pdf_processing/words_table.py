@@ -0,0 +1,80 @@
+"""
+Восстановление таблицы по координатам слов PyMuPDF (page.get_text("words")).
+
+Быстрая замена camelot stream для выписок с постоянной разметкой: слова
+группируются в строки по вертикали, а в колонки — по заданным в
+pdf_patterns.yaml левым границам (word_columns, в пунктах от левого края
+страницы). Результат — DataFrame той же формы, что у camelot: по строке на
+строку текста, ячейки — слова колонки через пробел, пустые ячейки — ''.
+
+Подбор границ: python -m pdf_processing.words_table statement.pdf [страница]
+печатает слова страницы с координатами.
+"""
+import sys
+from bisect import bisect_right
+import fitz  # PyMuPDF
+import pandas as pd
+from pdf_processing.document import PdfDocument
+
+DEFAULT_ROW_TOL = 2.0
+
+
+def words_to_rows(words: list, boundaries: list[float], row_tol: float = DEFAULT_ROW_TOL) -> list[list[str]]:
+    """
+    Собирает строки таблицы из слов страницы.
+
+    Args:
+        words: кортежи (x0, y0, x1, y1, text, ...) как у page.get_text("words").
+        boundaries: левые границы колонок по возрастанию.
+        row_tol: слова, чей верх отличается от верха строки не больше чем на
+            row_tol пунктов, относятся к одной строке.
+    """
+    rows = []
+    current, row_top = None, None
+    for word in sorted(words, key=lambda w: (w[1], w[0])):
+        if current is None or word[1] - row_top > row_tol:
+            current, row_top = [], word[1]
+            rows.append(current)
+        current.append(word)
+
+    table = []
+    for row_words in rows:
+        cells = [[] for _ in boundaries]
+        for x0, _, x1, _, text, *_ in sorted(row_words, key=lambda w: w[0]):
+            # Колонка — по середине слова; всё левее первой границы идёт в первую колонку
+            column = max(bisect_right(boundaries, (x0 + x1) / 2) - 1, 0)
+            cells[column].append(text)
+        table.append([' '.join(cell) for cell in cells])
+    return table
+
+
+def extract_words_table(
+    document: PdfDocument,
+    boundaries: list[float],
+    row_tol: float = DEFAULT_ROW_TOL,
+    pages: tuple[int, int] = None,
+) -> pd.DataFrame:
+    """
+    Извлекает таблицу PDF по координатам слов (страницы подряд, как у camelot).
+
+    pages — (первая, последняя) страница с 1, None — все страницы.
+    """
+    boundaries = sorted(float(x) for x in boundaries)
+    frames = []
+    first, last = pages or (1, len(document))
+    for index in range(first - 1, last):
+        rows = words_to_rows(document.page(index).get_text("words"), boundaries, row_tol)
+        if rows:
+            frames.append(pd.DataFrame(rows, columns=range(len(boundaries))))
+    if not frames:
+        raise ValueError("Не удалось извлечь слова из PDF")
+    return pd.concat(frames)
+
+
+if __name__ == "__main__":
+    # Вывод слов страницы с координатами для подбора word_columns
+    pdf_path = sys.argv[1]
+    page_num = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    with fitz.open(pdf_path) as document:
+        for x0, y0, x1, y1, text, *_ in sorted(document[page_num - 1].get_text("words"), key=lambda w: (w[1], w[0])):
+            print(f"x0={x0:7.1f} x1={x1:7.1f} y0={y0:7.1f}  {text}")
@@ -0,0 +1,171 @@
+"""
+Пул процессов для обработки PDF.
+
+Извлечение (camelot, PyMuPDF), преобразование и классификация — CPU-код под
+GIL; в потоке asyncio.to_thread он тормозит весь бот. Пул держит постоянные
+процессы-обработчики (pdf_processing.slot): каждый — отдельный интерпретатор,
+запущенный через subprocess, а не fork процесса бота с его потоками,
+сокетами и циклом asyncio. Модули и конфигурации загружаются в обработчике
+один раз при старте.
+
+Процессами владеет пул: если задача превысила таймаут или была отменена,
+процесс слота убивается и заменяется новым; остальные задачи не затрагиваются.
+"""
+import asyncio
+import logging
+import os
+import pickle
+import signal
+import sys
+from pathlib import Path
+
+from pdf_processing.slot import HEADER, pack_frame
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class WorkerCrashedError(RuntimeError):
+    """Процесс-обработчик завершился, не вернув результат."""
+
+
+class _Slot:
+    """Процесс-обработчик и каналы к нему."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+
+    @classmethod
+    async def start(cls) -> '_Slot':
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'pdf_processing.slot',
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=PROJECT_ROOT,
+            # Своя сессия и группа процессов: сигналы терминала бота не доходят до
+            # обработчика, а stop() убивает всю группу вместе с процессами camelot
+            start_new_session=True,
+        )
+        return cls(process)
+
+    async def call(self, fn, args: tuple):
+        try:
+            self.process.stdin.write(pack_frame((fn, args)))
+            await self.process.stdin.drain()
+            header = await self.process.stdout.readexactly(HEADER.size)
+            data = await self.process.stdout.readexactly(HEADER.unpack(header)[0])
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            raise WorkerCrashedError(f"Процесс обработки PDF завершился (код {self.process.returncode})") from e
+        status, value = pickle.loads(data)
+        if status == 'error':
+            raise value
+        return value
+
+    async def stop(self) -> None:
+        """
+        Убивает процесс, не дожидаясь завершения задачи.
+
+        Сигнал получает вся группа процессов слота: процессы постраничного чтения
+        camelot (page_workers) не остаются сиротами, даже если сам обработчик
+        уже аварийно завершился.
+        """
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await self.process.wait()
+
+
+class PdfWorkerPool:
+    """
+    Постоянный пул процессов обработки PDF с жёстким таймаутом задачи.
+
+    Args:
+        max_workers: число процессов (выписок, обрабатываемых параллельно).
+        timeout: предельное время задачи в секундах (processing_timeout).
+        page_workers: процессов на постраничное чтение camelot внутри задачи.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 180, page_workers: int = 1):
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.page_workers = max(1, int(page_workers))
+        self._idle = None
+        self._slots = set()
+
+    @classmethod
+    def from_settings(cls, settings: dict | None, timeout: float) -> 'PdfWorkerPool':
+        """Создаёт пул по секции pdf_workers из settings.yaml."""
+        settings = settings or {}
+        return cls(settings.get('max_workers', 2), timeout, settings.get('camelot_page_workers', 1))
+
+    async def start(self) -> None:
+        """Запускает процессы пула (в работающем цикле asyncio); повторный вызов ничего не делает."""
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.max_workers):
+            # None — слот без процесса: он запускается при первой задаче
+            self._idle.put_nowait(await self._new_slot_or_none())
+        logger.info("Запущен пул обработки PDF: %d процесс(ов), таймаут %s с", self.max_workers, self.timeout)
+
+    async def _new_slot_or_none(self) -> _Slot | None:
+        try:
+            slot = await _Slot.start()
+        except Exception as e:
+            logger.error("Не удалось запустить процесс обработки PDF: %s", e)
+            return None
+        self._slots.add(slot)
+        return slot
+
+    async def _discard(self, slot: _Slot) -> None:
+        self._slots.discard(slot)
+        await slot.stop()
+
+    async def run(self, fn, *args):
+        """
+        Выполняет fn(*args) в свободном процессе пула.
+
+        fn и аргументы передаются через pickle, поэтому fn должна
+        импортироваться по имени модуля.
+
+        Raises:
+            asyncio.TimeoutError: задача не уложилась в timeout (процесс убит).
+            WorkerCrashedError: процесс-обработчик аварийно завершился.
+        """
+        await self.start()
+        slot = await self._idle.get()
+        try:
+            if slot is None:
+                slot = await _Slot.start()
+                self._slots.add(slot)
+            return await asyncio.wait_for(slot.call(fn, args), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Обработка PDF прервана по таймауту %s с", self.timeout)
+            slot = await self._replace(slot)
+            raise
+        except asyncio.CancelledError:
+            logger.info("Обработка PDF отменена, процесс слота перезапускается")
+            if slot is not None:
+                await self._discard(slot)
+            # Новый процесс запускается при следующей задаче: отменённой корутине ждать нельзя
+            slot = None
+            raise
+        except WorkerCrashedError:
+            logger.error("Процесс обработки PDF аварийно завершился, слот перезапускается")
+            slot = await self._replace(slot)
+            raise
+        finally:
+            # В очередь возвращается живой процесс или None, но не убитый
+            self._idle.put_nowait(slot)
+
+    async def _replace(self, slot: _Slot | None) -> _Slot | None:
+        if slot is not None:
+            await self._discard(slot)
+        return await self._new_slot_or_none()
+
+    async def close(self) -> None:
+        """Останавливает все процессы пула (выполняющиеся задачи прерываются)."""
+        slots, self._slots = list(self._slots), set()
+        await asyncio.gather(*(slot.stop() for slot in slots))
@@ -0,0 +1,79 @@
+"""
+Рабочие каталоги заданий обработки PDF.
+
+Каждая выписка обрабатывается в собственном каталоге job_<уникальный id>
+внутри общего корня: одинаковые имена файлов (result.csv,
+transactions_<pdf_type>_temp.csv, ...) у параллельных заданий больше не
+пересекаются. Каталог удаляется по выходе из job() при любом исходе, а
+периодический janitor удаляет каталоги, оставшиеся после аварийного
+завершения процесса.
+"""
+import asyncio
+import logging
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+JOB_PREFIX = 'job_'
+
+
+class WorkspaceManager:
+    """
+    Args:
+        root: корень рабочих каталогов.
+        max_age_hours: каталоги старше этого возраста janitor считает брошенными.
+        janitor_interval_minutes: период проверки.
+    """
+
+    def __init__(self, root: str | Path, max_age_hours: float = 6, janitor_interval_minutes: float = 30):
+        self.root = Path(root)
+        self.max_age_seconds = max_age_hours * 3600
+        self.janitor_interval_seconds = janitor_interval_minutes * 60
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings: dict | None) -> 'WorkspaceManager':
+        """Создаёт менеджер по секции workspaces из settings.yaml."""
+        settings = settings or {}
+        root = settings.get('directory') or Path(tempfile.gettempdir()) / 'eat_tg_bot_jobs'
+        return cls(root, settings.get('max_age_hours', 6), settings.get('janitor_interval_minutes', 30))
+
+    @contextmanager
+    def job(self):
+        """Создаёт уникальный каталог задания и удаляет его по выходе из блока."""
+        path = tempfile.mkdtemp(prefix=JOB_PREFIX, dir=self.root)
+        logger.debug("Создан рабочий каталог %s", path)
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.debug("Удалён рабочий каталог %s", path)
+
+    def cleanup_orphaned(self) -> int:
+        """Удаляет брошенные каталоги заданий старше max_age_hours, возвращает их число."""
+        deadline = time.time() - self.max_age_seconds
+        removed = 0
+        for path in self.root.glob(f"{JOB_PREFIX}*"):
+            try:
+                if not path.is_dir() or path.stat().st_mtime > deadline:
+                    continue
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info("Удалено брошенных рабочих каталогов: %d", removed)
+        return removed
+
+    async def run_janitor(self) -> None:
+        """Периодически удаляет брошенные каталоги (первый проход — сразу при запуске)."""
+        while True:
+            try:
+                await asyncio.to_thread(self.cleanup_orphaned)
+            except Exception as e:
+                logger.error(f"Ошибка очистки рабочих каталогов: {e}", exc_info=True)
+            await asyncio.sleep(self.janitor_interval_seconds)
@@ -0,0 +1,76 @@
+"""
+Масштабирование постраничного чтения camelot по числу процессов.
+
+Читает выписку последовательно (pages="all") и с page_workers = 2, 4, ...
+до числа ядер, проверяет, что результат совпадает, и печатает время и
+ускорение. Без --pdf создаётся синтетическая многостраничная таблица.
+
+    python -m scripts.bench_camelot_pages --pdf statement.pdf
+    python -m scripts.bench_camelot_pages --pages 40
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import fitz  # PyMuPDF
+from extract_transactions_pdf1 import sub_process_pdf_Not_Sber
+
+logger = logging.getLogger(__name__)
+
+
+def make_synthetic_pdf(path: str, pages: int, rows_per_page: int = 40) -> None:
+    """Создаёт PDF с таблицей операций из четырёх колонок на каждой странице."""
+    document = fitz.open()
+    for page_num in range(pages):
+        page = document.new_page()
+        for row in range(rows_per_page):
+            y = 60 + row * 18
+            n = page_num * rows_per_page + row
+            cells = (f"{1 + n % 28:02d}.01.2024", f"Operation {n}", f"{(n * 37) % 10000}.00", f"{n % 9000:04d}")
+            for x, text in zip((40, 130, 380, 480), cells):
+                page.insert_text((x, y), text, fontsize=9)
+    document.save(path)
+    document.close()
+
+
+def measure(pdf_path: str, page_workers: int):
+    started = time.perf_counter()
+    df = sub_process_pdf_Not_Sber(pdf_path, page_workers)
+    return df, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdf', help='выписка для замера (по умолчанию синтетическая)')
+    parser.add_argument('--pages', type=int, default=40, help='страниц в синтетическом PDF')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help='наибольшее число процессов')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+    logging.getLogger("camelot").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = args.pdf
+        if not pdf_path:
+            pdf_path = os.path.join(tmp_dir, 'synthetic.pdf')
+            make_synthetic_pdf(pdf_path, args.pages)
+            logger.info("Создан синтетический PDF: %d страниц", args.pages)
+
+        baseline, baseline_seconds = measure(pdf_path, 1)
+        print(f"{1:>3} процесс(ов): {baseline_seconds:.2f} с, {len(baseline)} строк")
+
+        workers = 2
+        while workers <= args.max_workers:
+            df, seconds = measure(pdf_path, workers)
+            same = df.equals(baseline) and list(df.index) == list(baseline.index)
+            print(
+                f"{workers:>3} процесс(ов): {seconds:.2f} с, ускорение x{baseline_seconds / seconds:.2f}, "
+                f"результат {'совпадает' if same else 'ОТЛИЧАЕТСЯ'}"
+            )
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
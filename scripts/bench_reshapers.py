@@ -0,0 +1,99 @@
+"""
+Сравнение скорости преобразователей extract_transactions_pdf2 с исходными
+построчными реализациями (scripts/legacy_reshapers.py).
+
+Для каждого типа и каждого размера из --operations строится синтетическая
+выписка в формате extract_frame; печатается время обеих реализаций, ускорение
+и совпадение результата. Несколько размеров показывают, как время растёт с
+длиной выписки (8000 операций — примерно годовая выписка по активной карте).
+
+    python -m scripts.bench_reshapers --operations 500 2000 8000
+"""
+import argparse
+import random
+import time
+import numpy as np
+import pandas as pd
+from extract_transactions_pdf2 import reshape_tinkoff_platinum, reshape_visa_gold_aeroflot, reshape_Yandex
+from scripts.legacy_reshapers import (
+    legacy_reshape_tinkoff_platinum,
+    legacy_reshape_visa_gold_aeroflot,
+    legacy_reshape_Yandex,
+)
+
+
+def tinkoff_platinum_frame(operations: int, seed: int = 0) -> pd.DataFrame:
+    """Сырые строки Tinkoff Platinum: дата, строка времени, 0–2 строки продолжения описания."""
+    rng = random.Random(seed)
+    rows = [['Дата и время операции', 'Сумма в валюте карты', 'Описание операции', 'Номер карты']]
+    for n in range(operations):
+        rows.append([f"{1 + n % 28:02d}.01.2024", f"-{rng.randint(1, 99999)},00 ₽", f"Оплата {n}", "2578"])
+        rows.append([f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}", np.nan, "в магазине", np.nan])
+        for _ in range(rng.randint(0, 2)):
+            rows.append([np.nan, np.nan, f"г. Москва {n}", np.nan])
+    return pd.DataFrame(rows, columns=['0', '1', '2', '3'])
+
+
+def visa_gold_aeroflot_frame(operations: int, seed: int = 0) -> pd.DataFrame:
+    """Столбец text Visa Gold Aeroflot: дата, время, пять полей записи, 0–2 строки продолжения."""
+    rng = random.Random(seed)
+    texts = ['Выписка по счёту']
+    for n in range(operations):
+        day = f"{1 + n % 28:02d}.01.2024"
+        texts += [day, f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}", f"Оплата {n}",
+                  f"-{rng.randint(1, 99999)},00", f"{rng.randint(1, 999999)},00", day, f"{rng.randint(0, 999999):06d}"]
+        texts += [f"г. Москва {n}"] * rng.randint(0, 2)
+    return pd.DataFrame({'text': texts})
+
+
+def yandex_frame(operations: int, seed: int = 0) -> pd.DataFrame:
+    """Столбец text Yandex: 1–2 строки описания, дата, "в ЧЧ:ММ", дата обработки, две суммы."""
+    rng = random.Random(seed)
+    texts = []
+    for n in range(operations):
+        day = f"{1 + n % 28:02d}.01.2024"
+        amount = f"-{rng.randint(1, 99999)},00 ₽"
+        texts += [f"Оплата {n}"] + ["в магазине"] * rng.randint(0, 1)
+        texts += [day, f"в {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}", day, amount, amount]
+    return pd.DataFrame({'text': texts})
+
+
+# тип -> (построитель выписки, новая реализация, исходная реализация)
+BENCHMARKS = {
+    'Tinkoff_Platinum': (tinkoff_platinum_frame, reshape_tinkoff_platinum, legacy_reshape_tinkoff_platinum),
+    'Visa_Gold_Aeroflot': (visa_gold_aeroflot_frame, reshape_visa_gold_aeroflot, legacy_reshape_visa_gold_aeroflot),
+    'Yandex': (yandex_frame, reshape_Yandex, legacy_reshape_Yandex),
+}
+
+
+def timed(func, df: pd.DataFrame, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(df.copy())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, nargs='+', default=[2000], help='операций в синтетической выписке (можно несколько)')
+    parser.add_argument('--repeat', type=int, default=3, help='повторов (берётся лучшее время)')
+    args = parser.parse_args()
+
+    for pdf_type, (build, reshaper, legacy) in BENCHMARKS.items():
+        for operations in args.operations:
+            df = build(operations)
+            new_result, new_seconds = timed(reshaper, df, args.repeat)
+            old_result, old_seconds = timed(legacy, df, args.repeat)
+            same = new_result.equals(old_result)
+            print(
+                f"{pdf_type}: {len(df)} строк -> {len(new_result)} операций; "
+                f"было {old_seconds:.3f} с, стало {new_seconds:.4f} с, ускорение x{old_seconds / new_seconds:.0f}, "
+                f"результат {'совпадает' if same else 'ОТЛИЧАЕТСЯ'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
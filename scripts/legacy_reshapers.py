@@ -0,0 +1,206 @@
+"""
+Исходные построчные реализации преобразователей extract_transactions_pdf2
+и обрезки строк trim_text_rows из extract_transactions_pdf1.
+
+Эталон для тестов эквивалентности и для scripts/bench_reshapers.py: новые
+реализации должны давать в точности тот же результат.
+"""
+import re
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_reshape_tinkoff_platinum(df: pd.DataFrame) -> pd.DataFrame:
+    """Исходная построчная реализация reshape_tinkoff_platinum (эталон для сравнения)"""
+    result = []
+    i = 0
+    
+    while i < len(df):
+        current_row = df.iloc[i]
+
+        if isinstance(current_row[0], str) and re.match(r"\d{2}\.\d{2}\.\d{4}", current_row[0]):
+            try:
+                date = current_row[0]
+                amount = current_row[1]
+                initial_description = str(current_row[2]) if pd.notna(current_row[2]) else ""
+                card_number = current_row[3]
+
+                time_row = df.iloc[i+1] if i+1 < len(df) else None
+                time = time_row[0] if time_row is not None and pd.notna(time_row[0]) else ""
+
+                description_parts = [initial_description]
+                if time_row is not None and pd.notna(time_row[2]):
+                    description_parts.append(str(time_row[2]))
+
+                j = i + 2
+                while j < len(df) and (pd.isna(df.iloc[j][0]) or df.iloc[j][0] == ''):
+                    if pd.notna(df.iloc[j][2]):
+                        description_parts.append(str(df.iloc[j][2]))
+                    j += 1
+
+                full_description = ' '.join(filter(None, description_parts)).strip()
+                datetime = f"{date} {time}" if time else date
+
+                result.append([
+                    datetime,
+                    amount,
+                    full_description,
+                    card_number
+                ])
+
+                i = j
+            except Exception as e:
+                logger.error(f"Ошибка обработки строки {i}: {str(e)}")
+                i += 1
+        else:
+            i += 1
+
+    return pd.DataFrame(result, columns=[
+        "Дата и время операции",
+        "Сумма операции в валюте карты",
+        "Описание операции",
+        "Номер карты"
+    ])
+
+
+def legacy_reshape_visa_gold_aeroflot(df: pd.DataFrame) -> pd.DataFrame:
+    """Исходная реализация reshape_visa_gold_aeroflot с pd.concat на каждую операцию (эталон для сравнения)"""
+    new_df = pd.DataFrame(columns=[
+        'Дата и время операции', 
+        'Сумма операции в валюте карты',
+        'Описание операции', 
+        'Номер карты'
+    ])
+
+    i = 0
+    n = len(df)
+    
+    while i < n:
+        try:
+            if re.match(r'\d{2}\.\d{2}\.\d{4}', df.iloc[i]['text'].strip()):
+                date = df.iloc[i]['text'].strip()
+                i += 1
+                
+                if i < n and re.match(r'\d{2}:\d{2}', df.iloc[i]['text'].strip()):
+                    time = df.iloc[i]['text'].strip()
+                    i += 1
+                    
+                    new_row = {
+                        'Дата и время операции': f"{date} {time}",
+                        # 'Сумма операции в валюте карты': df.iloc[i+2]['text'].strip() if i+2 < n else '',
+                        'Сумма операции в валюте карты': df.iloc[i+1]['text'].strip() if i+2 < n else '',
+                        'Описание операции': " ".join(filter(None, [
+                            df.iloc[i]['text'].strip() + ":" if i < n else ''
+                        ])),
+                        'Номер карты': "".join(filter(None, [
+                            "Остаток: " + df.iloc[i+2]['text'].strip() if i+2 < n else '',
+                            " ₽, дата списания: " + df.iloc[i+3]['text'].strip() if i+3 < n else '',
+                            ", код авторизации: " + df.iloc[i+4]['text'].strip() if i+4 < n else ''
+                        ]))
+                    }
+                    
+                    new_df = pd.concat([new_df, pd.DataFrame([new_row])], ignore_index=True)
+                    i += 5
+                    
+                    while i < n and not re.match(r'\d{2}\.\d{2}\.\d{4}', df.iloc[i]['text'].strip()):
+                        new_df.at[new_df.index[-1], 'Описание операции'] += " " + df.iloc[i]['text'].strip()
+                        i += 1
+                else:
+                    i += 1
+            else:
+                i += 1
+        except Exception as e:
+            logger.error(f"Ошибка обработки строки {i}: {str(e)}")
+            i += 1
+
+    return new_df
+
+
+def legacy_reshape_Yandex(df: pd.DataFrame) -> pd.DataFrame:
+    """Исходная реализация reshape_Yandex с pd.concat на каждую операцию (эталон для сравнения)"""
+    new_df = pd.DataFrame(columns=[
+        'Дата и время операции', 
+        'Сумма операции в валюте карты',
+        'Описание операции', 
+        'Номер карты'
+    ])
+
+    i = 0
+    n = len(df)
+    
+    while i < n:
+        try:
+            # Сбор описания операции (может занимать несколько строк перед датой)
+            description_parts = []
+            while i < n and not re.match(r'\d{2}\.\d{2}\.\d{4}', df.iloc[i]['text'].strip()):
+                description_parts.append(df.iloc[i]['text'].strip())
+                i += 1
+
+            if i >= n:
+                break
+
+            # Обработка даты и времени
+            date = df.iloc[i]['text'].strip()
+            i += 1
+            
+            if i < n and re.match(r'в \d{2}:\d{2}', df.iloc[i]['text'].strip()):
+                time = re.match(r'в (\d{2}:\d{2})', df.iloc[i]['text'].strip()).group(1)
+                i += 1
+            else:
+                time = "00:00"
+
+            # Пропуск даты обработки и суммы в валюте операции
+            i += 2  # дата обработки и сумма в валюте операции
+
+            # Получение суммы в валюте карты
+            amount = df.iloc[i]['text'].strip() if i < n else ''
+            i += 1
+
+            # Формирование строки
+            new_row = {
+                'Дата и время операции': f"{date} {time}",
+                'Сумма операции в валюте карты': amount,
+                'Описание операции': ' '.join(description_parts).strip(),
+                'Номер карты': "Карта Пэй"
+            }
+            
+            new_df = pd.concat([new_df, pd.DataFrame([new_row])], ignore_index=True)
+
+        except Exception as e:
+            logger.error(f"Ошибка обработки строки {i}: {str(e)}")
+            i += 1
+
+    return new_df
+
+
+def legacy_trim_text_rows(df: pd.DataFrame, remove_texts: list, start_marker: str | None, end_marker: str | None, regex: bool) -> pd.DataFrame:
+    """Исходная реализация trim_text_rows: отдельный str.contains на каждый паттерн и маркер"""
+    # Создаем временный столбец для пометки строк к удалению
+    df['to_delete'] = False
+
+    # 1. Удаление строк по текстовым паттернам из конфига
+    for pattern in remove_texts:
+        df.loc[df['text'].str.contains(pattern, regex=regex, na=False), 'to_delete'] = True
+
+    # 2. Удаление строк до start_marker (включительно)
+    if start_marker:
+        start_mask = df['text'].str.contains(start_marker, regex=False, na=False)
+        if start_mask.any():
+            start_idx = start_mask.idxmax()
+            df.loc[:start_idx, 'to_delete'] = True
+
+    # 3. Удаление строк после end_marker (включительно)
+    if end_marker:
+        end_mask = df['text'].str.contains(end_marker, regex=False, na=False)
+        if end_mask.any():
+            end_idx = end_mask.idxmax()
+            df.loc[end_idx:, 'to_delete'] = True
+
+    # 4. Применение удаления и очистка
+    df = df[~df['to_delete']].copy()
+    df = df.drop(columns=['to_delete'])
+    df = df.reset_index(drop=True)
+
+    return df
@@ -8,4 +8,10 @@ CREATE INDEX IF NOT EXISTS idx_transactions_import_id ON transactions(import_id)
 CREATE INDEX IF NOT EXISTS idx_transactions_user_type_date ON transactions(user_id, pdf_type, transaction_date DESC);
 -- Составной индекс для ускорения запросов get_transactions с фильтрацией по пользователю и дате
 CREATE INDEX IF NOT EXISTS idx_transactions_user_date_desc ON transactions(user_id, transaction_date DESC);
-CREATE INDEX IF NOT EXISTS trgm_idx_transactions_description ON transactions USING gin (description gin_trgm_ops);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS trgm_idx_transactions_description ON transactions USING gin (description gin_trgm_ops);
+-- Выражение совпадает с проверкой дубликатов в save_transactions (date_trunc до минуты)
+CREATE INDEX IF NOT EXISTS idx_transactions_dup_check ON transactions(user_id, date_trunc('minute', transaction_date), cash_source, amount);
+-- Порядок последних импортов пользователя (pdf_type берётся из transactions по idx_transactions_import_id)
+CREATE INDEX IF NOT EXISTS idx_imports_user_import ON imports(user_id, import_id DESC);
+-- Проверка повторной отправки выписки по SHA-256 файла
+CREATE INDEX IF NOT EXISTS idx_imports_user_file_hash ON imports(user_id, file_hash);
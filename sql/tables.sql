@@ -46,4 +46,29 @@ CREATE TABLE IF NOT EXISTS edit_templates (
     name VARCHAR(100) NOT NULL,
     fields_json JSONB NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- Метаданные импортов: одна строка на вызов save_transactions. pdf_type, row_count
+-- и min/max даты — снимок на момент импорта, редактирование транзакций их не меняет
+CREATE TABLE IF NOT EXISTS imports (
+    import_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    pdf_type VARCHAR(50),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    row_count INTEGER NOT NULL DEFAULT 0,  -- сколько новых строк сохранено
+    min_date TIMESTAMP,                    -- диапазон transaction_date сохранённых строк
+    max_date TIMESTAMP,
+    file_hash VARCHAR(64)                  -- SHA-256 исходного PDF
+);
+
+-- Однократное заполнение imports по уже загруженным транзакциям: выполняется,
+-- только пока imports пуста (проверка без условий по строкам — разовый фильтр,
+-- при заполненной imports transactions не читается)
+INSERT INTO imports (import_id, user_id, pdf_type, created_at, row_count, min_date, max_date)
+SELECT import_id, MIN(user_id), MIN(pdf_type), COALESCE(MIN(created_at), MIN(transaction_date)),
+       COUNT(*), MIN(transaction_date), MAX(transaction_date)
+FROM transactions
+WHERE import_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM imports)
+GROUP BY import_id
+ON CONFLICT (import_id) DO NOTHING;
@@ -0,0 +1,90 @@
+"""Автотест дискового кеша результатов извлечения PDF"""
+"""Запуск: pytest tests/test_cache.py"""
+
+import os
+import pandas as pd
+import pytest
+import pdf_processing.cache as cache_module
+from pdf_processing.cache import ExtractionCache, code_version
+
+HASH = 'a' * 64
+
+
+def entry(value=1):
+    frame = pd.DataFrame({'text': [f'строка {value}'] * 20})
+    return {'raw': frame, 'processed': frame.copy()}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(tmp_path / 'cache')
+
+
+def entries(cache):
+    return sorted(cache.directory.glob(f"*{ExtractionCache.SUFFIX}"))
+
+
+def test_round_trip(cache):
+    cache.put(HASH, 'Bank', entry())
+    cached = cache.get(HASH, 'Bank')
+    pd.testing.assert_frame_equal(cached['processed'], entry()['processed'])
+    assert cache.get('b' * 64, 'Bank') is None
+
+
+def test_key_includes_pdf_type(cache):
+    cache.put(HASH, 'Bank', entry())
+    assert cache.get(HASH, 'Other') is None
+
+
+@pytest.mark.parametrize('version_function', ['patterns_version', 'code_version'])
+def test_key_includes_versions(cache, monkeypatch, version_function):
+    monkeypatch.setattr(cache_module, version_function, lambda: 'old')
+    cache.put(HASH, 'Bank', entry())
+    assert cache.get(HASH, 'Bank') is not None
+
+    monkeypatch.setattr(cache_module, version_function, lambda: 'new')
+    assert cache.get(HASH, 'Bank') is None
+
+
+def test_code_version_follows_sources(tmp_path):
+    source = tmp_path / 'module.py'
+    source.write_text("X = 1\n")
+    before = code_version((source,))
+    source.write_text("X = 2\n")
+    code_version.cache_clear()
+    assert code_version((source,)) != before
+
+
+@pytest.mark.parametrize('damage', ['garbage', 'truncated'])
+def test_damaged_entry_is_removed(cache, damage):
+    cache.put(HASH, 'Bank', entry())
+    [path] = entries(cache)
+    if damage == 'garbage':
+        path.write_bytes(b'not a gzip file')
+    else:
+        path.write_bytes(path.read_bytes()[:len(path.read_bytes()) // 2])
+
+    assert cache.get(HASH, 'Bank') is None
+    assert not path.exists()
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for number, pdf_type in enumerate(('A', 'B', 'C')):
+        cache.put(HASH, pdf_type, entry(number))
+    paths = {pdf_type: cache._path(HASH, pdf_type) for pdf_type in ('A', 'B', 'C')}
+    for age, pdf_type in enumerate(('A', 'B', 'C')):
+        os.utime(paths[pdf_type], (1_000_000 + age, 1_000_000 + age))
+
+    cache.get(HASH, 'A')  # A становится самой свежей записью, B — самой давней
+    total = sum(path.stat().st_size for path in paths.values())
+    cache.max_size_bytes = total - 1
+    cache._evict()
+
+    assert not paths['B'].exists()
+    assert paths['A'].exists() and paths['C'].exists()
+
+
+def test_put_evicts_over_limit(tmp_path):
+    cache = ExtractionCache(tmp_path / 'cache', max_size_mb=0)
+    cache.put(HASH, 'Bank', entry())
+    assert entries(cache) == []
@@ -0,0 +1,73 @@
+"""Автотест завершения транзакции DBConnection.cursor"""
+"""Запуск: pytest tests/test_db_cursor.py"""
+
+import pytest
+from db.base import DBConnection
+
+
+class FakeCursor:
+    def __init__(self, calls):
+        self.calls = calls
+        self.rows = [(1,)] * 5
+
+    def execute(self, query, params=None):
+        self.calls.append('execute')
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        self.calls.append('close')
+
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def cursor(self, name=None, cursor_factory=None):
+        return FakeCursor(self.calls)
+
+    def commit(self):
+        self.calls.append('commit')
+
+    def rollback(self):
+        self.calls.append('rollback')
+
+
+def make_db():
+    db = DBConnection.__new__(DBConnection)
+    db.conn = FakeConnection()
+    return db
+
+
+def test_commit_on_success():
+    db = make_db()
+    with db.cursor() as cur:
+        cur.execute("SELECT 1")
+    assert 'commit' in db.conn.calls and 'rollback' not in db.conn.calls
+
+
+def test_rollback_on_error():
+    db = make_db()
+    with pytest.raises(ValueError):
+        with db.cursor():
+            raise ValueError
+    assert 'rollback' in db.conn.calls and 'commit' not in db.conn.calls
+
+
+def test_rollback_when_generator_is_closed_early():
+    db = make_db()
+
+    def stream():
+        with db.cursor(name='stream') as cur:
+            cur.execute("SELECT id FROM transactions")
+            while rows := cur.fetchmany(2):
+                yield rows
+
+    chunks = stream()
+    next(chunks)
+    chunks.close()
+    assert db.conn.calls[-2:] == ['rollback', 'close'] and 'commit' not in db.conn.calls
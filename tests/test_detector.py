@@ -0,0 +1,87 @@
+"""Автотест определения pdf_type"""
+"""Запуск: pytest tests/test_detector.py"""
+
+import os
+import yaml
+from pdf_processing.detector import PdfTypeDetector
+
+
+def write_config(path, pdf_types):
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump({'pdf_types': pdf_types}, f, allow_unicode=True)
+
+
+def test_first_type_in_config_order_wins_and_ambiguity_is_reported(tmp_path):
+    config_path = tmp_path / 'pdf_patterns.yaml'
+    write_config(config_path, {
+        'A': {'patterns': ['договор: \\s*111']},
+        'B': {'patterns': ['[', 'Аэрофлот']},  # некорректный паттерн пропускается
+    })
+    result = PdfTypeDetector(config_path).detect_text("Кредитная АЭРОФЛОТ, Договор: 111")
+    assert result['pdf_type'] == 'A'
+    assert list(result['matches']) == ['A', 'B']
+
+
+def test_detector_rebuilds_after_config_change(tmp_path):
+    config_path = tmp_path / 'pdf_patterns.yaml'
+    write_config(config_path, {'A': {'patterns': ['old']}})
+    detector = PdfTypeDetector(config_path)
+    assert detector.detect_text('new')['pdf_type'] is None
+
+    write_config(config_path, {'A': {'patterns': ['new']}})
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert detector.detect_text('new')['pdf_type'] == 'A'
+
+
+def test_fingerprint_tiers_checked_before_text(tmp_path):
+    import fitz
+    from pdf_processing.document import PdfDocument
+
+    pdf = fitz.open()
+    pdf.new_page().insert_text((40, 40), "Bank B statement")
+    pdf.set_metadata({'producer': 'BankA Reports 2.1'})
+    data = pdf.tobytes()
+
+    config_path = tmp_path / 'pdf_patterns.yaml'
+    write_config(config_path, {
+        'A': {'patterns': ['nothing'], 'fingerprints': {'metadata': {'producer': 'banka reports'}}},
+        'B': {'patterns': ['Bank B']},
+    })
+    detector = PdfTypeDetector(config_path)
+    with PdfDocument(data=data) as document:
+        result = detector.detect(document)
+    assert (result['pdf_type'], result['tier']) == ('A', 'metadata')
+
+    write_config(config_path, {
+        'A': {'patterns': ['nothing'], 'fingerprints': {'metadata': {'producer': 'other'}}},
+        'B': {'patterns': ['Bank B']},
+    })
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    with PdfDocument(data=data) as document:
+        result = detector.detect(document)
+    assert (result['pdf_type'], result['tier']) == ('B', 'text')
+    assert detector.tier_hits == {'metadata': 1, 'text': 1}
+
+
+def test_overlapping_patterns_of_different_types(tmp_path):
+    # Совпадение B начинается раньше и перекрывает совпадение A — выбрать нужно A (первый в конфигурации)
+    config_path = tmp_path / 'pdf_patterns.yaml'
+    write_config(config_path, {'A': {'patterns': ['Tinkoff Platinum']}, 'B': {'patterns': ['Банк Tinkoff']}})
+    result = PdfTypeDetector(config_path).detect_text("Банк Tinkoff Platinum")
+    assert result['pdf_type'] == 'A'
+    assert list(result['matches']) == ['A', 'B']
+
+
+def test_patterns_that_cannot_be_joined_are_checked_separately(tmp_path):
+    config_path = tmp_path / 'pdf_patterns.yaml'
+    write_config(config_path, {
+        'A': {'patterns': ['(\\d)-\\1']},  # нумерованная обратная ссылка
+        'B': {'patterns': ['(?i)y']},  # глобальный флаг в общем выражении не в начале
+        'C': {'patterns': ['(?P<num>42)']},
+        'D': {'patterns': ['счёт']},
+    })
+    detector = PdfTypeDetector(config_path)
+    assert list(detector.detect_text("7-7 счёт 42 Y")['matches']) == ['A', 'B', 'C', 'D']
+    assert detector.detect_text("7-8")['pdf_type'] is None
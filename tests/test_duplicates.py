@@ -0,0 +1,77 @@
+"""Автотест обновления дубликатов выписки"""
+"""Запуск: pytest tests/test_duplicates.py"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import db.async_transactions as repo
+from db.transactions import build_duplicates_list
+
+DATE = datetime(2024, 2, 1, 12, 30, 45)
+
+
+class FakeConnection:
+    def __init__(self, found_id):
+        self.found_id = found_id
+        self.lookups = []
+
+    async def fetchval(self, query, *args):
+        self.lookups.append((query, args))
+        return self.found_id
+
+
+def patch_repo(monkeypatch, found_id=7):
+    conn = FakeConnection(found_id)
+    updates = []
+
+    @asynccontextmanager
+    async def acquire():
+        yield conn
+
+    async def update_transactions(user_id, ids, updates_, filters=None):
+        updates.append((user_id, ids, updates_))
+        return ids
+
+    monkeypatch.setattr(repo, 'acquire', acquire)
+    monkeypatch.setattr(repo, 'update_transactions', update_transactions)
+    return conn, updates
+
+
+def test_duplicates_list_carries_category():
+    df = pd.DataFrame({
+        'дата': [DATE, DATE], 'сумма': [1, 2], 'наличность': ['Карта', 'Карта'],
+        'категория': ['Кафе', np.nan],
+    })
+    assert [row['категория'] for row in build_duplicates_list(df)] == ['Кафе', None]
+
+
+def test_update_duplicates_sets_category_of_own_transaction(monkeypatch):
+    conn, updates = patch_repo(monkeypatch)
+    duplicates = [{'дата': DATE, 'сумма': 100, 'наличность': 'Карта', 'категория': 'Кафе'}]
+
+    assert asyncio.run(repo.update_duplicates(42, duplicates)) == 1
+    assert updates == [(42, [7], {'category': ('Кафе', 'replace')})]
+    query, args = conn.lookups[0]
+    assert 'user_id = $1' in query and "date_trunc('minute', transaction_date)" in query
+    assert args[0] == 42
+
+
+def test_update_duplicates_skips_rows_without_category(monkeypatch):
+    conn, updates = patch_repo(monkeypatch)
+    duplicates = [
+        {'дата': DATE, 'сумма': 100, 'наличность': 'Карта', 'категория': None},
+        {'дата': DATE, 'сумма': 100, 'наличность': 'Карта'},
+    ]
+
+    assert asyncio.run(repo.update_duplicates(42, duplicates)) == 0
+    assert updates == [] and conn.lookups == []
+
+
+def test_update_duplicates_without_match(monkeypatch):
+    _, updates = patch_repo(monkeypatch, found_id=None)
+    duplicates = [{'дата': DATE, 'сумма': 100, 'наличность': 'Карта', 'категория': 'Кафе'}]
+
+    assert asyncio.run(repo.update_duplicates(42, duplicates)) == 0
+    assert updates == []
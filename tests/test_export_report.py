@@ -0,0 +1,47 @@
+"""Автотест удаления временного файла отчёта /export"""
+"""Запуск: pytest tests/test_export_report.py"""
+
+import asyncio
+import os
+from types import SimpleNamespace
+import pytest
+import handlers.export as export
+
+
+class FakeQuery:
+    def __init__(self):
+        self.from_user = SimpleNamespace(id=1)
+        self.messages = []
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, text, **kwargs):
+        self.messages.append(text)
+
+
+def run_report(monkeypatch, export_result):
+    paths = []
+
+    async def export_transactions_csv(output_path, **kwargs):
+        paths.append(output_path)
+        if isinstance(export_result, Exception):
+            raise export_result
+        return export_result
+
+    monkeypatch.setattr(export, 'export_transactions_csv', export_transactions_csv)
+    query = FakeQuery()
+    update = SimpleNamespace(callback_query=query)
+    context = SimpleNamespace(user_data={'export_filters': {'start_date': '01.01.2024', 'end_date': '31.01.2024'}})
+    asyncio.run(export.generate_report(update, context))
+    return paths[0], query.messages
+
+
+@pytest.mark.parametrize('export_result, message', [
+    (RuntimeError('соединение разорвано'), "❌ Ошибка при формировании отчета. Попробуйте позже"),
+    (0, "⚠ По вашему запросу ничего не найдено"),
+])
+def test_temp_file_is_removed(monkeypatch, export_result, message):
+    path, messages = run_report(monkeypatch, export_result)
+    assert messages == [message]
+    assert not os.path.exists(path)
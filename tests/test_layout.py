@@ -0,0 +1,113 @@
+"""Автотест декларативного разбора выписок по секции layout"""
+"""Запуск: pytest tests/test_layout.py"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from extract_transactions_pdf2 import TRANSACTION_COLUMNS, reshape_visa_gold_aeroflot, reshape_Yandex
+from pdf_processing.layout import compile_layout, layout_for
+from scripts.bench_reshapers import visa_gold_aeroflot_frame, yandex_frame
+
+DATE = "\\d{2}\\.\\d{2}\\.\\d{4}"
+
+VISA_LAYOUT = {
+    'record_start': DATE,
+    'fields': [
+        {'name': 'date'},
+        {'name': 'time', 'pattern': "\\d{2}:\\d{2}"},
+        {'name': 'description'},
+        {'name': 'amount'},
+        {'name': 'balance'},
+        {'name': 'debit_date'},
+        {'name': 'auth_code'},
+    ],
+    'continuation': 'after',
+    'output': dict(zip(TRANSACTION_COLUMNS, [
+        "{date} {time}",
+        "{amount}",
+        "{description}: {continuation}",
+        "Остаток: {balance} ₽, дата списания: {debit_date}, код авторизации: {auth_code}",
+    ])),
+}
+
+YANDEX_LAYOUT = {
+    'record_start': DATE,
+    'fields': [
+        {'name': 'date'},
+        {'name': 'time', 'pattern': "в (\\d{2}:\\d{2})", 'optional': True, 'default': "00:00"},
+        {'skip': 2},
+        {'name': 'amount'},
+    ],
+    'continuation': 'before',
+    'output': dict(zip(TRANSACTION_COLUMNS, ["{date} {time}", "{amount}", "{continuation}", "Карта Пэй"])),
+}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_visa_layout_matches_reshaper(seed):
+    df = visa_gold_aeroflot_frame(200, seed)
+    pd.testing.assert_frame_equal(compile_layout(VISA_LAYOUT).parse(df.copy()), reshape_visa_gold_aeroflot(df.copy()))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_yandex_layout_matches_reshaper(seed):
+    df = yandex_frame(200, seed)
+    pd.testing.assert_frame_equal(compile_layout(YANDEX_LAYOUT).parse(df.copy()), reshape_Yandex(df.copy()))
+
+
+def test_blank_lines_and_rejected_records():
+    df = pd.DataFrame({'text': [
+        'Шапка', '01.02.2024', ' 12:30 ', np.nan, 'Оплата', '', '-100,00',
+        '02.02.2024', 'нет времени', '03.02.2024', '09:00', 'Кешбэк', '+5,00', 'хвост',
+    ]})
+    layout = compile_layout({
+        'record_start': DATE,
+        'fields': [{'name': 'date'}, {'name': 'time', 'pattern': "\\d{2}:\\d{2}"}, {'name': 'what'}, {'name': 'amount'}],
+        'output': {'date': "{date} {time}", 'amount': "{amount}", 'what': "{what} {continuation}"},
+    })
+    assert layout.parse(df).values.tolist() == [
+        ['01.02.2024 12:30', '-100,00', 'Оплата 02.02.2024 нет времени'],
+        ['03.02.2024 09:00', '+5,00', 'Кешбэк хвост'],
+    ]
+
+
+def test_empty_result_has_output_columns():
+    layout = compile_layout(YANDEX_LAYOUT)
+    result = layout.parse(pd.DataFrame({'text': [np.nan, 'Итого']}))
+    assert list(result.columns) == TRANSACTION_COLUMNS and result.empty
+
+
+@pytest.mark.parametrize('spec', [
+    {'record_start': DATE, 'fields': [{'name': 'date'}], 'output': {'a': '{unknown}'}},
+    {'record_start': '(', 'fields': [{'name': 'date'}], 'output': {'a': '{date}'}},
+    {'record_start': DATE, 'fields': [{'pattern': DATE}], 'output': {'a': ''}},
+    {'record_start': DATE, 'fields': [{'name': 'date'}], 'output': {'a': '{date}'}, 'continuation': 'sideways'},
+    {'record_start': DATE, 'fields': [{'name': 'date'}], 'output': {'a': '{date}'}, 'columns': [0]},
+    {'fields': [{'name': 'date'}], 'output': {'a': '{date}'}},
+])
+def test_invalid_layout_is_rejected(spec):
+    with pytest.raises(ValueError):
+        compile_layout(spec)
+
+
+def test_layout_is_compiled_once():
+    assert compile_layout(YANDEX_LAYOUT) is compile_layout(dict(YANDEX_LAYOUT))
+
+
+def test_layout_for_reads_pdf_patterns(tmp_path):
+    config_path = tmp_path / 'pdf_patterns.yaml'
+    config_path.write_text(
+        "pdf_types:\n"
+        "  Bank:\n"
+        "    layout:\n"
+        "      record_start: '\\d{2}\\.\\d{2}\\.\\d{4}'\n"
+        "      fields: [{name: date}, {name: amount}]\n"
+        "      output: {date: '{date}', amount: '{amount}', description: '{continuation}'}\n"
+        "  Table:\n"
+        "    columns: [0]\n",
+        encoding='utf-8',
+    )
+    assert layout_for('Table', config_path) is None
+    assert layout_for(None, config_path) is None
+    result = layout_for('Bank', config_path).parse(pd.DataFrame({'text': ['01.02.2024', '-1,00', 'Кафе']}))
+    assert result.values.tolist() == [['01.02.2024', '-1,00', 'Кафе']]
@@ -0,0 +1,107 @@
+"""Автотест разбора сумм в копейки и дат в datetime64 (pdf_processing.normalize)"""
+"""Запуск: pytest tests/test_normalize.py"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+import pytest
+from classify_transactions_pdf import classify_frame, classify_transactions
+from db.transactions import INSERT_COLUMNS, build_transaction_rows, prepare_transactions_frame
+from pdf_processing.normalize import (
+    format_transactions,
+    kopecks_to_decimal,
+    kopecks_to_text,
+    normalize_transactions,
+    parse_amount,
+    parse_amounts,
+)
+
+
+@pytest.mark.parametrize('text, kopecks', [
+    ('-1 234,56 ₽', -123456),
+    ('+5,00 ₽', 500),
+    ('−100,00', -10000),
+    ('– 7,5', -750),
+    ('1\xa0052,45 ₽', 105245),
+    ('"52,45 ₽"', 5245),
+    ('1234.56', 123456),
+    ('100', 10000),
+    ('Оплата 12', None),
+    ('', None),
+    (np.nan, None),
+])
+def test_parse_amount(text, kopecks):
+    assert parse_amount(text) == kopecks
+
+
+def test_only_int64_columns_are_kopecks():
+    kopecks = pd.Series([150, None], dtype='Int64')
+    assert parse_amounts(kopecks).equals(kopecks)
+    # Числа любого другого типа — рубли, как и строки
+    assert parse_amounts(pd.Series([100, 250])).tolist() == [10000, 25000]
+    assert parse_amounts(pd.Series([1.5, np.nan])).tolist() == [150, pd.NA]
+    assert parse_amounts(pd.Series([100, None], dtype=object)).tolist() == [10000, pd.NA]
+
+
+def test_classify_csv_with_whole_ruble_amounts(tmp_path):
+    csv_path = tmp_path / 'transactions_processed_default.csv'
+    pd.DataFrame({
+        'Дата и время операции': ['01.02.2024 12:30', '03.02.2024 09:00'],
+        'Сумма операции в валюте карты': [100, 250],
+        'Описание операции': ['Оплата', 'Кешбэк'],
+        'Номер карты': [1111, 1111],
+    }).to_csv(csv_path, index=False)
+    result_path, _ = classify_transactions(str(csv_path))
+    result = pd.read_csv(result_path, sep=';', dtype=str)
+    assert result['Сумма'].tolist() == ['250,00', '100,00']
+
+
+def test_kopecks_round_trip():
+    kopecks = pd.Series([-123456, 5, 0, None], dtype='Int64')
+    assert kopecks_to_text(kopecks).tolist()[:3] == ['-1234,56', '0,05', '0,00']
+    assert pd.isna(kopecks_to_text(kopecks).iloc[3])
+    assert kopecks_to_decimal(kopecks).tolist() == [Decimal('-1234.56'), Decimal('0.05'), Decimal('0.00'), None]
+
+
+def test_normalize_is_idempotent():
+    df = pd.DataFrame({
+        'Дата и время операции': ['01.02.2024 12:30', 'не дата'],
+        'Сумма операции в валюте карты': ['-1,00 ₽', '+2,50 ₽'],
+    })
+    normalized = normalize_transactions(df)
+    assert normalized['Дата и время операции'].dtype == 'datetime64[ns]'
+    assert normalized['Сумма операции в валюте карты'].tolist() == [-100, 250]
+    pd.testing.assert_frame_equal(normalize_transactions(normalized), normalized)
+    assert format_transactions(normalized)['Сумма операции в валюте карты'].tolist() == ['-1,00', '2,50']
+
+
+def test_typed_columns_reach_saving():
+    df = normalize_transactions(pd.DataFrame({
+        'Дата и время операции': ['01.02.2024 12:30', '03.02.2024 09:00'],
+        'Сумма операции в валюте карты': ['-1 234,56 ₽', '+5,00 ₽'],
+        'Описание операции': ['Оплата', 'Кешбэк'],
+        'Номер карты': ['1111', '1111'],
+    }))
+    result, _ = classify_frame(df, 'default', {})
+    assert result['Дата'].dtype == 'datetime64[ns]'
+    assert result['Сумма'].tolist() == [500, 123456]  # по убыванию даты, без знака
+
+    prepared = prepare_transactions_frame(result)
+    assert prepared['сумма'].tolist() == [Decimal('1234.56'), Decimal('5.00')]
+    assert format_transactions(result)['Дата'].tolist() == ['03.02.2024 09:00', '01.02.2024 12:30']
+
+
+def test_each_saved_row_gets_its_own_created_at(monkeypatch):
+    class Clock(datetime):
+        ticks = 0
+
+        @classmethod
+        def now(cls, tz=None):
+            cls.ticks += 1
+            return datetime(2024, 2, 1, tzinfo=tz) + timedelta(microseconds=cls.ticks)
+
+    monkeypatch.setattr('db.transactions.datetime', Clock)
+    df = prepare_transactions_frame(pd.DataFrame({'Дата': ['01.02.2024 12:30'] * 3, 'Сумма': ['1,00'] * 3}))
+    created = [row[INSERT_COLUMNS.index('created_at')] for row in build_transaction_rows(df, 1, 1, 'Bank')]
+    assert len(set(created)) == 3
@@ -0,0 +1,36 @@
+"""Автотест деления страниц на диапазоны для параллельного чтения camelot"""
+"""Запуск: pytest tests/test_page_ranges.py"""
+
+import pytest
+from extract_transactions_pdf1 import split_page_ranges
+
+
+def expand(ranges):
+    pages = []
+    for item in ranges:
+        start, _, end = item.partition('-')
+        pages.extend(range(int(start), int(end or start) + 1))
+    return pages
+
+
+@pytest.mark.parametrize('first, last, chunks, expected', [
+    (1, 3, 8, ['1', '2', '3']),           # страниц меньше, чем процессов
+    (1, 4, 4, ['1', '2', '3', '4']),      # поровну
+    (1, 10, 3, ['1-4', '5-7', '8-10']),   # не делится нацело: лишние страницы — первым
+    (1, 10, 2, ['1-5', '6-10']),
+    (3, 7, 1, ['3-7']),
+    (5, 5, 4, ['5']),
+    (2, 9, 0, ['2-9']),                   # некорректное число процессов — один диапазон
+])
+def test_split_page_ranges(first, last, chunks, expected):
+    assert split_page_ranges(first, last, chunks) == expected
+
+
+@pytest.mark.parametrize('page_count', range(1, 30))
+@pytest.mark.parametrize('chunks', [1, 2, 3, 4, 7, 16])
+def test_ranges_cover_pages_in_order(page_count, chunks):
+    ranges = split_page_ranges(2, page_count + 1, chunks)
+    assert expand(ranges) == list(range(2, page_count + 2))
+    assert len(ranges) == min(chunks, page_count)
+    sizes = [len(expand([item])) for item in ranges]
+    assert max(sizes) - min(sizes) <= 1
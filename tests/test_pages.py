@@ -0,0 +1,94 @@
+"""Автотест ленивого обхода страниц по start_marker / end_marker"""
+"""Запуск: pytest tests/test_pages.py"""
+
+import pytest
+from pdf_processing.pages import iter_marked_pages, marker_page_range
+
+START = 'Движение средств'
+END = 'Итого'
+
+
+class FakeDocument:
+    """Документ из текстов страниц; запоминает, какие страницы прочитаны."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.read = []
+
+    def __len__(self):
+        return len(self.pages)
+
+    def page_text(self, index):
+        self.read.append(index)
+        return self.pages[index]
+
+
+def make_pages(count, start_page=None, end_page=None):
+    pages = []
+    for index in range(count):
+        lines = [f'строка {index}.{line}' for line in range(3)]
+        if index == start_page:
+            lines.insert(1, START)
+        if index == end_page:
+            lines.insert(2, END)
+        pages.append('\n'.join(lines))
+    return pages
+
+
+def handler_rows(texts):
+    """Как обработчики типов: строки от первого start_marker до первого end_marker."""
+    lines = '\n'.join(texts).split('\n')
+    start = next((i for i, line in enumerate(lines) if START in line), 0)
+    end = next((i for i, line in enumerate(lines) if END in line), len(lines))
+    return lines[start:end]
+
+
+CASES = {
+    'start_on_first_page': (6, 0, None),
+    'start_on_last_page': (6, 5, None),
+    'end_on_first_page': (6, None, 0),
+    'end_on_last_page': (6, None, 5),
+    'start_first_end_last': (6, 0, 5),
+    'both_on_first_page': (6, 0, 0),
+    'both_on_last_page': (6, 5, 5),
+    'start_and_end_in_middle': (6, 2, 3),
+    'end_before_start': (6, 4, 1),
+    'no_markers': (6, None, None),
+}
+
+
+@pytest.mark.parametrize('count, start_page, end_page', CASES.values(), ids=CASES.keys())
+def test_lazy_pages_give_same_rows_as_eager_scan(count, start_page, end_page):
+    pages = make_pages(count, start_page, end_page)
+    lazy = [text for _, text in iter_marked_pages(FakeDocument(pages), START, END)]
+    assert handler_rows(lazy) == handler_rows(pages)
+
+
+@pytest.mark.parametrize('count, start_page, end_page', CASES.values(), ids=CASES.keys())
+def test_pages_are_yielded_in_order_without_repeats(count, start_page, end_page):
+    indexes = [index for index, _ in iter_marked_pages(FakeDocument(make_pages(count, start_page, end_page)), START, END)]
+    assert indexes == sorted(set(indexes))
+
+
+def test_pages_after_end_marker_are_not_read():
+    document = FakeDocument(make_pages(6, start_page=0, end_page=1))
+    assert [index for index, _ in iter_marked_pages(document, START, END)] == [0, 1]
+    assert document.read == [0, 1]
+
+
+def test_without_markers_all_pages_are_read():
+    document = FakeDocument(make_pages(4))
+    assert [index for index, _ in iter_marked_pages(document)] == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize('start_page, end_page, expected', [
+    (0, None, (1, 6)),
+    (5, None, (6, 6)),
+    (None, 0, (1, 6)),
+    (0, 0, (1, 1)),
+    (None, 5, (1, 6)),
+    (2, 3, (3, 4)),
+    (None, None, (1, 6)),
+])
+def test_marker_page_range(start_page, end_page, expected):
+    assert marker_page_range(FakeDocument(make_pages(6, start_page, end_page)), START, END) == expected
@@ -0,0 +1,111 @@
+"""Автотест эквивалентности преобразователей extract_transactions_pdf2 исходным реализациям"""
+"""Запуск: pytest tests/test_reshapers.py"""
+
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from extract_transactions_pdf2 import reshape_tinkoff_platinum, reshape_visa_gold_aeroflot, reshape_Yandex
+from scripts.legacy_reshapers import (
+    legacy_reshape_tinkoff_platinum,
+    legacy_reshape_visa_gold_aeroflot,
+    legacy_reshape_Yandex,
+)
+
+TINKOFF_FIRST = ['01.02.2024', '12.12.2023 10:00', '12:30', '', np.nan, 'Итого', '05.05.2024']
+TINKOFF_OTHER = ['', np.nan, 'Оплата', ' кафе ', '-100,00 ₽', '2578']
+# Строки столбца text для Visa Gold Aeroflot и Yandex, включая пустые и NaN
+TEXT_VALUES = ['01.02.2024', ' 12.12.2023 ', '12:30', 'в 10:15', 'в 9:1', '', np.nan, 'Оплата', '1 000,00 ₽', 'Итого']
+
+
+def random_tinkoff_frame(seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = [
+        [rng.choice(TINKOFF_FIRST)] + [rng.choice(TINKOFF_OTHER) for _ in range(3)]
+        for _ in range(rng.randint(0, 15))
+    ]
+    # Имена столбцов как после чтения CSV ('0'...) или как у extract_frame (0...)
+    columns = ['0', '1', '2', '3'] if seed % 2 else [0, 1, 2, 3]
+    return pd.DataFrame(rows, columns=columns)
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_tinkoff_platinum_matches_legacy(seed):
+    df = random_tinkoff_frame(seed)
+    pd.testing.assert_frame_equal(
+        reshape_tinkoff_platinum(df.copy()),
+        legacy_reshape_tinkoff_platinum(df.copy()),
+    )
+
+
+def test_tinkoff_platinum_statement_layout():
+    df = pd.DataFrame([
+        ['Дата и время', 'Сумма', 'Описание', 'Карта'],
+        ['01.02.2024', '-100,00 ₽', 'Оплата в', '2578'],
+        ['12:30', np.nan, 'кафе', np.nan],
+        [np.nan, np.nan, 'Москва', np.nan],
+        ['02.02.2024', '+5,00 ₽', 'Кешбэк', '2578'],
+        ['09:00', np.nan, np.nan, np.nan],
+    ])
+    result = reshape_tinkoff_platinum(df)
+    assert result.values.tolist() == [
+        ['01.02.2024 12:30', '-100,00 ₽', 'Оплата в кафе Москва', '2578'],
+        ['02.02.2024 09:00', '+5,00 ₽', 'Кешбэк', '2578'],
+    ]
+    pd.testing.assert_frame_equal(result, legacy_reshape_tinkoff_platinum(df))
+
+
+def test_tinkoff_platinum_without_text_in_first_column():
+    df = pd.DataFrame({0: [np.nan, 1.5], 1: ['a', 'b'], 2: ['c', 'd'], 3: ['e', 'f']})
+    pd.testing.assert_frame_equal(reshape_tinkoff_platinum(df), legacy_reshape_tinkoff_platinum(df))
+
+
+def random_text_frame(seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame({'text': [rng.choice(TEXT_VALUES) for _ in range(rng.randint(0, 20))]})
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_visa_gold_aeroflot_matches_legacy(seed):
+    df = random_text_frame(seed)
+    pd.testing.assert_frame_equal(
+        reshape_visa_gold_aeroflot(df.copy()),
+        legacy_reshape_visa_gold_aeroflot(df.copy()),
+    )
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_yandex_matches_legacy(seed):
+    df = random_text_frame(seed)
+    pd.testing.assert_frame_equal(
+        reshape_Yandex(df.copy()),
+        legacy_reshape_Yandex(df.copy()),
+    )
+
+
+def test_visa_gold_aeroflot_statement_layout():
+    df = pd.DataFrame({'text': [
+        'Выписка', '01.02.2024', '12:30', 'Оплата', '-100,00', '900,00', '02.02.2024', '123456',
+        'Москва', '03.02.2024', '09:00', 'Кешбэк', '+5,00', '905,00', '04.02.2024', '654321',
+    ]})
+    result = reshape_visa_gold_aeroflot(df)
+    assert result.values.tolist() == [
+        ['01.02.2024 12:30', '-100,00', 'Оплата: Москва',
+         'Остаток: 900,00 ₽, дата списания: 02.02.2024, код авторизации: 123456'],
+        ['03.02.2024 09:00', '+5,00', 'Кешбэк:',
+         'Остаток: 905,00 ₽, дата списания: 04.02.2024, код авторизации: 654321'],
+    ]
+    pd.testing.assert_frame_equal(result, legacy_reshape_visa_gold_aeroflot(df))
+
+
+def test_yandex_statement_layout():
+    df = pd.DataFrame({'text': [
+        'Оплата', 'в магазине', '01.02.2024', 'в 12:30', '02.02.2024', '-100,00 ₽', '-100,00 ₽',
+        'Перевод', '03.02.2024', '04.02.2024', '+50,00 ₽', '+50,00 ₽',
+    ]})
+    result = reshape_Yandex(df)
+    assert result.values.tolist() == [
+        ['01.02.2024 12:30', '-100,00 ₽', 'Оплата в магазине', 'Карта Пэй'],
+        ['03.02.2024 00:00', '+50,00 ₽', 'Перевод', 'Карта Пэй'],
+    ]
+    pd.testing.assert_frame_equal(result, legacy_reshape_Yandex(df))
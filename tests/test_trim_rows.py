@@ -0,0 +1,51 @@
+"""Автотест обрезки текстовых выписок trim_text_rows одним скомпилированным выражением"""
+"""Запуск: pytest tests/test_trim_rows.py"""
+
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from extract_transactions_pdf1 import compile_remove_pattern, load_pdf_config, trim_text_rows, PDF_CONFIG_PATH
+from scripts.legacy_reshapers import legacy_trim_text_rows
+
+LINES = [
+    'Расшифровка операций за период', 'Страница 2', 'КАТЕГОРИЯ', 'Оплата', '01.02.2024', 'до 12.12',
+    '1 052,45 ₽', '+1 052,45 ₽', '"52,45 ₽"', 'Карта', 'a.b', 'a+b', 'Дергунова К. А.',
+    'Выписка по Договору за период с 01.01', 'Исходящий остаток за январь', '',
+]
+
+
+def random_text_frame(seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame({'text': [rng.choice(LINES) for _ in range(rng.randint(1, 30))]})
+
+
+@pytest.mark.parametrize('pdf_type, regex', [('Visa_Gold_Aeroflot', False), ('Yandex', True)])
+@pytest.mark.parametrize('seed', range(100))
+def test_trim_matches_legacy(pdf_type, regex, seed):
+    config = load_pdf_config(PDF_CONFIG_PATH)['pdf_types'][pdf_type]
+    args = (config['remove_rows_by_text'], config['start_marker'], config['end_marker'], regex)
+    df = random_text_frame(seed)
+    pd.testing.assert_frame_equal(trim_text_rows(df.copy(), *args), legacy_trim_text_rows(df.copy(), *args))
+
+
+@pytest.mark.parametrize('remove_texts, regex', [([], True), (['a.b', 'a+b'], False), (['a.b'], True)])
+def test_trim_without_markers(remove_texts, regex):
+    df = pd.DataFrame({'text': LINES})
+    pd.testing.assert_frame_equal(
+        trim_text_rows(df.copy(), remove_texts, None, None, regex),
+        legacy_trim_text_rows(df.copy(), remove_texts, None, None, regex),
+    )
+
+
+def test_remove_pattern_is_compiled_once():
+    patterns = ('Страница', 'a.b')
+    assert compile_remove_pattern(patterns, False) is compile_remove_pattern(tuple(list(patterns)), False)
+    assert compile_remove_pattern((), True) is None
+    assert compile_remove_pattern(patterns, False).search('axb') is None
+
+
+def test_non_text_values_are_kept():
+    # Старая реализация падала на столбце без строк (.str недоступен)
+    df = pd.DataFrame({'text': [np.nan, np.nan]})
+    assert trim_text_rows(df, ['Страница'], 'Расшифровка', 'Дергунова', False).equals(df)
@@ -0,0 +1,23 @@
+"""Автотест восстановления таблицы по координатам слов"""
+"""Запуск: pytest tests/test_words_table.py"""
+
+from pdf_processing.words_table import words_to_rows
+
+
+def word(x0, y0, text, width=20):
+    return (x0, y0, x0 + width, y0 + 8, text, 0, 0, 0)
+
+
+def test_words_grouped_into_rows_and_columns():
+    words = [
+        word(200, 10.5, '100,00'), word(10, 10, '01.01.2024'), word(100, 11, 'Оплата'), word(125, 10, 'кафе'),
+        word(10, 30, '02.01.2024'), word(200, 30, '50,00'),
+    ]
+    assert words_to_rows(words, [0, 90, 190]) == [
+        ['01.01.2024', 'Оплата кафе', '100,00'],
+        ['02.01.2024', '', '50,00'],
+    ]
+
+
+def test_words_left_of_first_boundary_go_to_first_column():
+    assert words_to_rows([word(2, 5, 'X')], [50, 100]) == [['X', '']]
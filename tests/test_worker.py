@@ -0,0 +1,102 @@
+"""Автотест пула процессов обработки PDF"""
+"""Запуск: pytest tests/test_worker.py"""
+
+import asyncio
+import operator
+import os
+import subprocess
+import time
+from pathlib import Path
+import pytest
+from pdf_processing.worker import PdfWorkerPool, WorkerCrashedError
+
+
+@pytest.fixture(autouse=True)
+def log_dir(tmp_path, monkeypatch):
+    """Процессы пула наследуют окружение: их логи пишутся во временный каталог, а не в logs/."""
+    monkeypatch.setenv('LOG_DIR', str(tmp_path / 'logs'))
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def _with_pool(body, **kwargs):
+    pool = PdfWorkerPool(**kwargs)
+    await pool.start()
+    try:
+        return await body(pool)
+    finally:
+        await pool.close()
+
+
+def test_result_and_error_are_returned():
+    async def body(pool):
+        assert await pool.run(operator.add, 2, 3) == 5
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(operator.truediv, 1, 0)
+        # После исключения задачи процесс продолжает работать
+        return await pool.run(os.getpid)
+
+    assert run(_with_pool(body, max_workers=1)) != os.getpid()
+
+
+def test_timeout_replaces_process():
+    async def body(pool):
+        pid = await pool.run(os.getpid)
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(time.sleep, 30)
+        assert await pool.run(os.getpid) != pid
+
+    run(_with_pool(body, max_workers=1, timeout=5))
+
+
+def test_timeout_kills_grandchildren(tmp_path):
+    pid_path = tmp_path / 'pid'
+
+    async def body(pool):
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(_start_grandchild_and_sleep, str(pid_path))
+
+    run(_with_pool(body, max_workers=1, timeout=5))
+    pid = int(pid_path.read_text())
+    deadline = time.monotonic() + 5
+    while _is_running(pid) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert not _is_running(pid)
+
+
+def test_crashed_process_is_replaced():
+    async def body(pool):
+        with pytest.raises(WorkerCrashedError):
+            await pool.run(os._exit, 1)
+        assert await pool.run(operator.add, 1, 1) == 2
+
+    run(_with_pool(body, max_workers=1))
+
+
+def test_tasks_run_in_parallel():
+    async def body(pool):
+        pids = await asyncio.gather(*(pool.run(_sleep_and_pid, 1) for _ in range(2)))
+        return len(set(pids))
+
+    assert run(_with_pool(body, max_workers=2)) == 2
+
+
+def _sleep_and_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def _start_grandchild_and_sleep(pid_path):
+    child = subprocess.Popen(['sleep', '60'])
+    Path(pid_path).write_text(str(child.pid))
+    time.sleep(60)
+
+
+def _is_running(pid):
+    """Процесс существует и не зомби (убитого сироту может не успеть забрать init)."""
+    try:
+        return Path(f'/proc/{pid}/stat').read_text().split(') ')[1][0] != 'Z'
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,84 @@
+"""Автотест рабочих каталогов заданий (pdf_processing.workspace)"""
+"""Запуск: pytest tests/test_workspace.py"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+import pytest
+from pdf_processing.workspace import WorkspaceManager
+
+
+@pytest.fixture
+def workspaces(tmp_path):
+    return WorkspaceManager(tmp_path / 'jobs', max_age_hours=1)
+
+
+def test_job_directory_is_unique_and_removed(workspaces):
+    with workspaces.job() as first, workspaces.job() as second:
+        assert first != second
+        Path(first, 'result.csv').write_text('data')
+    assert not Path(first).exists() and not Path(second).exists()
+
+
+def test_job_directory_is_removed_on_exception(workspaces):
+    with pytest.raises(RuntimeError):
+        with workspaces.job() as path:
+            Path(path, 'result.csv').write_text('data')
+            raise RuntimeError
+    assert not Path(path).exists()
+
+
+def test_job_directory_is_removed_on_cancellation(workspaces):
+    paths = []
+
+    async def handler():
+        with workspaces.job() as path:
+            paths.append(path)
+            await asyncio.sleep(30)
+
+    async def main():
+        task = asyncio.create_task(handler())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert paths and not Path(paths[0]).exists()
+
+
+def make_aged(path: Path, hours: float, is_dir: bool = True) -> Path:
+    if is_dir:
+        path.mkdir()
+    else:
+        path.write_text('')
+    timestamp = time.time() - hours * 3600
+    os.utime(path, (timestamp, timestamp))
+    return path
+
+
+def test_janitor_removes_only_stale_job_directories(workspaces):
+    stale = make_aged(workspaces.root / 'job_stale', hours=2)
+    fresh = make_aged(workspaces.root / 'job_fresh', hours=0.5)
+    foreign = make_aged(workspaces.root / 'other_stale', hours=2)
+    stale_file = make_aged(workspaces.root / 'job_file', hours=2, is_dir=False)
+
+    assert workspaces.cleanup_orphaned() == 1
+    assert not stale.exists()
+    assert fresh.exists() and foreign.exists() and stale_file.exists()
+
+
+def test_run_janitor_cleans_up_at_start(workspaces):
+    stale = make_aged(workspaces.root / 'job_stale', hours=2)
+
+    async def main():
+        task = asyncio.create_task(workspaces.run_janitor())
+        for _ in range(100):
+            if not stale.exists():
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(main())
+    assert not stale.exists()
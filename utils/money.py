@@ -0,0 +1,75 @@
+"""
+Суммы в копейках и даты операций.
+
+Копейки всегда хранятся в столбце Int64 (pandas nullable integer) — это и
+есть признак единиц: parse_amounts возвращает такой столбец без изменений.
+Любые другие значения (строки "-1 234,56 ₽", числа из CSV) считаются рублями.
+Модуль не зависит ни от обработки PDF, ни от БД и используется обеими.
+"""
+import re
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype
+
+DATE_FORMAT = '%d.%m.%Y %H:%M'
+
+# Пробелы (в т.ч. неразрывные), знак рубля, кавычки и обозначения валюты
+_AMOUNT_NOISE = r"[\s₽\"']|руб\.?|RUB|[PР]"
+_MINUS = r"[–−]"
+_AMOUNT_RE = re.compile(r"^([+-]?)(\d+)(?:[.,](\d{1,2}))?$")
+
+
+def is_kopecks(series: pd.Series) -> bool:
+    """Столбец уже в копейках (Int64)."""
+    return isinstance(series.dtype, pd.Int64Dtype)
+
+
+def parse_amounts(series: pd.Series) -> pd.Series:
+    """
+    Суммы в копейках (Int64). Строки, не похожие на сумму, и пропуски — <NA>.
+
+    Столбец Int64 уже в копейках и не меняется; числа любого другого типа и
+    строки — рубли (числа округляются до копейки).
+    """
+    if is_kopecks(series):
+        return series
+    if is_numeric_dtype(series.dtype) and series.dtype != bool:
+        return (series.astype(float) * 100).round().astype('Int64')
+
+    text = series.astype('string').str.replace(_AMOUNT_NOISE, '', regex=True).str.replace(_MINUS, '-', regex=True)
+    parts = text.str.extract(_AMOUNT_RE)
+    rubles = pd.to_numeric(parts[1], errors='coerce').astype('Int64')
+    kopecks = pd.to_numeric(parts[2].str.ljust(2, '0'), errors='coerce').astype('Int64').fillna(0)
+    sign = pd.Series(np.where((parts[0] == '-').fillna(False), -1, 1), index=series.index)
+    return ((rubles * 100 + kopecks) * sign).astype('Int64')
+
+
+def parse_amount(value) -> int | None:
+    """Одна сумма в рублях (строка или число) -> копейки; None — не сумма."""
+    result = parse_amounts(pd.Series([value], dtype=object)).iloc[0]
+    return None if pd.isna(result) else int(result)
+
+
+def parse_datetimes(series: pd.Series) -> pd.Series:
+    """Дата и время в формате DATE_FORMAT -> datetime64 (ошибки — NaT); datetime64 не меняется."""
+    if is_datetime64_any_dtype(series.dtype):
+        return series
+    return pd.to_datetime(series, format=DATE_FORMAT, errors='coerce')
+
+
+def kopecks_to_text(series: pd.Series) -> pd.Series:
+    """Сумма -> "-1234,56" (формат result.csv); <NA> остаётся пропуском."""
+    kopecks = parse_amounts(series)
+    absolute = kopecks.abs()
+    sign = pd.Series(np.where((kopecks < 0).fillna(False), '-', ''), index=series.index)
+    text = sign + (absolute // 100).astype('string') + ',' + (absolute % 100).astype('string').str.zfill(2)
+    return text.astype(object).where(kopecks.notna(), np.nan)
+
+
+def kopecks_to_decimal(series: pd.Series) -> pd.Series:
+    """Сумма -> Decimal в рублях для NUMERIC(12, 2); <NA> -> None."""
+    return pd.Series(
+        [None if pd.isna(value) else Decimal(int(value)).scaleb(-2) for value in parse_amounts(series)],
+        index=series.index, dtype=object,
+    )